@@ -1,12 +1,37 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse
+from typing import List, Optional
+import asyncio
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+import gzip
+import json
+import os
 import pathlib
-import uvicorn
 import time
 import hashlib
 
-from futures_analyzer import FuturesVocabularyAnalyzer, read_file_content_bytes, results_with_wordcloud
+from futures_analyzer import (get_analyzer, analyzer_registry_stats, read_file_content_bytes, analyze_text,
+                              iter_result_sections, split_result_sections, analyze_stream, iter_text_chunks, render_wordcloud,
+                              export_terms_csv, shape_result, shape_sections, results_with_wordcloud, RESPONSE_MODES)
+from futures_executor import BoundedExecutor, ExecutorSaturated
+from futures_cache import make_cache_backend, cache_key, ParsedTextCache, LRUCache
+from futures_chunks import ChunkMatchCache
+from futures_index import SearchIndex, QueryError
+from futures_jobs import JobRunner, JobQueueFull, make_job_store
+from futures_metrics import MetricsRegistry, StageTimer, SIZE_BUCKETS
+from futures_vocabulary import Vocabulary, VocabularyStore
+
+# Optional faster JSON encoder and brotli compression; both fall back to the stdlib
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 app = FastAPI()
 
@@ -16,52 +41,173 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # X-Result-Key names the cached result for /wordcloud/{result_key}
+    expose_headers=["X-Result-Key", "ETag"],
 )
 
 BASE = pathlib.Path(__file__).resolve().parent.parent
 
-# Simple in-memory cache for analyses: map key -> (timestamp, result)
-# Keeps up to CACHE_MAX items and entries expire after CACHE_TTL seconds.
-CACHE = {}
-CACHE_ORDER = []
-CACHE_MAX = 200
-CACHE_TTL = 60 * 60  # 1 hour
-
-def _cache_get(key):
-    entry = CACHE.get(key)
-    if not entry:
-        return None
-    ts, value = entry
-    if time.time() - ts > CACHE_TTL:
-        # expired
-        try:
-            del CACHE[key]
-            CACHE_ORDER.remove(key)
-        except Exception:
-            pass
-        return None
-    return value
-
-def _cache_set(key, value):
-    if key in CACHE:
-        # refresh
-        CACHE[key] = (time.time(), value)
-        try:
-            CACHE_ORDER.remove(key)
-        except Exception:
-            pass
-        CACHE_ORDER.append(key)
-        return
-    # evict if needed
-    if len(CACHE_ORDER) >= CACHE_MAX:
-        old = CACHE_ORDER.pop(0)
-        try:
-            del CACHE[old]
-        except Exception:
-            pass
-    CACHE[key] = (time.time(), value)
-    CACHE_ORDER.append(key)
+# Enforce limits: max text length and max upload size (raise via environment)
+MAX_TEXT_LENGTH = int(os.environ.get('FUTURESNESS_MAX_TEXT_LENGTH', 200_000))  # characters
+MAX_UPLOAD_BYTES = int(os.environ.get('FUTURESNESS_MAX_UPLOAD_BYTES', 4 * 1024 * 1024))  # 4 MB
+MAX_BATCH_DOCUMENTS = 100
+MAX_COOCCURRENCE_WINDOWS = 16
+
+# Texts longer than this (characters, or bytes for plain-text uploads) go through
+# the chunked StreamingDocumentAnalyzer instead of being analyzed in one piece.
+STREAMING_THRESHOLD = int(os.environ.get('FUTURESNESS_STREAMING_THRESHOLD', 200_000))
+STREAMING_CHUNK_SIZE = 1024 * 1024
+
+# Parsing and analysis run on a bounded pool so a slow PDF or a large document
+# never blocks the event loop. Requests beyond workers + queue get a 503.
+ANALYSIS_EXECUTOR = BoundedExecutor(
+    max_workers=int(os.environ.get('FUTURESNESS_ANALYSIS_WORKERS', '4')),
+    max_queue=int(os.environ.get('FUTURESNESS_ANALYSIS_QUEUE', '16')),
+    kind=os.environ.get('FUTURESNESS_ANALYSIS_EXECUTOR', 'thread'),
+)
+
+# Progressive output formats for /analyze?stream=...
+STREAM_MEDIA_TYPES = {'ndjson': 'application/x-ndjson', 'sse': 'text/event-stream'}
+
+# JSON and CSV responses at least this large are compressed (br, else gzip)
+# when the client accepts it; streams are sent as they are.
+COMPRESSION_MIN_BYTES = 1024
+
+# Vocabulary files, selectable per request by name; POST /vocabularies/reload
+# picks up edits without a restart.
+VOCABULARIES = VocabularyStore(os.environ.get('FUTURESNESS_VOCABULARY_DIR') or None,
+                               default=os.environ.get('FUTURESNESS_DEFAULT_VOCABULARY', 'futures'))
+MAX_CUSTOM_VOCABULARY_TERMS = 5000
+
+# Warm up: compile the default vocabulary at import time so the first request
+# after a cold start reuses it instead of paying the compile cost.
+get_analyzer(VOCABULARIES.get().categories, digest=VOCABULARIES.get().hash)
+
+# Result cache: 'memory' (per-process LRU bounded by entries and estimated bytes)
+# or 'sqlite' (a local file shared by workers that survives restarts).
+CACHE_BACKEND = os.environ.get('FUTURESNESS_CACHE_BACKEND', 'memory')
+CACHE_TTL = int(os.environ.get('FUTURESNESS_CACHE_TTL', 60 * 60))  # 1 hour
+if CACHE_BACKEND == 'sqlite':
+    RESULT_CACHE = make_cache_backend(
+        'sqlite',
+        path=os.environ.get('FUTURESNESS_CACHE_PATH') or None,
+        max_entries=int(os.environ.get('FUTURESNESS_CACHE_MAX_ENTRIES', 10_000)),
+        ttl=CACHE_TTL,
+    )
+else:
+    RESULT_CACHE = make_cache_backend(
+        CACHE_BACKEND,
+        max_entries=int(os.environ.get('FUTURESNESS_CACHE_MAX_ENTRIES', 200)),
+        max_bytes=int(os.environ.get('FUTURESNESS_CACHE_MAX_BYTES', 128 * 1024 * 1024)),
+        ttl=CACHE_TTL,
+    )
+
+# Text extracted from uploads, keyed by the raw bytes' hash and file type, so a
+# re-uploaded PDF or DOCX skips parsing before the result cache is consulted.
+PARSE_CACHE = ParsedTextCache(LRUCache(
+    max_entries=int(os.environ.get('FUTURESNESS_PARSE_CACHE_MAX_ENTRIES', 500)),
+    max_bytes=int(os.environ.get('FUTURESNESS_PARSE_CACHE_MAX_BYTES', 64 * 1024 * 1024)),
+    ttl=CACHE_TTL,
+))
+
+# Term matches per content-defined chunk (paragraph-sized, cut where no term can
+# span), so a revised draft that misses the result cache only rescans the chunks
+# that changed. Not shared with 'process' analysis workers.
+CHUNK_CACHE = ChunkMatchCache(LRUCache(
+    max_entries=int(os.environ.get('FUTURESNESS_CHUNK_CACHE_MAX_ENTRIES', 20_000)),
+    max_bytes=int(os.environ.get('FUTURESNESS_CHUNK_CACHE_MAX_BYTES', 64 * 1024 * 1024)),
+    ttl=CACHE_TTL,
+))
+
+# Server-rendered wordclouds (GET /wordcloud/{result_key}) run on their own
+# small pool, so rendering never takes an analysis slot. Images are cached by a
+# hash of the frequencies, size and format; equal results share one rendering.
+WORDCLOUD_EXECUTOR = BoundedExecutor(
+    max_workers=int(os.environ.get('FUTURESNESS_WORDCLOUD_WORKERS', '2')),
+    max_queue=int(os.environ.get('FUTURESNESS_WORDCLOUD_QUEUE', '8')),
+)
+WORDCLOUD_CACHE = LRUCache(
+    max_entries=int(os.environ.get('FUTURESNESS_WORDCLOUD_CACHE_MAX_ENTRIES', 256)),
+    max_bytes=int(os.environ.get('FUTURESNESS_WORDCLOUD_CACHE_MAX_BYTES', 32 * 1024 * 1024)),
+    ttl=CACHE_TTL,
+)
+WORDCLOUD_FORMATS = {'png': 'image/png', 'webp': 'image/webp'}
+WORDCLOUD_MAX_WIDTH = 1600
+_WORDCLOUD_RENDERS = {}  # image key -> render in progress
+
+# Asynchronous jobs (POST /jobs, GET /jobs/{id}) for documents that would outlast
+# a request timeout. They run on a local thread pool of their own; records live in
+# 'memory' (this process only) or 'sqlite' (shared by workers, survives restarts)
+# and expire FUTURESNESS_JOB_RETENTION seconds after their last update.
+JOB_STORE = os.environ.get('FUTURESNESS_JOB_STORE', 'memory')
+JOB_RETENTION = int(os.environ.get('FUTURESNESS_JOB_RETENTION', 60 * 60))  # 1 hour
+if JOB_STORE == 'sqlite':
+    _job_store = make_job_store('sqlite', path=os.environ.get('FUTURESNESS_JOB_STORE_PATH') or None, retention=JOB_RETENTION)
+else:
+    _job_store = make_job_store(JOB_STORE, retention=JOB_RETENTION,
+                                max_jobs=int(os.environ.get('FUTURESNESS_JOB_MAX_JOBS', 1000)),
+                                max_bytes=int(os.environ.get('FUTURESNESS_JOB_MAX_BYTES', 128 * 1024 * 1024)))
+JOB_RUNNER = JobRunner(
+    _job_store,
+    max_workers=int(os.environ.get('FUTURESNESS_JOB_WORKERS', '2')),
+    max_queue=int(os.environ.get('FUTURESNESS_JOB_QUEUE', '32')),
+)
 
+# Inverted index behind /index and /search, opened on first use
+INDEX_PATH = os.environ.get('FUTURESNESS_INDEX_PATH') or None
+MAX_SEARCH_RESULTS = 100
+_SEARCH_INDEX = None
+
+# Prometheus metrics served by /metrics. Stage timings come from the same
+# StageTimer blocks that /analyze returns with timings=true.
+METRICS = MetricsRegistry()
+STAGE_SECONDS = METRICS.histogram('futuresness_stage_seconds', 'Seconds spent in each parsing and analysis stage', ('stage',))
+REQUEST_SECONDS = METRICS.histogram('futuresness_request_seconds', 'HTTP request latency until the response starts', ('route',))
+REQUESTS = METRICS.counter('futuresness_requests_total', 'HTTP requests by route and status', ('route', 'status'))
+REQUESTS_IN_FLIGHT = METRICS.gauge('futuresness_requests_in_flight', 'HTTP requests being handled')
+DOCUMENT_CHARACTERS = METRICS.histogram('futuresness_document_characters', 'Size of analyzed documents in characters '
+                                        '(bytes for chunked plain-text uploads)', buckets=SIZE_BUCKETS)
+METRICS.gauge('futuresness_executor_in_flight', 'Calls running or queued on the analysis executor',
+              callback=lambda: ANALYSIS_EXECUTOR.stats()['in_flight'])
+METRICS.counter('futuresness_executor_rejected_total', 'Calls refused because the analysis executor was saturated',
+                callback=lambda: ANALYSIS_EXECUTOR.stats()['rejected'])
+METRICS.counter('futuresness_cache_hits_total', 'Cache hits', ('cache',),
+                callback=lambda: {(name,): stats['hits'] for name, stats in _cache_stats().items()})
+METRICS.counter('futuresness_cache_misses_total', 'Cache misses', ('cache',),
+                callback=lambda: {(name,): stats['misses'] for name, stats in _cache_stats().items()})
+METRICS.gauge('futuresness_cache_hit_ratio', 'Cache hit rate since start', ('cache',),
+              callback=lambda: {(name,): stats['hit_rate'] for name, stats in _cache_stats().items()})
+RESPONSE_JSON_BYTES = METRICS.counter('futuresness_response_json_bytes_total',
+                                     'Serialized size of JSON and CSV responses before compression', ('mode',))
+RESPONSE_SENT_BYTES = METRICS.counter('futuresness_response_sent_bytes_total',
+                                     'Size of JSON and CSV responses as sent', ('mode', 'encoding'))
+METRICS.gauge('futuresness_jobs_in_flight', 'Jobs running or queued on the job workers',
+              callback=lambda: JOB_RUNNER.in_flight)
+METRICS.counter('futuresness_jobs_total', 'Jobs finished or refused, by outcome', ('status',),
+                callback=lambda: {(status,): getattr(JOB_RUNNER, status) for status in ('succeeded', 'failed', 'rejected')})
+METRICS.counter('futuresness_chunk_characters_total', 'Characters matched by scanning or reused from the chunk cache',
+                ('source',), callback=lambda: {('scanned',): CHUNK_CACHE.characters_scanned,
+                                               ('reused',): CHUNK_CACHE.characters_reused})
+METRICS.counter('futuresness_parse_seconds_saved_total', 'Parse time skipped thanks to the parse cache',
+                callback=lambda: PARSE_CACHE.stats()['parse_seconds_saved'])
+
+
+@app.middleware("http")
+async def track_requests(request, call_next):
+    REQUESTS_IN_FLIGHT.inc()
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        REQUESTS_IN_FLIGHT.dec()
+        # the route template, not the raw path, keeps label cardinality bounded
+        route = request.scope.get('route')
+        route = route.path if route is not None else 'unmatched'
+        REQUEST_SECONDS.observe(time.perf_counter() - started, route=route)
+        REQUESTS.inc(route=route, status=status)
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -73,40 +219,686 @@ async def homepage():
 
 
 @app.post("/analyze")
-async def analyze(text: str = Form(default=''), file: UploadFile = File(default=None), cooccurrence_window: int = Form(default=100)):
+async def analyze(request: Request, text: str = Form(default=''), file: UploadFile = File(default=None), cooccurrence_window: int = Form(default=100), cooccurrence_top_k: int = Form(default=20),
+                  snippet_limit: int = Form(default=0), cooccurrence_windows: str = Form(default=''),
+                  vocabulary: str = Form(default=''), custom_vocabulary: str = Form(default=''),
+                  stream: str = Form(default=''), timings: bool = Form(default=False),
+                  mode: str = Form(default='full'), include_csv: Optional[bool] = Form(default=None)):
+    """Analyze a text or uploaded file.
+
+    ``mode`` is 'full', 'compact' or 'summary' (see shape_sections);
+    ``include_csv`` overrides whether the csv string is sent. ``timings=true``
+    adds seconds per stage under 'timings'.
+    """
+    if stream and stream not in STREAM_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"stream must be one of {sorted(STREAM_MEDIA_TYPES)}")
+    _check_mode(mode)
+
+    options = _analysis_options(cooccurrence_window, cooccurrence_top_k, snippet_limit, cooccurrence_windows)
+    vocab = _resolve_vocabulary(vocabulary, custom_vocabulary)
+
     # prefer uploaded file if provided
     content = text or ''
-
-    # Enforce limits: max text length and max upload size
-    MAX_TEXT_LENGTH = 200_000  # characters
-    MAX_UPLOAD_BYTES = 4 * 1024 * 1024  # 4 MB
+    chunked_file = None
+    timer = StageTimer()
 
     if file is not None:
-        data = await file.read()
-        if len(data) > MAX_UPLOAD_BYTES:
+        size = _upload_size(file)
+        if size > MAX_UPLOAD_BYTES:
             raise HTTPException(status_code=413, detail=f"Uploaded file too large (limit {MAX_UPLOAD_BYTES} bytes)")
-        content = read_file_content_bytes(data, file.filename)
+        if size > STREAMING_THRESHOLD and _is_plain_text(file.filename):
+            # large plain text: hash and analyze it in chunks, never as one string
+            chunked_file = file.file
+        else:
+            data = await file.read()
+            content = await _read_upload(data, file.filename, timer)
 
-    if len(content) > MAX_TEXT_LENGTH:
+    if chunked_file is None and len(content) > MAX_TEXT_LENGTH:
         raise HTTPException(status_code=413, detail=f"Text too large (limit {MAX_TEXT_LENGTH} characters)")
+    DOCUMENT_CHARACTERS.observe(size if chunked_file is not None else len(content))
 
     # compute cache key
-    key_src = f"{hashlib.sha256(content.encode('utf-8')).hexdigest()}:{cooccurrence_window}"
-    cached = _cache_get(key_src)
+    with timer.stage('cache_lookup'):
+        if chunked_file is not None:
+            key_src = _digest_key(await run_in_threadpool(_file_sha256, chunked_file), options, vocab)
+        else:
+            key_src = _result_key(content, options, vocab)
+        cached = RESULT_CACHE.get(key_src)
+    from_cache = cached is not None
+
+    if cached is None and (chunked_file is not None or len(content) > STREAMING_THRESHOLD):
+        if chunked_file is not None:
+            chunked_file.seek(0)
+            chunks = iter_text_chunks(chunked_file, STREAMING_CHUNK_SIZE)
+        else:
+            chunks = (content[i:i + STREAMING_CHUNK_SIZE] for i in range(0, len(content), STREAMING_CHUNK_SIZE))
+        cached = await _run_local(_analyze_chunks, _limit_chunks(chunks), vocab, **options, timings=True)
+        timer.merge(cached.pop('timings'))
+        RESULT_CACHE.set(key_src, cached)
+
+    if stream:
+        return await _stream_analysis(content, options, vocab, key_src, cached, stream, from_cache, timer, timings,
+                                      mode, include_csv)
     if cached is not None:
-        # mark cached
-        cached['_cached'] = True
-        return JSONResponse(cached)
+        _observe_stages(timer)
+        result = cached
+    else:
+        # Return raw frequencies so the frontend can render the word cloud client-side
+        result = await _run_bounded(analyze_text, content or '', vocab.categories, **options, timings=True,
+                                    chunk_cache=_chunk_cache())
+        timer.merge(result.pop('timings'))
+        _observe_stages(timer)
+        # the full result is cached; modes only shape what is sent
+        RESULT_CACHE.set(key_src, result)
+
+    # shaped on a copy; the stored entry is shared between requests
+    result = dict(shape_result(result, mode, include_csv))
+    if from_cache:
+        result['_cached'] = True
+    if timings:
+        result['timings'] = timer.as_dict()
+    return _encoded_response(request, result, mode, headers={'X-Result-Key': key_src})
+
 
-    analyzer = FuturesVocabularyAnalyzer()
-    # Return raw frequencies so the frontend can render the word cloud client-side
-    result = results_with_wordcloud(analyzer, content or '', include_wordcloud=False, cooccurrence_window=cooccurrence_window)
+@app.post("/analyze/batch")
+async def analyze_batch(request: Request, texts: List[str] = Form(default=None), files: List[UploadFile] = File(default=None),
+                        cooccurrence_window: int = Form(default=100), cooccurrence_top_k: int = Form(default=20),
+                        snippet_limit: int = Form(default=0), cooccurrence_windows: str = Form(default=''),
+                        vocabulary: str = Form(default=''), custom_vocabulary: str = Form(default=''),
+                        ordered: bool = Form(default=True), timings: bool = Form(default=False),
+                        mode: str = Form(default='full'), include_csv: Optional[bool] = Form(default=None)):
+    """Analyze many texts and/or files in one call.
+
+    Documents are analyzed on the bounded analysis executor, and the
+    response is sent once all are done: ``documents`` in input order, or in
+    the order their analyses finished when ``ordered`` is false. Each entry
+    carries its input ``index``, and its analysis stage ``timings`` when
+    requested. ``mode`` and ``include_csv`` shape each result as in /analyze.
+    """
+    _check_mode(mode)
+    documents = [(f"text-{i}", t) for i, t in enumerate(texts or [])]
+    for upload in files or []:
+        data = await upload.read()
+        if len(data) > MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail=f"Uploaded file {upload.filename!r} too large (limit {MAX_UPLOAD_BYTES} bytes)")
+        documents.append((upload.filename, data))
+    if not documents:
+        raise HTTPException(status_code=400, detail="Provide at least one text or file")
+    if len(documents) > MAX_BATCH_DOCUMENTS:
+        raise HTTPException(status_code=413, detail=f"Too many documents (limit {MAX_BATCH_DOCUMENTS})")
 
-    # Add cache
-    _cache_set(key_src, result)
+    names = [name for name, _ in documents]
+    contents = []
+    parse_timer = StageTimer()
+    for name, payload in documents:
+        content = payload if isinstance(payload, str) else await _read_upload(payload, name, parse_timer)
+        if len(content) > MAX_TEXT_LENGTH:
+            raise HTTPException(status_code=413, detail=f"Document {name!r} too large (limit {MAX_TEXT_LENGTH} characters)")
+        contents.append(content)
+        DOCUMENT_CHARACTERS.observe(len(content))
+    _observe_stages(parse_timer)
 
+    options = _analysis_options(cooccurrence_window, cooccurrence_top_k, snippet_limit, cooccurrence_windows)
+    vocab = _resolve_vocabulary(vocabulary, custom_vocabulary)
+    keys = [_result_key(content, options, vocab) for content in contents]
+    results = {}
+    pending = []
+    for index, key in enumerate(keys):
+        cached = RESULT_CACHE.get(key)
+        if cached is not None:
+            results[index] = dict(cached, _cached=True)
+        else:
+            pending.append(index)
+
+    finished = list(results)
+    stage_timings = {}
+    if pending:
+        # on the bounded executor like /analyze, at most max_workers documents of
+        # a batch at a time so a batch alone never fills the queue; when other
+        # requests have, the batch gets the same 503
+        slots = asyncio.Semaphore(ANALYSIS_EXECUTOR.max_workers)
+
+        async def analyze(index):
+            async with slots:
+                return index, await _run_bounded(analyze_text, contents[index], vocab.categories, **options,
+                                                 timings=True, chunk_cache=_chunk_cache())
+
+        tasks = [asyncio.ensure_future(analyze(index)) for index in pending]
+        try:
+            for done in asyncio.as_completed(tasks):
+                index, result = await done
+                timer = StageTimer()
+                timer.merge(result.pop('timings'))
+                _observe_stages(timer)
+                stage_timings[index] = timer.as_dict()
+                RESULT_CACHE.set(keys[index], result)
+                results[index] = result
+                finished.append(index)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    order = range(len(documents)) if ordered else finished
+    entries = []
+    for i in order:
+        entry = {'index': i, 'name': names[i], 'result_key': keys[i], 'result': shape_result(results[i], mode, include_csv)}
+        if timings:
+            # cached documents ran no stages
+            entry['timings'] = stage_timings.get(i, {'total': 0.0})
+        entries.append(entry)
+    return _encoded_response(request, {'documents': entries}, mode)
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(text: str = Form(default=''), file: UploadFile = File(default=None),
+                     cooccurrence_window: int = Form(default=100), cooccurrence_top_k: int = Form(default=20),
+                     snippet_limit: int = Form(default=0), cooccurrence_windows: str = Form(default=''),
+                     vocabulary: str = Form(default=''), custom_vocabulary: str = Form(default='')):
+    """Queue the analysis of a text or uploaded file and return its job id at once.
+
+    Takes the same options as /analyze. Parsing and analysis run on the job
+    workers; poll GET /jobs/{id} for progress and the result.
+    """
+    options = _analysis_options(cooccurrence_window, cooccurrence_top_k, snippet_limit, cooccurrence_windows)
+    vocab = _resolve_vocabulary(vocabulary, custom_vocabulary)
+    data = filename = None
+    if file is not None:
+        if _upload_size(file) > MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail=f"Uploaded file too large (limit {MAX_UPLOAD_BYTES} bytes)")
+        data, filename = await file.read(), file.filename
+    elif len(text) > MAX_TEXT_LENGTH:
+        raise HTTPException(status_code=413, detail=f"Text too large (limit {MAX_TEXT_LENGTH} characters)")
+    try:
+        job = JOB_RUNNER.submit(_analysis_job, text, data, filename, vocab, options, job_fields={'name': filename})
+    except JobQueueFull:
+        raise HTTPException(status_code=503, detail="Job queue full, retry shortly", headers={'Retry-After': '5'})
+    url = f"/jobs/{job['id']}"
+    return JSONResponse({'id': job['id'], 'status': job['status'], 'url': url}, status_code=202, headers={'Location': url})
+
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str, request: Request, mode: str = 'full', include_csv: Optional[bool] = None):
+    """A job's ``status``, current ``stage`` and ``progress`` (0-1), and its ``result`` once it has succeeded.
+
+    ``mode`` and ``include_csv`` shape the result as in /analyze. A failed
+    job carries its ``error``.
+    """
+    _check_mode(mode)
+    job = await run_in_threadpool(JOB_RUNNER.store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    if job['result'] is not None:
+        job['result'] = shape_result(job['result'], mode, include_csv)
+    headers = {'X-Result-Key': job['result_key']} if job.get('result_key') else None
+    return _encoded_response(request, job, mode, headers=headers)
+
+
+@app.delete("/jobs/{job_id}")
+async def delete_job(job_id: str):
+    """Forget a job and its result; a job already running still finishes, unrecorded."""
+    if not await run_in_threadpool(JOB_RUNNER.store.delete, job_id):
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return JSONResponse({'id': job_id, 'deleted': True})
+
+
+@app.post("/index")
+async def index_document(doc_id: str = Form(...), text: str = Form(default=''), file: UploadFile = File(default=None)):
+    """Analyze a document (or reuse its cached result) and add it to the search index under ``doc_id``."""
+    content = text or ''
+    timer = StageTimer()
+    if file is not None:
+        if _upload_size(file) > MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail=f"Uploaded file too large (limit {MAX_UPLOAD_BYTES} bytes)")
+        content = await _read_upload(await file.read(), file.filename, timer)
+    if len(content) > MAX_TEXT_LENGTH:
+        raise HTTPException(status_code=413, detail=f"Text too large (limit {MAX_TEXT_LENGTH} characters)")
+
+    # the default /analyze options, so indexing and analyzing share cache entries
+    options = _analysis_options(100, 20, 0)
+    vocab = VOCABULARIES.get()
+    key = _result_key(content, options, vocab)
+    result = RESULT_CACHE.get(key)
+    if result is None:
+        result = await _run_bounded(analyze_text, content, vocab.categories, **options, timings=True)
+        timer.merge(result.pop('timings'))
+        RESULT_CACHE.set(key, result)
+    _observe_stages(timer)
+    index = _search_index()
+    await run_in_threadpool(index.add, doc_id, result['term_matches'], result['statistics']['word_count'])
+    return JSONResponse({'doc_id': doc_id, 'terms': len(result['term_matches']), 'documents': len(index)})
+
+
+@app.delete("/index/{doc_id}")
+async def unindex_document(doc_id: str):
+    if not await run_in_threadpool(_search_index().remove, doc_id):
+        raise HTTPException(status_code=404, detail=f"Document {doc_id!r} is not indexed")
+    return JSONResponse({'doc_id': doc_id, 'removed': True})
+
+
+@app.get("/search")
+async def search(q: str, limit: int = 20, offset: int = 0, window: int = 100):
+    """Boolean and proximity search over indexed documents, e.g. ``backcasting NEAR/100 "stakeholder engagement"``."""
+    limit = max(1, min(limit, MAX_SEARCH_RESULTS))
+    try:
+        result = await run_in_threadpool(_search_index().search, q, limit, max(0, offset), window)
+    except QueryError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return JSONResponse(dict(result, query=q))
+
+
+@app.get("/vocabularies")
+async def vocabularies():
+    """Vocabularies available to ``vocabulary=``, with versions, hashes and term counts."""
+    return JSONResponse({'default': VOCABULARIES.default, 'vocabularies': VOCABULARIES.list(),
+                         'errors': VOCABULARIES.errors})
+
+
+@app.post("/vocabularies/reload")
+async def reload_vocabularies():
+    """Re-read the vocabulary files; analyzers for changed vocabularies compile on their next use."""
+    result = await run_in_threadpool(VOCABULARIES.reload)
     return JSONResponse(result)
 
 
+@app.get("/csv/{result_key}")
+async def result_csv(result_key: str, request: Request):
+    """The CSV export of an analyzed document, for responses sent without it (``mode=compact`` or ``summary``)."""
+    result = RESULT_CACHE.get(result_key)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired result; analyze the document again")
+    csv_text = result.get('csv') or export_terms_csv(result.get('term_matches', []))
+    headers = {'Content-Disposition': 'attachment; filename="futures_analysis.csv"'}
+    return _encoded_response(request, csv_text.encode('utf-8'), 'csv', headers=headers, media_type='text/csv; charset=utf-8')
+
+
+@app.get("/wordcloud/{result_key}")
+async def wordcloud(result_key: str, request: Request, format: str = 'png', width: int = 800, height: int = 0):
+    """Render the wordcloud of an analyzed document, named by the X-Result-Key of its /analyze response.
+
+    ``format`` is 'png' or 'webp'; ``width`` (100-1600) and ``height``
+    (default width / 2) render a smaller or larger image directly. Responses
+    carry an ETag and Cache-Control, and If-None-Match answers 304.
+    """
+    if format not in WORDCLOUD_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {sorted(WORDCLOUD_FORMATS)}")
+    width = max(100, min(width, WORDCLOUD_MAX_WIDTH))
+    height = max(50, min(height or width // 2, WORDCLOUD_MAX_WIDTH))
+    result = RESULT_CACHE.get(result_key)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired result; analyze the document again")
+    frequencies = result.get('word_frequencies') or {}
+    if not frequencies:
+        raise HTTPException(status_code=404, detail="No terms matched, so there is no wordcloud")
+
+    image_key = _wordcloud_key(frequencies, width, height, format)
+    headers = {'ETag': f'"{image_key}"', 'Cache-Control': f'public, max-age={CACHE_TTL}'}
+    if _etag_matches(request.headers.get('if-none-match'), headers['ETag']):
+        return Response(status_code=304, headers=headers)
+    image = WORDCLOUD_CACHE.get(image_key)
+    if image is None:
+        image = await _render_wordcloud(image_key, frequencies, width, height, format)
+    return Response(image, media_type=WORDCLOUD_FORMATS[format], headers=headers)
+
+
+@app.get("/stats")
+async def stats():
+    """Internal counters: executor queue wait versus compute time, cache hit rates, parse time saved."""
+    return JSONResponse({
+        'executor': ANALYSIS_EXECUTOR.stats(),
+        'analyzers': analyzer_registry_stats(),
+        'result_cache': RESULT_CACHE.stats(),
+        'parse_cache': PARSE_CACHE.stats(),
+        'chunk_cache': CHUNK_CACHE.stats(),
+        'search_index': _SEARCH_INDEX.stats() if _SEARCH_INDEX is not None else None,
+        'wordcloud': {'executor': WORDCLOUD_EXECUTOR.stats(), 'cache': WORDCLOUD_CACHE.stats()},
+        'jobs': JOB_RUNNER.stats(),
+    })
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text format: stage and request latency histograms, document sizes, cache and executor counters."""
+    return Response(METRICS.render(), media_type=MetricsRegistry.CONTENT_TYPE)
+
+
+async def _read_upload(data, filename, timer):
+    """Extract text from an upload, reusing earlier extractions of the same bytes.
+
+    The parsing stages, if any ran, are added to ``timer``.
+    """
+    key = PARSE_CACHE.key_for(data, filename)
+    content = PARSE_CACHE.get(key)
+    if content is None:
+        content, stages = await _run_bounded(_timed_parse, data, filename)
+        PARSE_CACHE.put(key, content, sum(stages.values()))
+        timer.merge(stages)
+    return content
+
+
+def _timed_parse(data, filename):
+    # runs in the executor, so only the plain stages dict travels back
+    timer = StageTimer()
+    content = read_file_content_bytes(data, filename, timer=timer)
+    return content, timer.stages
+
+
+def _analysis_job(text, data, filename, vocab, options, timer):
+    """Parse (if ``data`` was uploaded) and analyze one document on a job worker.
+
+    Shares the parse and result caches with /analyze; the result key is
+    recorded on the job, so /csv and /wordcloud work for job results too.
+    """
+    content = text
+    if data is not None:
+        key = PARSE_CACHE.key_for(data, filename)
+        content = PARSE_CACHE.get(key)
+        if content is None:
+            content = read_file_content_bytes(data, filename, timer=timer)
+            PARSE_CACHE.put(key, content, sum(timer.stages.values()))
+    if len(content) > MAX_TEXT_LENGTH:
+        raise ValueError(f"Text too large (limit {MAX_TEXT_LENGTH} characters)")
+    DOCUMENT_CHARACTERS.observe(len(content))
+    with timer.stage('cache_lookup'):
+        key_src = _result_key(content, options, vocab)
+        result = RESULT_CACHE.get(key_src)
+    timer.annotate(result_key=key_src)
+    if result is None:
+        result = results_with_wordcloud(_analyzer_for(vocab), content, include_wordcloud=False, **options, timer=timer,
+                                        chunk_cache=CHUNK_CACHE)
+        RESULT_CACHE.set(key_src, result)
+    _observe_stages(timer)
+    return result
+
+
+def _observe_stages(timer):
+    for stage, seconds in timer.stages.items():
+        STAGE_SECONDS.observe(seconds, stage=stage)
+
+
+def _cache_stats():
+    return {'result': RESULT_CACHE.stats(), 'parse': PARSE_CACHE.stats(), 'chunk': CHUNK_CACHE.stats(),
+            'wordcloud': WORDCLOUD_CACHE.stats()}
+
+
+def _chunk_cache():
+    # process workers would each get a pickled copy, so only threads share it
+    return CHUNK_CACHE if ANALYSIS_EXECUTOR.kind == 'thread' else None
+
+
+def _wordcloud_key(frequencies, width, height, fmt):
+    payload = json.dumps(frequencies, sort_keys=True, separators=(',', ':'))
+    return f"{hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]}-{width}x{height}.{fmt}"
+
+
+def _etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+    return '*' in tags or etag in tags
+
+
+async def _render_wordcloud(image_key, frequencies, width, height, fmt):
+    """Render on WORDCLOUD_EXECUTOR, sharing one render between concurrent requests for the same image.
+
+    The render is shielded, so it still finishes and is cached if the
+    client that started it disconnects.
+    """
+    render = _WORDCLOUD_RENDERS.get(image_key)
+    if render is None:
+        render = _WORDCLOUD_RENDERS[image_key] = asyncio.ensure_future(
+            _render_and_cache(image_key, frequencies, width, height, fmt))
+
+        def forget(task):
+            _WORDCLOUD_RENDERS.pop(image_key, None)
+            if not task.cancelled():
+                task.exception()  # retrieved here in case every requester disconnected
+        render.add_done_callback(forget)
+    return await asyncio.shield(render)
+
+
+async def _render_and_cache(image_key, frequencies, width, height, fmt):
+    try:
+        image, seconds = await WORDCLOUD_EXECUTOR.run(_timed_render, frequencies, width, height, fmt)
+    except ExecutorSaturated:
+        raise HTTPException(status_code=503, detail="Server busy, retry shortly", headers={'Retry-After': '1'})
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if image is None:
+        raise HTTPException(status_code=501, detail="Server-side wordclouds need the wordcloud package")
+    STAGE_SECONDS.observe(seconds, stage='wordcloud')
+    WORDCLOUD_CACHE.set(image_key, image)
+    return image
+
+
+def _timed_render(frequencies, width, height, fmt):
+    started = time.perf_counter()
+    image = render_wordcloud(frequencies, width, height, fmt)
+    return image, time.perf_counter() - started
+
+
+async def _stream_analysis(content, options, vocab, key, cached, fmt, from_cache, timer, include_timings,
+                           mode='full', include_csv=None):
+    """Stream result sections as NDJSON lines or SSE events, then a 'done' marker.
+
+    ``cached`` is a finished result (from the cache or the chunked analyzer)
+    to replay; otherwise sections are computed one executor step at a time.
+    Sections are shaped for ``mode`` as they go; the full result is cached.
+    The 'done' marker carries the stage timings when ``include_timings``.
+    """
+    result = {}
+
+    def collect(sections):
+        for section, partial in sections:
+            result.update(partial)
+            yield section, partial
+
+    if cached is not None:
+        sections = shape_sections(split_result_sections(cached), mode, include_csv)
+        first = next(sections)
+    else:
+        sections = shape_sections(collect(_iter_sections(vocab, content, include_wordcloud=False,
+                                                         **options, timer=timer, chunk_cache=CHUNK_CACHE)),
+                                  mode, include_csv)
+        # the first section is computed before responding so saturation can still return 503
+        first = await _next_section(sections)
+
+    async def body():
+        item = first
+        while item is not None:
+            section, partial = item
+            yield _encode_section(section, partial, fmt)
+            try:
+                item = await _next_section(sections) if cached is None else next(sections, None)
+            except HTTPException as exc:
+                yield _encode_section('error', {'detail': exc.detail}, fmt)
+                return
+        if cached is None:
+            RESULT_CACHE.set(key, result)
+        _observe_stages(timer)
+        done = {'_cached': from_cache}
+        if include_timings:
+            done['timings'] = timer.as_dict()
+        yield _encode_section('done', done, fmt)
+
+    return StreamingResponse(body(), media_type=STREAM_MEDIA_TYPES[fmt], headers={'X-Result-Key': key})
+
+
+async def _next_section(sections):
+    return await _run_local(next, sections, None)
+
+
+async def _run_local(fn, *args, **kwargs):
+    """Like _run_bounded, for calls whose arguments (generators, open files) cannot be pickled."""
+    if ANALYSIS_EXECUTOR.kind == 'thread':
+        return await _run_bounded(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, *args, **kwargs)
+
+
+def _limit_chunks(chunks):
+    # runs in the worker while chunks are consumed, so oversize input stops early
+    total = 0
+    for chunk in chunks:
+        total += len(chunk)
+        if total > MAX_TEXT_LENGTH:
+            raise HTTPException(status_code=413, detail=f"Text too large (limit {MAX_TEXT_LENGTH} characters)")
+        yield chunk
+
+
+def _upload_size(upload):
+    upload.file.seek(0, os.SEEK_END)
+    size = upload.file.tell()
+    upload.file.seek(0)
+    return size
+
+
+def _is_plain_text(filename):
+    return (filename or '').split('.')[-1].lower() not in ('pdf', 'docx', 'doc')
+
+
+def _file_sha256(fileobj):
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for block in iter(lambda: fileobj.read(STREAMING_CHUNK_SIZE), b''):
+        digest.update(block)
+    return digest.hexdigest()
+
+
+def _encode_section(section, data, fmt):
+    payload = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    if fmt == 'sse':
+        return f"event: {section}\ndata: {payload}\n\n"
+    return f'{{"section":{json.dumps(section)},"data":{payload}}}\n'
+
+
+def _check_mode(mode):
+    if mode not in RESPONSE_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {list(RESPONSE_MODES)}")
+
+
+def _dumps(payload):
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _accepted_encodings(header):
+    # codings from Accept-Encoding, minus those refused with q=0
+    accepted = set()
+    for part in (header or '').split(','):
+        coding, *params = part.split(';')
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _encoded_response(request, payload, mode, headers=None, media_type='application/json'):
+    """A response with ``payload`` (a JSON-able object or bytes), compressed as the client allows.
+
+    Records the bytes before and after compression per ``mode`` for /metrics.
+    """
+    body = payload if isinstance(payload, bytes) else _dumps(payload)
+    headers = dict(headers or {}, Vary='Accept-Encoding')
+    encoding = 'identity'
+    if len(body) >= COMPRESSION_MIN_BYTES:
+        accepted = _accepted_encodings(request.headers.get('accept-encoding'))
+        if brotli is not None and 'br' in accepted:
+            encoding, sent = 'br', brotli.compress(body, quality=5)
+        elif 'gzip' in accepted:
+            encoding, sent = 'gzip', gzip.compress(body, compresslevel=6, mtime=0)
+    if encoding == 'identity':
+        sent = body
+    else:
+        headers['Content-Encoding'] = encoding
+    RESPONSE_JSON_BYTES.inc(len(body), mode=mode)
+    RESPONSE_SENT_BYTES.inc(len(sent), mode=mode, encoding=encoding)
+    return Response(sent, media_type=media_type, headers=headers)
+
+
+async def _run_bounded(fn, *args, **kwargs):
+    try:
+        return await ANALYSIS_EXECUTOR.run(fn, *args, **kwargs)
+    except ExecutorSaturated:
+        raise HTTPException(status_code=503, detail="Server busy, retry shortly", headers={'Retry-After': '1'})
+
+
+def _analysis_options(cooccurrence_window, cooccurrence_top_k, snippet_limit, cooccurrence_windows=''):
+    """Keyword arguments for the analysis functions from the request's form values."""
+    try:
+        # comma-separated extra windows, e.g. for a client-side window slider
+        windows = sorted({int(w) for w in cooccurrence_windows.split(',') if w.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="cooccurrence_windows must be comma-separated integers")
+    if len(windows) > MAX_COOCCURRENCE_WINDOWS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_COOCCURRENCE_WINDOWS} cooccurrence_windows allowed")
+    return {
+        'cooccurrence_window': cooccurrence_window,
+        # cooccurrence_top_k <= 0 returns every co-occurring pair
+        'cooccurrence_top_k': cooccurrence_top_k if cooccurrence_top_k > 0 else None,
+        # snippet_limit <= 0 keeps every snippet
+        'snippet_limit': snippet_limit if snippet_limit > 0 else None,
+        'cooccurrence_windows': tuple(windows) or None,
+    }
+
+
+def _resolve_vocabulary(name, custom_json):
+    """The request's Vocabulary: inline ``custom_json``, else a named file, else the default."""
+    if custom_json:
+        try:
+            vocab = Vocabulary('custom', 'inline', json.loads(custom_json))
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=f"Invalid custom_vocabulary: {exc}")
+        if sum(len(terms) for terms in vocab.categories.values()) > MAX_CUSTOM_VOCABULARY_TERMS:
+            raise HTTPException(status_code=413, detail=f"Too many vocabulary terms (limit {MAX_CUSTOM_VOCABULARY_TERMS})")
+        return vocab
+    try:
+        return VOCABULARIES.get(name or None)
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=exc.args[0])
+
+
+def _analyzer_for(vocab):
+    # compiled once per vocabulary hash and kept in get_analyzer's LRU; call it
+    # from executor code only, as compiling a large custom vocabulary takes a while
+    return get_analyzer(vocab.categories, digest=vocab.hash)
+
+
+def _analyze_chunks(chunks, vocab, **kwargs):
+    # analyze_stream with the analyzer resolved in the worker, not on the event loop
+    return analyze_stream(chunks, _analyzer_for(vocab), **kwargs)
+
+
+def _iter_sections(vocab, text, **kwargs):
+    # a generator, so the analyzer is resolved by the first next() in the executor
+    yield from iter_result_sections(_analyzer_for(vocab), text, **kwargs)
+
+
+def _result_key(content, options, vocab):
+    return _digest_key(hashlib.sha256(content.encode('utf-8')).hexdigest(), options, vocab)
+
+
+def _digest_key(digest, options, vocab):
+    # a valid UTF-8 upload hashes the same as its decoded text, so both paths share entries;
+    # the vocabulary hash keeps persisted entries from outliving a vocabulary change
+    return cache_key(digest, options['cooccurrence_window'], vocab.hash[:16],
+                     options['cooccurrence_top_k'], options['snippet_limit'],
+                     ','.join(map(str, options['cooccurrence_windows'] or ())))
+
+
+def _search_index():
+    global _SEARCH_INDEX
+    if _SEARCH_INDEX is None:
+        _SEARCH_INDEX = SearchIndex(INDEX_PATH)
+    return _SEARCH_INDEX
+
+
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,55 @@
+"""Run the benchmark suite and compare it with the stored baseline.
+
+    python -m benchmarks                    # run and compare with baseline.json
+    python -m benchmarks --save             # run and store the results as the new baseline
+    python -m benchmarks -k analyze_document --quick
+    python -m benchmarks --fail             # exit 1 when a case regressed
+
+Timings depend on the machine: refresh the baseline with --save when
+switching hardware, and compare runs made on the same one.
+"""
+import argparse
+import os
+import sys
+
+from benchmarks import cases  # noqa: F401  (registers the cases)
+from benchmarks.harness import compare, format_report, load, run, save
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__.splitlines()[0])
+    parser.add_argument('-k', dest='pattern', help='only run cases whose id contains this text')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save', action='store_true', help='write the results to --baseline')
+    parser.add_argument('--output', help='also write the results to this JSON file')
+    parser.add_argument('--threshold', type=float, default=1.25, help='slowdown ratio reported as a regression')
+    parser.add_argument('--quick', action='store_true', help='one short sample per case')
+    parser.add_argument('--fail', action='store_true', help='exit with status 1 on a regression')
+    args = parser.parse_args(argv)
+
+    results = run(args.pattern, repeat=1 if args.quick else 3, min_time=0.05 if args.quick else 0.2)
+    if args.output:
+        save(args.output, results)
+    if args.save:
+        if args.pattern and os.path.exists(args.baseline):
+            # a partial run only replaces the cases it ran
+            merged = load(args.baseline)
+            merged.update({k: v for k, v in results.items() if k != 'results'})
+            merged['results'].update(results['results'])
+            results = merged
+        save(args.baseline, results)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save to create one")
+        return 0
+    rows, regressed = compare(load(args.baseline), results, args.threshold)
+    print()
+    print(format_report(rows))
+    return 1 if regressed and args.fail else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""Benchmark co-occurrence counting and clustering on sample_document.txt x100.
+
+Compares the pure-Python sweep over match dicts with the NumPy matrix on a
+TermMatchTable, for one window and for a batch of windows, and the original
+set-based DFS clustering with the DFS over the matrix's adjacency lists.
+
+    python benchmarks/bench_cooccurrence.py [--scale 100] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import futures_analyzer  # noqa: E402
+from futures_analyzer import CoOccurrenceMatrix, get_analyzer  # noqa: E402
+
+WINDOWS = (25, 50, 100, 200, 350, 500)
+
+
+def dfs_clusters(co_occurrences):
+    # compute_clusters_from_coocc as it was before the matrix version
+    adj = {}
+    for (a, b), _ in co_occurrences:
+        adj.setdefault(a, set()).add(b)
+        adj.setdefault(b, set()).add(a)
+    visited = set()
+    clusters = []
+    for node in adj:
+        if node in visited:
+            continue
+        stack, comp = [node], []
+        while stack:
+            v = stack.pop()
+            if v in visited:
+                continue
+            visited.add(v)
+            comp.append(v)
+            stack.extend(nb for nb in adj[v] if nb not in visited)
+        clusters.append(comp)
+    return clusters
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    if futures_analyzer.optional_dependency('np') is None:
+        sys.exit('NumPy is not installed; only the sweep path is available')
+
+    with open(os.path.join(ROOT, 'sample_document.txt'), encoding='utf-8') as fh:
+        text = fh.read() * args.scale
+    analyzer = get_analyzer()
+    dicts = analyzer.analyze_document(text)
+    table = analyzer.match_table(text)
+    print(f"{len(text):,} characters, {len(table)} terms, {len(table.positions):,} positions")
+
+    def sweep(windows):
+        np_module, futures_analyzer.np = futures_analyzer.np, None
+        try:
+            return {w: analyzer.co_occurrence_matrix(dicts, w) for w in windows}
+        finally:
+            futures_analyzer.np = np_module
+
+    rows = []
+    t_sweep, ref = best_of(args.repeat, lambda: sweep([100]))
+    t_numpy, got = best_of(args.repeat, lambda: analyzer.co_occurrence_matrices(table, [100]))
+    assert got[100].items() == list(ref[100].items())
+    rows.append(('1 window', t_sweep, t_numpy))
+
+    t_sweep, ref = best_of(args.repeat, lambda: sweep(WINDOWS))
+    t_numpy, got = best_of(args.repeat, lambda: analyzer.co_occurrence_matrices(table, WINDOWS))
+    assert all(got[w].items() == list(ref[w].items()) for w in WINDOWS)
+    rows.append((f'{len(WINDOWS)} windows', t_sweep, t_numpy))
+
+    pairs = sorted(ref[max(WINDOWS)].items(), key=lambda x: x[1], reverse=True)
+    t_dfs, clusters = best_of(args.repeat, lambda: dfs_clusters(pairs))
+    t_cc, (_, components) = best_of(args.repeat, lambda: CoOccurrenceMatrix.from_counts(pairs).clusters())
+    assert sorted(map(sorted, clusters)) == sorted(map(sorted, components))
+    rows.append((f'clusters ({len(pairs)} pairs)', t_dfs, t_cc))
+
+    print(f"{'case':<24}{'python (ms)':>14}{'numpy (ms)':>14}{'speedup':>10}")
+    for name, before, after in rows:
+        print(f"{name:<24}{before * 1000:>14.1f}{after * 1000:>14.1f}{before / after:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
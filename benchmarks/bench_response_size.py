@@ -0,0 +1,54 @@
+"""Report /analyze response sizes for each response mode and encoding.
+
+Analyzes sample_document.txt and synthetic 10k and 200k character documents
+with the full vocabulary. It prints the bytes of each mode ('full',
+'compact', 'summary') as JSON, gzip and, when the brotli package is
+installed, brotli, and how much each saves against full uncompressed JSON.
+
+    python benchmarks/bench_response_size.py
+"""
+import gzip
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.corpus import make_text, vocabularies  # noqa: E402
+from futures_analyzer import RESPONSE_MODES, analyze_text, shape_result  # noqa: E402
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def encodings(body):
+    sizes = {'json': len(body), 'gzip': len(gzip.compress(body, compresslevel=6, mtime=0))}
+    if brotli is not None:
+        sizes['br'] = len(brotli.compress(body, quality=5))
+    return sizes
+
+
+def main():
+    vocabulary = vocabularies()['full']
+    with open(os.path.join(ROOT, 'sample_document.txt'), encoding='utf-8') as fh:
+        documents = {'sample_document.txt': fh.read()}
+    documents['synthetic 10k'] = make_text(10_000, vocabulary)
+    documents['synthetic 200k'] = make_text(200_000, vocabulary)
+
+    for name, text in documents.items():
+        result = analyze_text(text, vocabulary)
+        full = None
+        print(f"\n{name} ({len(text):,} characters, {len(result['term_matches'])} terms)")
+        print(f"{'mode':<10}{'encoding':<10}{'bytes':>12}{'saved':>10}")
+        for mode in RESPONSE_MODES:
+            body = json.dumps(shape_result(result, mode), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            for encoding, size in encodings(body).items():
+                full = full or size
+                print(f"{mode:<10}{encoding:<10}{size:>12,}{1 - size / full:>10.1%}")
+
+
+if __name__ == '__main__':
+    main()
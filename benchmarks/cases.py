@@ -0,0 +1,98 @@
+"""Benchmark cases for the analysis pipeline, file parsing and the /analyze endpoint."""
+import io
+
+from benchmarks.corpus import TEXT_SIZES, make_text, vocabularies
+from benchmarks.harness import benchmark
+from futures_chunks import ChunkMatchCache
+from futures_analyzer import (compute_clusters_from_coocc, export_terms_csv, get_analyzer, optional_dependency,
+                              read_file_content_bytes)
+
+VOCABULARIES = vocabularies()
+Document = optional_dependency('Document')
+
+
+def _analyzed(size, vocabulary='full'):
+    analyzer = get_analyzer(VOCABULARIES[vocabulary])
+    text = make_text(TEXT_SIZES[size], VOCABULARIES[vocabulary])
+    return analyzer, text, analyzer.analyze_document(text)
+
+
+for _size in TEXT_SIZES:
+    for _vocabulary in VOCABULARIES:
+        @benchmark('analyze_document', size=_size, vocabulary=_vocabulary)
+        def analyze_document(size, vocabulary):
+            analyzer = get_analyzer(VOCABULARIES[vocabulary])
+            text = make_text(TEXT_SIZES[size], VOCABULARIES[vocabulary])
+            return lambda: analyzer.analyze_document(text)
+
+    @benchmark('analyze_revision', size=_size)
+    def analyze_revision(size):
+        # a new draft of an already analyzed document: one sentence edited per call
+        analyzer = get_analyzer(VOCABULARIES['full'])
+        text = make_text(TEXT_SIZES[size], VOCABULARIES['full'])
+        cache = ChunkMatchCache()
+        analyzer.analyze_document(text, chunk_cache=cache)
+        middle = len(text) // 2
+        calls = iter(range(10 ** 9))
+        return lambda: analyzer.analyze_document(f"{text[:middle]} draft {next(calls)} {text[middle:]}", chunk_cache=cache)
+
+    @benchmark('calculate_statistics', size=_size)
+    def calculate_statistics(size):
+        analyzer, text, term_matches = _analyzed(size)
+        return lambda: analyzer.calculate_statistics(term_matches, text)
+
+    @benchmark('analyze_co_occurrence', size=_size)
+    def analyze_co_occurrence(size):
+        analyzer, _, term_matches = _analyzed(size)
+        return lambda: analyzer.analyze_co_occurrence(term_matches, window=100)
+
+    @benchmark('compute_clusters_from_coocc', size=_size)
+    def compute_clusters(size):
+        analyzer, _, term_matches = _analyzed(size)
+        coocc = analyzer.analyze_co_occurrence(term_matches, window=100, top_k=None)
+        return lambda: compute_clusters_from_coocc(coocc)
+
+    @benchmark('export_terms_csv', size=_size)
+    def export_csv(size):
+        _, _, term_matches = _analyzed(size)
+        return lambda: export_terms_csv(term_matches)
+
+
+def _file_bytes(kind, text):
+    if kind == 'txt':
+        return text.encode('utf-8')
+    if kind == 'pdf':
+        from tests.pdf_helpers import make_pdf
+        return make_pdf([text[i:i + 2000] for i in range(0, len(text), 2000)])
+    document = Document()
+    for i in range(0, len(text), 2000):
+        document.add_paragraph(text[i:i + 2000])
+    out = io.BytesIO()
+    document.save(out)
+    return out.getvalue()
+
+
+for _kind in ('txt', 'pdf', 'docx'):
+    for _size in ('10k', '200k'):
+        @benchmark('read_file_content_bytes', kind=_kind, size=_size)
+        def read_file(kind, size):
+            if kind == 'docx' and Document is None:
+                return lambda: None
+            data = _file_bytes(kind, make_text(TEXT_SIZES[size], VOCABULARIES['full']))
+            return lambda: read_file_content_bytes(data, f'document.{kind}')
+
+
+for _size in ('1k', '10k', '200k'):
+    @benchmark('api_analyze', size=_size)
+    def api_analyze(size):
+        from fastapi.testclient import TestClient
+        from api.main import MAX_TEXT_LENGTH, app
+        client = TestClient(app)
+        # stays under the default request limit; a counter defeats the result cache
+        text = make_text(min(TEXT_SIZES[size], MAX_TEXT_LENGTH - 20), VOCABULARIES['core'])
+        calls = iter(range(10 ** 9))
+
+        def call():
+            response = client.post('/analyze', data={'text': f"{text} {next(calls)}"})
+            assert response.status_code == 200, response.text
+        return call
@@ -0,0 +1,57 @@
+"""Deterministic synthetic vocabularies and documents for the benchmarks."""
+import random
+
+from futures_analyzer import FUTURES_VOCABULARY
+from futures_vocabulary import VocabularyStore
+
+FILLER = (
+    "the a of and to in for on with by from as at that this these organisations report annual budget "
+    "programme delivery service public sector performance review year results staff process approach "
+    "local national community support capacity investment infrastructure outcomes evidence data"
+).split()
+
+SYLLABLES = "ka lo mi ren tos vel dra quin sam tor ul pex ghi bar nov zet".split()
+
+TEXT_SIZES = {'1k': 1_000, '10k': 10_000, '200k': 200_000}
+
+
+def make_vocabulary(size, seed=0):
+    """``size`` made-up one- to three-word terms spread over ten categories."""
+    rng = random.Random(seed)
+    terms = set()
+    while len(terms) < size:
+        words = [''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(rng.randint(1, 3))]
+        terms.add(' '.join(words))
+    vocabulary = {}
+    for i, term in enumerate(sorted(terms)):
+        vocabulary.setdefault(f"Category {i % 10}", []).append(term)
+    return vocabulary
+
+
+def vocabularies():
+    """The vocabulary sizes benchmarked: the bundled ones plus a large synthetic one."""
+    return {
+        'core': FUTURES_VOCABULARY,
+        'full': VocabularyStore().get('futures-full').categories,
+        'synthetic-2000': make_vocabulary(2000),
+    }
+
+
+def make_text(length, vocabulary, density=0.08, seed=0):
+    """About ``length`` characters of filler words with vocabulary terms mixed in.
+
+    Roughly ``density`` of the words start a vocabulary term, in sentences
+    of 8-20 words, so matching, co-occurrence and snippets all get work.
+    """
+    rng = random.Random(seed)
+    terms = [term for category_terms in vocabulary.values() for term in category_terms]
+    sentences = []
+    size = 0
+    while size < length:
+        words = []
+        for _ in range(rng.randint(8, 20)):
+            words.append(rng.choice(terms) if rng.random() < density else rng.choice(FILLER))
+        sentence = ' '.join(words).capitalize() + '.'
+        sentences.append(sentence)
+        size += len(sentence) + 1
+    return ' '.join(sentences)[:length]
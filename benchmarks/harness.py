@@ -0,0 +1,110 @@
+"""A small asv-style benchmark harness: registered cases, timed runs, stored baselines.
+
+Each case is a setup function returning the callable to time. The runner
+calls it enough times per sample to fill ``min_time`` and keeps the best of
+``repeat`` samples as seconds per call.
+"""
+import json
+import platform
+import sys
+import time
+from datetime import datetime
+
+CASES = {}
+
+
+def benchmark(name, **params):
+    """Register ``setup(**params) -> callable`` as the case ``name[param=value,...]``."""
+    def register(setup):
+        label = ','.join(f"{k}={v}" for k, v in params.items())
+        CASES[f"{name}[{label}]" if label else name] = (setup, params)
+        return setup
+    return register
+
+
+def time_case(fn, repeat=3, min_time=0.2):
+    fn()  # warm-up: compiled analyzers, imports, caches
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def run(pattern=None, repeat=3, min_time=0.2, stream=sys.stdout):
+    results = {}
+    for case_id, (setup, params) in CASES.items():
+        if pattern and pattern not in case_id:
+            continue
+        seconds = time_case(setup(**params), repeat=repeat, min_time=min_time)
+        results[case_id] = seconds
+        print(f"{case_id:<60}{format_seconds(seconds):>12}", file=stream, flush=True)
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                    'processor': platform.processor() or platform.machine()},
+        'results': results,
+    }
+
+
+def compare(baseline, current, threshold=1.25):
+    """Rows of (case, baseline, current, ratio, status) and whether anything regressed.
+
+    A case regressed when it is more than ``threshold`` times slower than
+    its baseline, and improved when more than that much faster.
+    """
+    rows = []
+    regressed = False
+    for case_id, seconds in current['results'].items():
+        before = baseline['results'].get(case_id)
+        if before is None:
+            rows.append((case_id, None, seconds, None, 'new'))
+            continue
+        ratio = seconds / before
+        if ratio > threshold:
+            status, regressed = 'REGRESSION', True
+        elif ratio < 1 / threshold:
+            status = 'faster'
+        else:
+            status = ''
+        rows.append((case_id, before, seconds, ratio, status))
+    return rows, regressed
+
+
+def format_seconds(seconds):
+    if seconds is None:
+        return '-'
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def format_report(rows):
+    lines = [f"{'case':<60}{'baseline':>12}{'current':>12}{'ratio':>8}  status"]
+    for case_id, before, after, ratio, status in rows:
+        ratio_text = f"{ratio:.2f}" if ratio is not None else '-'
+        lines.append(f"{case_id:<60}{format_seconds(before):>12}{format_seconds(after):>12}{ratio_text:>8}  {status}")
+    return '\n'.join(lines)
+
+
+def load(path):
+    with open(path, encoding='utf-8') as fh:
+        return json.load(fh)
+
+
+def save(path, results):
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump(results, fh, indent=2, sort_keys=True)
+        fh.write('\n')
@@ -0,0 +1,115 @@
+"""Measure the API's cold-start import time against a budget.
+
+    python -m benchmarks.importtime              # report and check importtime_budget.json
+    python -m benchmarks.importtime --runs 10 --fail
+
+Runs ``python -X importtime -c "import api.main"`` in fresh interpreters and
+takes the median of each module's cumulative time. Three things are checked:
+the total, the time spent in this project's own modules (everything under
+api.main except the libraries it imports), and that no module listed as ``lazy``
+in the budget was imported at all. The last check is exact; the first two
+depend on the machine, like the benchmark baseline.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'importtime_budget.json')
+PROJECT_PREFIXES = ('futures_', 'api')
+
+
+def parse_importtime(stderr):
+    """[(name, depth, self_us, cumulative_us)] from ``-X importtime`` output, in print order."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return entries
+
+
+def _is_project(name):
+    return name.split('.')[0].startswith(PROJECT_PREFIXES)
+
+
+def summarize(entries, module, lazy=()):
+    """Total, project and dependency milliseconds for ``module``, and any ``lazy`` modules imported.
+
+    Dependencies are the standard-library and third-party imports made
+    directly by project modules; their own imports are in their cumulative.
+    """
+    # a module is printed after its imports, so walking backwards meets parents first
+    parents = [None] * (max(depth for _, depth, _, _ in entries) + 2)
+    dependencies = 0
+    total = None
+    for name, depth, _, cumulative_us in reversed(entries):
+        parents[depth] = name
+        parent = parents[depth - 1] if depth else None
+        if name == module:
+            total = cumulative_us
+        elif parent is not None and _is_project(parent) and not _is_project(name):
+            dependencies += cumulative_us
+    imported = sorted({root for root in lazy for name, _, _, _ in entries
+                       if name == root or name.startswith(root + '.')})
+    return {
+        'total_ms': total / 1000,
+        'project_ms': (total - dependencies) / 1000,
+        'dependencies_ms': dependencies / 1000,
+        'lazy_imported': imported,
+    }
+
+
+def measure(module='api.main', runs=5, lazy=()):
+    """Median summarize() over ``runs`` fresh interpreters importing ``module``."""
+    # a deployment ships bytecode, so compile it in an unmeasured first run
+    env = {k: v for k, v in os.environ.items() if k != 'PYTHONDONTWRITEBYTECODE'}
+    command = [sys.executable, '-X', 'importtime', '-c', f'import {module}']
+    subprocess.run(command, cwd=ROOT, env=env, capture_output=True, check=True)
+    samples = []
+    for _ in range(runs):
+        proc = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+        samples.append(summarize(parse_importtime(proc.stderr), module, lazy))
+    result = {key: statistics.median(s[key] for s in samples) for key in ('total_ms', 'project_ms', 'dependencies_ms')}
+    result['lazy_imported'] = sorted({name for s in samples for name in s['lazy_imported']})
+    return result
+
+
+def check(result, budget):
+    """Messages for every budget the measurement exceeds."""
+    problems = []
+    for key in ('total_ms', 'project_ms'):
+        if key in budget and result[key] > budget[key]:
+            problems.append(f"{key} {result[key]:.1f} ms is over the budget of {budget[key]} ms")
+    if result['lazy_imported']:
+        problems.append(f"imported at startup but should be lazy: {', '.join(result['lazy_imported'])}")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.importtime', description=__doc__.splitlines()[0])
+    parser.add_argument('--budget', default=BUDGET)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--fail', action='store_true', help='exit with status 1 when over budget')
+    args = parser.parse_args(argv)
+
+    with open(args.budget, encoding='utf-8') as fh:
+        budget = json.load(fh)
+    result = measure(budget['module'], args.runs, budget.get('lazy', ()))
+    print(f"import {budget['module']} (median of {args.runs})")
+    print(f"  total        {result['total_ms']:8.1f} ms   budget {budget.get('total_ms', '-')} ms")
+    print(f"  project      {result['project_ms']:8.1f} ms   budget {budget.get('project_ms', '-')} ms")
+    print(f"  dependencies {result['dependencies_ms']:8.1f} ms")
+    problems = check(result, budget)
+    for problem in problems:
+        print(f"OVER BUDGET: {problem}")
+    return 1 if problems and args.fail else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
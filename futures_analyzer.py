@@ -1,56 +1,474 @@
+import os
 import re
 import io
-import json
+import mmap
+import bisect
+import codecs
 import base64
-from collections import defaultdict, Counter
+import importlib
+import threading
+import concurrent.futures
+from array import array
+from collections import defaultdict, deque, Counter, OrderedDict
+from collections.abc import Sequence
 from datetime import datetime
-try:
-    from wordcloud import WordCloud
-except Exception:
-    WordCloud = None
-
-try:
-    from docx import Document
-except Exception:
-    Document = None
-
-try:
-    import PyPDF2
-except Exception:
-    PyPDF2 = None
-
-# Minimal vocabulary (kept from original app)
-FUTURES_VOCABULARY = {
-    "Foresight Methods": [
-        "scenario planning", "scenarios", "scenario analysis", "scenario building",
-        "delphi method", "delphi", "expert panel", "expert consultation",
-        "horizon scanning", "environmental scanning", "scanning",
-        "trend analysis", "trend monitoring", "megatrends", "macro trends",
-        "weak signals", "weak signal detection", "emerging issues",
-        "wild cards", "black swans", "surprises",
-        "backcasting", "normative scenarios",
-        "causal layered analysis", "CLA",
-        "futures wheel", "futures triangle",
-        "cross-impact analysis", "morphological analysis",
-        "roadmapping", "technology roadmapping",
-        "visioning", "vision building", "preferred futures",
-        "foresight", "strategic foresight", "corporate foresight",
-        "forecasting", "predictive analytics", "extrapolation",
-        "simulation", "modeling", "system dynamics",
-    ],
-    # Other categories shortened for readability but you can expand as needed
-    "Futures Concepts": [
-        "futures", "future studies", "futures research", "futurism",
-        "anticipation", "anticipatory systems", "anticipatory governance",
-        "plausible futures", "possible futures", "probable futures", "preferable futures",
-    ],
+
+from futures_metrics import NULL_TIMER, StageTimer
+from futures_vocabulary import DEFAULT_VOCABULARY, VOCABULARY_DIR, load_vocabulary_file, vocabulary_hash
+
+# Optional dependencies are imported on first use, not at module load, so a
+# cold start that never sees a PDF, DOCX, wordcloud or large document does not
+# pay for them. Each global holds the module (or class), None when it is not
+# installed, or _NOT_LOADED until optional_dependency() is first asked for it.
+_NOT_LOADED = object()
+_OPTIONAL_DEPENDENCIES = {
+    'WordCloud': ('wordcloud', 'WordCloud'),
+    'Document': ('docx', 'Document'),
+    'PyPDF2': ('PyPDF2', None),
+    'np': ('numpy', None),
 }
+WordCloud = Document = PyPDF2 = np = _NOT_LOADED
+
+# Tables with fewer positions than this use the pure-Python statistics and
+# co-occurrence paths, which are faster there (per-row NumPy calls dominate)
+# and never import NumPy.
+NUMPY_MIN_POSITIONS = int(os.environ.get('FUTURESNESS_NUMPY_MIN_POSITIONS', 2048))
+
+
+def optional_dependency(name):
+    """Return the optional dependency ``name`` ('WordCloud', 'Document', 'PyPDF2' or 'np'), or None if missing."""
+    value = globals()[name]
+    if value is _NOT_LOADED:
+        module_name, attribute = _OPTIONAL_DEPENDENCIES[name]
+        try:
+            value = importlib.import_module(module_name)
+            if attribute:
+                value = getattr(value, attribute)
+        except Exception:
+            value = None
+        globals()[name] = value
+    return value
+
+
+def _numpy_for(table):
+    # NumPy for tables large enough to gain from it, else None
+    return optional_dependency('np') if len(table.positions) >= NUMPY_MIN_POSITIONS else None
+
+# Default vocabulary; more live next to it in vocabularies/ (see futures_vocabulary)
+FUTURES_VOCABULARY = load_vocabulary_file(os.path.join(VOCABULARY_DIR, DEFAULT_VOCABULARY + '.json')).categories
+
+
+def _is_word_char(ch):
+    # Same definition of a word character as ``\w`` in a str pattern
+    return ch.isalnum() or ch == '_'
+
+
+def _at_word_boundary(text, index):
+    """Return True where ``re`` would match a word boundary at ``index`` in ``text``."""
+    before = index > 0 and _is_word_char(text[index - 1])
+    after = index < len(text) and _is_word_char(text[index])
+    return before != after
+
+
+class RegexTermMatcher:
+    """Original matching path: one word-bounded regex scan per term.
+
+    Kept so results and timings can be compared with the automaton.
+    """
+    name = 'regex'
+
+    def __init__(self, terms):
+        self.patterns = {}
+        for term in terms:
+            if term not in self.patterns:
+                self.patterns[term] = re.compile(r'\b' + re.escape(term) + r'\b')
+
+    def find_all(self, text_lower):
+        """Return a dict term -> list of match start positions."""
+        found = {}
+        for term, pattern in self.patterns.items():
+            positions = [m.start() for m in pattern.finditer(text_lower)]
+            if positions:
+                found[term] = positions
+        return found
+
+
+class AhoCorasickTermMatcher:
+    """Aho-Corasick automaton over all terms, compiled once per vocabulary.
+
+    ``find_all`` walks the text once regardless of vocabulary size and then
+    applies the same word-boundary and non-overlapping rules as the regex path.
+    """
+    name = 'aho-corasick'
+
+    def __init__(self, terms):
+        goto = [{}]
+        outputs = [[]]
+        for term in dict.fromkeys(terms):
+            if not term:
+                continue
+            state = 0
+            for ch in term:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][ch] = nxt
+                state = nxt
+            outputs[state].append(term)
+
+        # Breadth-first pass to build failure links and merge suffix outputs
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                target = goto[f].get(ch, 0)
+                fail[nxt] = target if target != nxt else 0
+                if outputs[fail[nxt]]:
+                    outputs[nxt] = outputs[nxt] + outputs[fail[nxt]]
+
+        self.goto = goto
+        self.fail = fail
+        self.outputs = outputs
+
+    def find_all(self, text_lower):
+        """Return a dict term -> list of match start positions."""
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        found = {}
+        last_end = {}
+        state = 0
+        for index, ch in enumerate(text_lower):
+            nxt = goto[state].get(ch)
+            while nxt is None and state:
+                state = fail[state]
+                nxt = goto[state].get(ch)
+            state = nxt or 0
+            if not outputs[state]:
+                continue
+            end = index + 1
+            for term in outputs[state]:
+                start = end - len(term)
+                # re.finditer never returns overlapping matches of one term
+                if start < last_end.get(term, 0):
+                    continue
+                if not (_at_word_boundary(text_lower, start) and _at_word_boundary(text_lower, end)):
+                    continue
+                found.setdefault(term, []).append(start)
+                last_end[term] = end
+        return found
+
+
+MATCHERS = {
+    AhoCorasickTermMatcher.name: AhoCorasickTermMatcher,
+    RegexTermMatcher.name: RegexTermMatcher,
+}
+DEFAULT_MATCHER = AhoCorasickTermMatcher.name
+
+_ASCII_LOWER = bytes.maketrans(b'ABCDEFGHIJKLMNOPQRSTUVWXYZ', b'abcdefghijklmnopqrstuvwxyz')
+_TRIE_END = -1
+
+
+def _is_word_byte_at(buffer, index, before):
+    """Word-character test on a UTF-8 buffer, decoding non-ASCII characters.
+
+    Looks at the character ending just before ``index`` when ``before`` is
+    True, otherwise at the character starting at ``index``.
+    """
+    if before:
+        if index <= 0:
+            return False
+        start = index - 1
+        if buffer[start] < 0x80:
+            return _is_word_char(chr(buffer[start]))
+        # step back over continuation bytes to the lead byte
+        while start > max(0, index - 4) and 0x80 <= buffer[start] < 0xC0:
+            start -= 1
+        char = bytes(buffer[start:index]).decode('utf-8', errors='ignore')
+    else:
+        if index >= len(buffer):
+            return False
+        if buffer[index] < 0x80:
+            return _is_word_char(chr(buffer[index]))
+        char = bytes(buffer[index:index + 4]).decode('utf-8', errors='ignore')[:1]
+    return bool(char) and _is_word_char(char[-1] if before else char[0])
+
+
+class BytesTermMatcher:
+    """Matcher working directly on a UTF-8 bytes buffer (bytes, mmap, ...).
+
+    The buffer is lowercased (ASCII only) one bounded block at a time. In
+    each block a regex over a trie of all terms finds the offsets where some
+    term may start, and a byte trie lists every term at each of them. Memory
+    use therefore does not grow with the buffer. Positions are byte offsets.
+    """
+    name = 'bytes'
+    BLOCK_SIZE = 16 * 1024 * 1024
+
+    def __init__(self, terms):
+        self.trie = {}
+        word_initial = {}
+        other = {}
+        self.max_term_bytes = 0
+        for term in dict.fromkeys(terms):
+            if not term:
+                continue
+            encoded = term.encode('utf-8')
+            self.max_term_bytes = max(self.max_term_bytes, len(encoded))
+            for trie in (self.trie, word_initial if encoded[0] < 0x80 and _is_word_char(term[0]) else other):
+                node = trie
+                for byte in encoded:
+                    node = node.setdefault(byte, {})
+                node[_TRIE_END] = term
+        # A leading \b lets the regex engine skip ahead quickly; it is only safe
+        # for terms starting with an ASCII word character, the rest go without.
+        parts = []
+        if word_initial:
+            parts.append(rb'\b' + self._trie_pattern(word_initial))
+        if other:
+            parts.append(self._trie_pattern(other))
+        self.candidates = re.compile(b'|'.join(parts) or b'(?!)')
+
+    @classmethod
+    def _trie_pattern(cls, node):
+        branches = [re.escape(bytes([byte])) + cls._trie_pattern(child)
+                    for byte, child in sorted(node.items()) if byte != _TRIE_END]
+        if not branches:
+            return b''
+        body = branches[0] if len(branches) == 1 else b'(?:' + b'|'.join(branches) + b')'
+        return b'(?:' + body + b')?' if _TRIE_END in node else body
+
+    def find_all(self, buffer):
+        """Return a dict term -> list of byte offsets, with the regex path's rules."""
+        found = {}
+        last_end = {}
+        size = len(buffer)
+        # room for a whole match plus one UTF-8 character either side of it
+        margin = self.max_term_bytes + 4
+        for block_start in range(0, size, self.BLOCK_SIZE):
+            block_stop = min(size, block_start + self.BLOCK_SIZE)
+            lo = max(0, block_start - 4)
+            window = buffer[lo:min(size, block_stop + margin)].translate(_ASCII_LOWER)
+            self._scan(window, lo, block_start - lo, block_stop - lo, found, last_end)
+        return found
+
+    def _scan(self, window, offset, first, stop, found, last_end):
+        # every term starting in window[first:stop]; positions reported + offset
+        search = self.candidates.search
+        size = len(window)
+        pos = first
+        while True:
+            candidate = search(window, pos)
+            if candidate is None or candidate.start() >= stop:
+                return
+            start = candidate.start()
+            pos = start + 1
+            node = self.trie
+            end = start
+            while end < size:
+                node = node.get(window[end])
+                if node is None:
+                    break
+                end += 1
+                term = node.get(_TRIE_END)
+                if term is None or offset + start < last_end.get(term, 0):
+                    continue
+                if _is_word_byte_at(window, start, before=True) == _is_word_char(term[0]):
+                    continue
+                if _is_word_byte_at(window, end, before=False) == _is_word_char(term[-1]):
+                    continue
+                found.setdefault(term, []).append(offset + start)
+                last_end[term] = offset + end
+
+
+def _position_typecode(size):
+    # int32 columns unless offsets into the source could overflow them
+    return 'i' if size < 2 ** 31 else 'q'
+
+
+class TermMatchTable:
+    """Columnar term matches: one row per matched term, positions in one flat array.
+
+    Row ``i`` has term ``terms[i]``, category ``categories[category_ids[i]]``
+    and positions ``positions[offsets[i]:offsets[i + 1]]`` (ascending).
+    Statistics and co-occurrence run on these columns, with NumPy when it is
+    installed; to_dicts() gives the term_matches list returned to callers.
+    Other keys of the match dicts (such as PDF 'pages') ride along in
+    ``extras``.
+    """
+    __slots__ = ('terms', 'categories', 'category_ids', 'offsets', 'positions', 'snippets', 'extras')
+    _COLUMNS = ('term', 'category', 'frequency', 'positions', 'snippets')
+
+    def __init__(self, categories, typecode='i'):
+        self.terms = []
+        self.categories = list(categories)
+        self.category_ids = array('i')
+        self.offsets = array(typecode, [0])
+        self.positions = array(typecode)
+        self.snippets = []
+        self.extras = []
+
+    @classmethod
+    def from_dicts(cls, term_matches, categories=()):
+        """Build a table from a term_matches list."""
+        categories = list(dict.fromkeys([*categories, *(m['category'] for m in term_matches)]))
+        last = max((m['positions'][-1] for m in term_matches if m['positions']), default=0)
+        table = cls(categories, _position_typecode(last + 1))
+        for m in term_matches:
+            extra = {k: v for k, v in m.items() if k not in cls._COLUMNS}
+            table.append(m['term'], m['category'], sorted(m['positions']), m.get('snippets', []), extra)
+        return table
+
+    def append(self, term, category, positions, snippets, extra=None):
+        if category not in self.categories:
+            self.categories.append(category)
+        self.terms.append(term)
+        self.category_ids.append(self.categories.index(category))
+        self.positions.extend(positions)
+        self.offsets.append(len(self.positions))
+        self.snippets.append(snippets)
+        self.extras.append(extra)
+
+    def __len__(self):
+        return len(self.terms)
+
+    @property
+    def frequencies(self):
+        offsets = self.offsets
+        return [offsets[i + 1] - offsets[i] for i in range(len(self.terms))]
+
+    def row(self, i):
+        """Row ``i`` as a term_matches dict."""
+        row = {
+            'term': self.terms[i],
+            'category': self.categories[self.category_ids[i]],
+            'frequency': self.offsets[i + 1] - self.offsets[i],
+            'positions': self.positions[self.offsets[i]:self.offsets[i + 1]].tolist(),
+            'snippets': self.snippets[i],
+        }
+        if self.extras[i]:
+            row.update(self.extras[i])
+        return row
+
+    def to_dicts(self):
+        return [self.row(i) for i in range(len(self.terms))]
+
+    def row_ids(self):
+        """The row of each entry in ``positions``."""
+        offsets = self.offsets
+        return [i for i in range(len(self.terms)) for _ in range(offsets[i + 1] - offsets[i])]
+
+    def _arrays(self):
+        # zero-copy NumPy views of the columns, plus each position's row id
+        np = optional_dependency('np')
+        positions = np.frombuffer(self.positions, dtype=self.positions.typecode)
+        offsets = np.frombuffer(self.offsets, dtype=self.offsets.typecode)
+        rows = np.repeat(np.arange(len(self.terms)), np.diff(offsets))
+        return positions, offsets, rows
+
+
+class CoOccurrenceMatrix:
+    """Sparse symmetric term x term co-occurrence counts.
+
+    Entry ``k`` counts the pair (terms[rows[k]], terms[cols[k]]). Terms are
+    numbered in order of first appearance and entries keep their insertion
+    order, so ranked() breaks ties like analyze_co_occurrence().
+    """
+    __slots__ = ('terms', 'rows', 'cols', 'counts')
+
+    def __init__(self):
+        self.terms = []
+        self.rows = array('i')
+        self.cols = array('i')
+        self.counts = array('q')
+
+    @classmethod
+    def from_counts(cls, co_occurrences):
+        """Build from a {(term_a, term_b): count} dict or (pair, count) items."""
+        items = co_occurrences.items() if isinstance(co_occurrences, dict) else co_occurrences
+        matrix = cls()
+        index = {}
+        for pair, count in items:
+            a, b = pair
+            for term in (a, b):
+                if term not in index:
+                    index[term] = len(matrix.terms)
+                    matrix.terms.append(term)
+            matrix.rows.append(index[a])
+            matrix.cols.append(index[b])
+            matrix.counts.append(count)
+        return matrix
+
+    def __len__(self):
+        return len(self.counts)
+
+    def items(self):
+        terms = self.terms
+        return [((terms[a], terms[b]), c) for a, b, c in zip(self.rows, self.cols, self.counts)]
+
+    def ranked(self, top_k=None):
+        """(pair, count) items by descending count; top_k=None returns all."""
+        order = sorted(range(len(self.counts)), key=self.counts.__getitem__, reverse=True)
+        if top_k is not None:
+            order = order[:top_k]
+        terms = self.terms
+        return [((terms[self.rows[k]], terms[self.cols[k]]), self.counts[k]) for k in order]
+
+    def top(self, top_k):
+        """The top_k entries by count as a new matrix (top_k=None keeps all)."""
+        return CoOccurrenceMatrix.from_counts(self.ranked(top_k))
+
+    def clusters(self):
+        """Connected components as (term -> cluster id, list of clusters).
+
+        Clusters are ordered by first appearance of their terms, and each
+        lists its terms in depth-first order from its first term, taking
+        neighbours in the order their pairs were added (the order the
+        adjacency-list DFS over co-occurrence pairs has always produced).
+        """
+        adjacency = [[] for _ in self.terms]
+        for a, b in zip(self.rows, self.cols):
+            adjacency[a].append(b)
+            adjacency[b].append(a)
+        visited = [False] * len(self.terms)
+        clusters = []
+        for root in range(len(self.terms)):
+            if visited[root]:
+                continue
+            stack, comp = [root], []
+            while stack:
+                v = stack.pop()
+                if visited[v]:
+                    continue
+                visited[v] = True
+                comp.append(self.terms[v])
+                stack.extend(nb for nb in adjacency[v] if not visited[nb])
+            clusters.append(comp)
+        term2cluster = {term: i for i, comp in enumerate(clusters) for term in comp}
+        return term2cluster, clusters
 
 
 class FuturesVocabularyAnalyzer:
-    def __init__(self, vocabulary_dict=None):
+    def __init__(self, vocabulary_dict=None, matcher=DEFAULT_MATCHER):
+        if matcher not in MATCHERS:
+            raise ValueError(f"Unknown matcher {matcher!r}; expected one of {sorted(MATCHERS)}")
         self.vocabulary = vocabulary_dict or FUTURES_VOCABULARY
+        self.vocabulary_hash = vocabulary_hash(self.vocabulary)
         self.flat_vocabulary = self._flatten_vocabulary()
+        self.matcher = MATCHERS[matcher]([t['term'] for t in self.flat_vocabulary])
+        self._bytes_matcher = None
+
+    @property
+    def bytes_matcher(self):
+        """BytesTermMatcher for this vocabulary, compiled on first use."""
+        if self._bytes_matcher is None:
+            self._bytes_matcher = BytesTermMatcher([t['term'] for t in self.flat_vocabulary])
+        return self._bytes_matcher
 
     def _flatten_vocabulary(self):
         flat_list = []
@@ -63,44 +481,57 @@ class FuturesVocabularyAnalyzer:
                 })
         return sorted(flat_list, key=lambda x: x['length'], reverse=True)
 
-    def analyze_document(self, text):
+    def analyze_document(self, text, snippet_limit=None, lazy_snippets=False, chunk_cache=None):
         """Analyze text and return term matches with positions and snippets.
 
-        Each match dict includes: term, category, frequency, positions, snippets
+        Each match dict includes: term, category, frequency, positions, snippets.
+        ``snippet_limit`` keeps only the first N snippets per term; with
+        ``lazy_snippets`` they are a LazySnippets view over ``text`` that
+        slices each snippet on access instead of building them all up front.
+        With a ``chunk_cache`` (futures_chunks.ChunkMatchCache) only chunks
+        not seen before are scanned; the result is the same.
         """
-        text_lower = text.lower()
-        term_matches = []
+        return self.match_table(text, snippet_limit=snippet_limit, lazy_snippets=lazy_snippets,
+                                chunk_cache=chunk_cache).to_dicts()
+
+    def match_table(self, text, snippet_limit=None, lazy_snippets=False, chunk_cache=None):
+        """analyze_document() as a TermMatchTable."""
+        if chunk_cache is not None:
+            found = chunk_cache.find_all(self, text)
+        else:
+            found = self.matcher.find_all(text.lower())
+        table = TermMatchTable(self.vocabulary, _position_typecode(len(text)))
         for term_info in self.flat_vocabulary:
             term = term_info['term']
-            pattern = r'\b' + re.escape(term) + r'\b'
-            matches = list(re.finditer(pattern, text_lower))
-            if matches:
-                positions = [m.start() for m in matches]
-                snippets = []
-                for pos in positions:
-                    # context window in original text (preserve casing)
-                    start = max(0, pos - 60)
-                    end = min(len(text), pos + len(term) + 60)
-                    snippet = text[start:end].strip()
-                    snippets.append(snippet)
-
-                term_matches.append({
-                    'term': term,
-                    'category': term_info['category'],
-                    'frequency': len(matches),
-                    'positions': positions,
-                    'snippets': snippets
-                })
-        return term_matches
+            positions = found.get(term)
+            if positions:
+                snippet_positions = positions if snippet_limit is None else positions[:snippet_limit]
+                if lazy_snippets:
+                    snippets = LazySnippets(text, snippet_positions, len(term))
+                else:
+                    snippets = []
+                    for pos in snippet_positions:
+                        # context window in original text (preserve casing)
+                        start = max(0, pos - 60)
+                        end = min(len(text), pos + len(term) + 60)
+                        snippet = text[start:end].strip()
+                        snippets.append(snippet)
+                table.append(term, term_info['category'], positions, snippets)
+        return table
 
-    def calculate_statistics(self, term_matches, text):
-        total_terms = sum(m['frequency'] for m in term_matches)
+    def calculate_statistics(self, term_matches, text, word_count=None):
+        """Summary statistics; ``term_matches`` is a list of match dicts or a TermMatchTable."""
+        if word_count is None:
+            word_count = len(text.split())
+        if isinstance(term_matches, TermMatchTable):
+            total_terms, category_freq, top_terms = self._table_frequency_stats(term_matches)
+        else:
+            total_terms = sum(m['frequency'] for m in term_matches)
+            category_freq = defaultdict(int)
+            for match in term_matches:
+                category_freq[match['category']] += match['frequency']
+            top_terms = sorted(term_matches, key=lambda x: x['frequency'], reverse=True)[:20]
         unique_terms = len(term_matches)
-        word_count = len(text.split())
-        category_freq = defaultdict(int)
-        for match in term_matches:
-            category_freq[match['category']] += match['frequency']
-        top_terms = sorted(term_matches, key=lambda x: x['frequency'], reverse=True)[:20]
 
         # Normalized frequency per 1000 words
         normalized_per_1000 = (total_terms / word_count * 1000) if word_count > 0 else 0
@@ -121,19 +552,127 @@ class FuturesVocabularyAnalyzer:
             'top_terms': top_terms
         }
 
-    def analyze_co_occurrence(self, term_matches, window=100):
-        co_occurrences = defaultdict(int)
-        for i, match1 in enumerate(term_matches):
-            for match2 in term_matches[i+1:]:
-                for pos1 in match1['positions']:
-                    for pos2 in match2['positions']:
-                        if abs(pos1 - pos2) <= window:
-                            pair = tuple(sorted([match1['term'], match2['term']]))
-                            co_occurrences[pair] += 1
-                            break
-        return sorted(co_occurrences.items(), key=lambda x: x[1], reverse=True)[:20]
+    @staticmethod
+    def _table_frequency_stats(table):
+        # total, per-category totals and top 20 rows, from the offsets column
+        np = _numpy_for(table)
+        if np is not None:
+            freqs = np.diff(np.frombuffer(table.offsets, dtype=table.offsets.typecode))
+            per_category = np.bincount(np.frombuffer(table.category_ids, dtype='i'), weights=freqs,
+                                       minlength=len(table.categories))
+            category_freq = {table.categories[c]: int(per_category[c]) for c in dict.fromkeys(table.category_ids)}
+            # stable descending sort, like sorted(..., reverse=True)
+            top = np.argsort(-freqs, kind='stable')[:20].tolist()
+            return int(freqs.sum()), category_freq, [table.row(i) for i in top]
+        freqs = table.frequencies
+        category_freq = {}
+        for category_id, freq in zip(table.category_ids, freqs):
+            category = table.categories[category_id]
+            category_freq[category] = category_freq.get(category, 0) + freq
+        top = sorted(range(len(freqs)), key=freqs.__getitem__, reverse=True)[:20]
+        return sum(freqs), category_freq, [table.row(i) for i in top]
+
+    def co_occurrence_matrix(self, term_matches, window=100):
+        """Return {(term_a, term_b): count} for every co-occurring term pair.
+
+        For each position of match i, every later match j with a position
+        within ``window`` characters adds one count, so each (pos1, term2)
+        contributes at most once. A TermMatchTable is counted with NumPy
+        binary searches when available; otherwise all positions are sorted
+        once and swept.
+        """
+        if window < 0:
+            return {}
+        if isinstance(term_matches, TermMatchTable):
+            terms = term_matches.terms
+            if _numpy_for(term_matches) is not None:
+                return self._merge_pair_counts(terms, self._table_pair_counts(term_matches, [window])[window])
+            events = sorted(zip(term_matches.positions, term_matches.row_ids()))
+        else:
+            terms = [match['term'] for match in term_matches]
+            events = sorted((pos, idx) for idx, match in enumerate(term_matches) for pos in match['positions'])
+        return self._merge_pair_counts(terms, self._sweep_pair_counts(events, window))
+
+    def co_occurrence_matrices(self, term_matches, windows):
+        """Return {window: CoOccurrenceMatrix} for several windows at once.
+
+        With NumPy the positions are searched once and every window is read
+        off the same nearest-neighbour distances, so extra windows cost one
+        bincount each rather than another pass over the document.
+        """
+        windows = sorted(set(windows))
+        if not isinstance(term_matches, TermMatchTable):
+            term_matches = TermMatchTable.from_dicts(term_matches, self.vocabulary)
+        if _numpy_for(term_matches) is None:
+            return {window: CoOccurrenceMatrix.from_counts(self.co_occurrence_matrix(term_matches, window))
+                    for window in windows}
+        per_window = self._table_pair_counts(term_matches, [w for w in windows if w >= 0])
+        return {window: CoOccurrenceMatrix.from_counts(self._merge_pair_counts(term_matches.terms, per_window.get(window, {})))
+                for window in windows}
+
+    @staticmethod
+    def _table_pair_counts(table, windows):
+        # count(i, j), i < j: positions of row i with some position of row j
+        # within the window, i.e. whose nearest row-j position is that close.
+        # Rows are contiguous, so row j only needs the positions before offsets[j].
+        np = optional_dependency('np')
+        positions, offsets, rows = table._arrays()
+        positions = positions.astype(np.int64)
+        pair_counts = {window: {} for window in windows}
+        for j in range(1, len(table)):
+            targets = positions[offsets[j]:offsets[j + 1]]
+            before = positions[:offsets[j]]
+            idx = np.searchsorted(targets, before)
+            right = targets[np.minimum(idx, len(targets) - 1)] - before
+            left = before - targets[np.maximum(idx - 1, 0)]
+            distance = np.where(idx == len(targets), left, np.where(idx == 0, right, np.minimum(left, right)))
+            row_ids = rows[:offsets[j]]
+            for window in windows:
+                counts = np.bincount(row_ids[distance <= window], minlength=j)
+                for i in np.flatnonzero(counts).tolist():
+                    pair_counts[window][(i, j)] = int(counts[i])
+        return pair_counts
+
+    @staticmethod
+    def _sweep_pair_counts(events, window):
+        # events: (position, match index) sorted by position
+        total = len(events)
+        in_window = {}  # match index -> number of its positions inside the window
+        pair_counts = defaultdict(int)  # (i, j) with i < j -> count
+        lo = hi = 0
+        for pos, i in events:
+            while hi < total and events[hi][0] <= pos + window:
+                j = events[hi][1]
+                in_window[j] = in_window.get(j, 0) + 1
+                hi += 1
+            while events[lo][0] < pos - window:
+                j = events[lo][1]
+                in_window[j] -= 1
+                if not in_window[j]:
+                    del in_window[j]
+                lo += 1
+            for j in in_window:
+                if j > i:
+                    pair_counts[(i, j)] += 1
+        return pair_counts
+
+    @staticmethod
+    def _merge_pair_counts(terms, pair_counts):
+        # Merge in (i, j) order so equal counts keep the original tie order
+        co_occurrences = {}
+        for i, j in sorted(pair_counts):
+            pair = tuple(sorted([terms[i], terms[j]]))
+            co_occurrences[pair] = co_occurrences.get(pair, 0) + pair_counts[(i, j)]
+        return co_occurrences
+
+    def analyze_co_occurrence(self, term_matches, window=100, top_k=20):
+        """Return the top_k (pair, count) tuples by count; top_k=None returns all."""
+        ranked = sorted(self.co_occurrence_matrix(term_matches, window).items(), key=lambda x: x[1], reverse=True)
+        return ranked if top_k is None else ranked[:top_k]
 
     def detect_methodological_approach(self, term_matches):
+        if isinstance(term_matches, TermMatchTable):
+            term_matches = [{'term': t, 'frequency': f} for t, f in zip(term_matches.terms, term_matches.frequencies)]
         method_keywords = {
             'Exploratory': ['scenario', 'futures cone', 'alternative futures', 'possible futures'],
             'Normative': ['backcasting', 'visioning', 'preferred futures', 'vision building'],
@@ -150,137 +689,707 @@ class FuturesVocabularyAnalyzer:
         return dict(sorted(approach_scores.items(), key=lambda x: x[1], reverse=True))
 
 
-def read_file_content_bytes(file_bytes: bytes, filename: str):
-    """Return text extracted from uploaded bytes and filename-based type detection."""
+# Process-wide LRU of compiled analyzers keyed by (vocabulary hash, matcher).
+# Analyzers are read-only after construction, so one instance serves every request;
+# beyond MAX_ANALYZERS vocabularies the least recently used is dropped.
+MAX_ANALYZERS = int(os.environ.get('FUTURESNESS_MAX_ANALYZERS', 32))
+_ANALYZERS = OrderedDict()
+_ANALYZERS_LOCK = threading.Lock()
+_COMPILING = {}  # key -> Future of an analyzer being compiled
+_ANALYZER_COUNTS = Counter()
+
+
+def get_analyzer(vocabulary_dict=None, matcher=DEFAULT_MATCHER, digest=None):
+    """Return a shared FuturesVocabularyAnalyzer, compiling it on first use.
+
+    ``digest`` may pass in vocabulary_hash(vocabulary_dict) when the caller
+    already has it, e.g. from a Vocabulary loaded by a VocabularyStore.
+    Compiling happens outside the registry lock: concurrent first requests
+    for one vocabulary share a single compile, and lookups of other
+    vocabularies never wait for it.
+    """
+    vocabulary = vocabulary_dict or FUTURES_VOCABULARY
+    key = (digest or vocabulary_hash(vocabulary), matcher)
+    with _ANALYZERS_LOCK:
+        analyzer = _ANALYZERS.get(key)
+        if analyzer is not None:
+            _ANALYZERS.move_to_end(key)
+            _ANALYZER_COUNTS['hits'] += 1
+            return analyzer
+        pending = _COMPILING.get(key)
+        if pending is None:
+            pending = _COMPILING[key] = concurrent.futures.Future()
+            compiling = True
+        else:
+            _ANALYZER_COUNTS['hits'] += 1
+            compiling = False
+    if not compiling:
+        return pending.result()
+
+    try:
+        snapshot = {category: list(terms) for category, terms in vocabulary.items()}
+        analyzer = FuturesVocabularyAnalyzer(snapshot, matcher=matcher)
+    except BaseException as exc:
+        with _ANALYZERS_LOCK:
+            del _COMPILING[key]
+        pending.set_exception(exc)
+        raise
+    with _ANALYZERS_LOCK:
+        del _COMPILING[key]
+        _ANALYZERS[key] = analyzer
+        _ANALYZER_COUNTS['compiles'] += 1
+        while len(_ANALYZERS) > MAX_ANALYZERS:
+            _ANALYZERS.popitem(last=False)
+            _ANALYZER_COUNTS['evictions'] += 1
+    pending.set_result(analyzer)
+    return analyzer
+
+
+def analyzer_registry_stats():
+    """Size and hit/compile/eviction counts of the shared analyzer registry."""
+    with _ANALYZERS_LOCK:
+        return {'analyzers': len(_ANALYZERS), 'max_analyzers': MAX_ANALYZERS,
+                'hits': _ANALYZER_COUNTS['hits'], 'compiles': _ANALYZER_COUNTS['compiles'],
+                'evictions': _ANALYZER_COUNTS['evictions']}
+
+
+class StreamingDocumentAnalyzer:
+    """Analyze a document fed in chunks, without holding the whole text.
+
+    Each feed() scans a short carry-over from the previous chunk plus the new
+    chunk, so multi-word terms straddling a boundary are found once, with
+    global positions and the same snippets as analyze_document. Co-occurrence
+    then runs on those global positions, so windows span chunk boundaries too.
+    Memory is bounded by the chunk size plus the matches kept; pass
+    ``snippet_limit`` to cap the snippets stored per term.
+
+        stream = StreamingDocumentAnalyzer(get_analyzer())
+        for chunk in chunks:
+            stream.feed(chunk)
+        term_matches = stream.close()
+    """
+    SNIPPET_CONTEXT = 60  # characters either side, as in analyze_document
+
+    def __init__(self, analyzer: FuturesVocabularyAnalyzer, snippet_limit=None):
+        self.analyzer = analyzer
+        self.snippet_limit = snippet_limit
+        max_term_length = max((len(t['term']) for t in analyzer.flat_vocabulary), default=0)
+        # Enough history to rescan any match not yet accepted, plus its snippet
+        # prefix and the character before it for the word-boundary check.
+        self._carry_size = max_term_length + 2 * self.SNIPPET_CONTEXT + 1
+        self._buffer = ''
+        self._buffer_start = 0
+        self._accepted_until = -self.SNIPPET_CONTEXT
+        self._positions = {}
+        self._snippets = {}
+        self._last_end = {}
+        self._in_word = False
+        self.length = 0
+        self.word_count = 0
+        self.closed = False
+
+    def feed(self, chunk):
+        """Scan the next piece of text."""
+        if self.closed:
+            raise ValueError("StreamingDocumentAnalyzer is closed")
+        if not chunk:
+            return
+        # count words like len(text.split()), merging a word cut by the boundary
+        words = len(chunk.split())
+        if words and self._in_word and not chunk[0].isspace():
+            words -= 1
+        self.word_count += words
+        self._in_word = not chunk[-1].isspace()
+        self.length += len(chunk)
+        self._buffer += chunk
+        self._scan(final=False)
+
+    def close(self):
+        """Finish the stream and return term_matches as analyze_document would."""
+        if not self.closed:
+            self._scan(final=True)
+            self.closed = True
+            self._buffer = ''
+        term_matches = []
+        for term_info in self.analyzer.flat_vocabulary:
+            term = term_info['term']
+            positions = self._positions.get(term)
+            if positions:
+                term_matches.append({
+                    'term': term,
+                    'category': term_info['category'],
+                    'frequency': len(positions),
+                    'positions': list(positions),
+                    'snippets': list(self._snippets[term]),
+                })
+        return term_matches
+
+    def _scan(self, final):
+        buffer, start = self._buffer, self._buffer_start
+        end = start + len(buffer)
+        # A match is final once its snippet's right context has arrived
+        accept_until = end if final else end - self.SNIPPET_CONTEXT
+        context = self.SNIPPET_CONTEXT
+        for term, local_positions in self.analyzer.matcher.find_all(buffer.lower()).items():
+            for local in local_positions:
+                pos = start + local
+                match_end = pos + len(term)
+                if not (self._accepted_until < match_end <= accept_until):
+                    continue
+                if pos < self._last_end.get(term, 0):
+                    continue
+                self._last_end[term] = match_end
+                self._positions.setdefault(term, []).append(pos)
+                snippets = self._snippets.setdefault(term, [])
+                if self.snippet_limit is None or len(snippets) < self.snippet_limit:
+                    lo = max(0, local - context)
+                    snippets.append(buffer[lo:local + len(term) + context].strip())
+        self._accepted_until = max(self._accepted_until, accept_until)
+        # keep only the tail that later chunks may still need
+        if len(buffer) > self._carry_size:
+            self._buffer = buffer[-self._carry_size:]
+            self._buffer_start = end - self._carry_size
+
+
+def analyze_stream(chunks, analyzer=None, include_wordcloud=False, cooccurrence_window=100, cooccurrence_top_k=20, snippet_limit=None,
+                   cooccurrence_windows=None, timings=False):
+    """results_with_wordcloud() for a document given as an iterable of text chunks.
+
+    The 'match' timing includes reading ``chunks``.
+    """
+    analyzer = analyzer or get_analyzer()
+    timer = StageTimer() if timings else NULL_TIMER
+    stream = StreamingDocumentAnalyzer(analyzer, snippet_limit=snippet_limit)
+    with timer.stage('match'):
+        for chunk in chunks:
+            stream.feed(chunk)
+        term_matches = stream.close()
+    result = {}
+    for _, partial in iter_match_sections(analyzer, term_matches, stream.word_count, include_wordcloud=include_wordcloud,
+                                          cooccurrence_window=cooccurrence_window, cooccurrence_top_k=cooccurrence_top_k,
+                                          cooccurrence_windows=cooccurrence_windows, timer=timer):
+        result.update(partial)
+    if timings:
+        result['timings'] = timer.as_dict()
+    return result
+
+
+def iter_text_chunks(fileobj, chunk_size=1024 * 1024, encoding='utf-8'):
+    """Yield decoded text chunks from a binary file object.
+
+    Decodes incrementally, so a multi-byte character split across reads is
+    kept intact; invalid bytes are replaced as in read_file_content_bytes.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    while True:
+        data = fileobj.read(chunk_size)
+        if not data:
+            break
+        text = decoder.decode(data)
+        if text:
+            yield text
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def read_file_content_bytes(file_bytes: bytes, filename: str, timer=None):
+    """Return text extracted from uploaded bytes and filename-based type detection.
+
+    ``timer`` (a StageTimer) records the 'decode', 'pdf_extract'/'pdf_join'
+    or 'docx_extract'/'docx_join' steps.
+    """
+    timer = timer or NULL_TIMER
     file_type = filename.split('.')[-1].lower()
     if file_type == 'txt':
-        return file_bytes.decode('utf-8', errors='replace')
-    elif file_type == 'pdf' and PyPDF2 is not None:
+        with timer.stage('decode'):
+            return file_bytes.decode('utf-8', errors='replace')
+    elif file_type == 'pdf' and optional_dependency('PyPDF2') is not None:
         try:
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_bytes))
-            text = ''
-            for page in pdf_reader.pages:
-                text += page.extract_text() or ''
+            with timer.stage('pdf_extract'):
+                pages = extract_pdf_pages(file_bytes)
+            with timer.stage('pdf_join'):
+                text, _ = join_pages(pages)
             return text
         except Exception:
             return ''
-    elif file_type in ['docx', 'doc'] and Document is not None:
+    elif file_type in ['docx', 'doc'] and optional_dependency('Document') is not None:
         try:
-            doc = Document(io.BytesIO(file_bytes))
-            return '\n'.join([p.text for p in doc.paragraphs])
+            with timer.stage('docx_extract'):
+                doc = optional_dependency('Document')(io.BytesIO(file_bytes))
+            with timer.stage('docx_join'):
+                return '\n'.join([p.text for p in doc.paragraphs])
         except Exception:
             return ''
     else:
         # Unknown type - try decode
         try:
-            return file_bytes.decode('utf-8', errors='replace')
+            with timer.stage('decode'):
+                return file_bytes.decode('utf-8', errors='replace')
         except Exception:
             return ''
 
 
+class LazySnippets(Sequence):
+    """Read-only list of snippets cut from the source only when accessed.
+
+    Holds the match offsets and a reference to the source (a str, bytes or
+    mmap) instead of one string per match. Slicing returns a plain list, and
+    a bytes source is decoded as UTF-8.
+    """
+    __slots__ = ('source', 'positions', 'length', 'context')
+
+    def __init__(self, source, positions, length, context=60):
+        self.source = source
+        self.positions = positions
+        self.length = length
+        self.context = context
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._snippet(pos) for pos in self.positions[index]]
+        return self._snippet(self.positions[index])
+
+    def __eq__(self, other):
+        if isinstance(other, Sequence) and not isinstance(other, (str, bytes)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"LazySnippets({len(self)} snippets)"
+
+    def _snippet(self, pos):
+        start = max(0, pos - self.context)
+        end = min(len(self.source), pos + self.length + self.context)
+        piece = self.source[start:end]
+        if not isinstance(piece, str):
+            piece = bytes(piece).decode('utf-8', errors='replace')
+        return piece.strip()
+
+
+def _count_words_in_buffer(buffer, block_size=16 * 1024 * 1024):
+    # len(text.split()) over a bytes-like buffer, one bounded block at a time
+    count = 0
+    in_word = False
+    for offset in range(0, len(buffer), block_size):
+        block = buffer[offset:offset + block_size]
+        words = len(block.split())
+        if words and in_word and not block[:1].isspace():
+            words -= 1
+        count += words
+        in_word = not block[-1:].isspace()
+    return count
+
+
+def analyze_path(path, analyzer=None, include_wordcloud=False, cooccurrence_window=100, cooccurrence_top_k=20, snippet_limit=None,
+                 cooccurrence_windows=None):
+    """Analyze a UTF-8 text file on disk without reading it into a str.
+
+    The file is memory-mapped and matched in place by the analyzer's
+    BytesTermMatcher (case-insensitive for ASCII), so the text is never held
+    in memory whatever the file size; only the snippets are copied out,
+    ``snippet_limit`` per term (None keeps all). Positions and snippet
+    context are counted in bytes, so they only equal the str path's for
+    ASCII text. The mapping is closed before returning.
+    """
+    analyzer = analyzer or get_analyzer()
+    with open(path, 'rb') as fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            buffer = b''
+        else:
+            buffer = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        found = analyzer.bytes_matcher.find_all(buffer)
+        table = TermMatchTable(analyzer.vocabulary, _position_typecode(len(buffer)))
+        for term_info in analyzer.flat_vocabulary:
+            term = term_info['term']
+            positions = found.get(term)
+            if positions:
+                snippets = LazySnippets(buffer, positions, len(term.encode('utf-8')))[:snippet_limit]
+                table.append(term, term_info['category'], positions, snippets)
+        word_count = _count_words_in_buffer(buffer)
+    finally:
+        if isinstance(buffer, mmap.mmap):
+            buffer.close()
+    result = {}
+    for _, partial in iter_match_sections(analyzer, table, word_count, include_wordcloud=include_wordcloud,
+                                          cooccurrence_window=cooccurrence_window, cooccurrence_top_k=cooccurrence_top_k,
+                                          cooccurrence_windows=cooccurrence_windows):
+        result.update(partial)
+    return result
+
+
+# With parallel extraction requested, PDFs with at least this many pages are
+# extracted across a process pool
+PDF_PARALLEL_MIN_PAGES = 64
+
+
+def iter_pdf_pages(file_bytes, start=0, stop=None, reader=None):
+    """Yield the extracted text of each PDF page in order, one page at a time.
+
+    Pass an already open ``reader`` (a PyPDF2 PdfReader of ``file_bytes``)
+    to avoid parsing the file again.
+    """
+    reader = reader or optional_dependency('PyPDF2').PdfReader(io.BytesIO(file_bytes))
+    stop = len(reader.pages) if stop is None else min(stop, len(reader.pages))
+    for index in range(start, stop):
+        yield reader.pages[index].extract_text() or ''
+
+
+def _extract_pdf_page_range(file_bytes, start, stop):
+    return list(iter_pdf_pages(file_bytes, start, stop))
+
+
+def extract_pdf_pages(file_bytes, max_workers=1, parallel_min_pages=PDF_PARALLEL_MIN_PAGES, executor=None):
+    """Return the list of page texts of a PDF.
+
+    Pages are read serially by default. Parallel extraction is opt-in: pass
+    a long-lived process pool as ``executor`` (split into ``max_workers``
+    page ranges, default one per CPU), or ``max_workers`` other than 1 for
+    a pool made for this call. Only documents with at least
+    ``parallel_min_pages`` pages are split, as every worker re-reads the
+    whole file.
+    """
+    reader = optional_dependency('PyPDF2').PdfReader(io.BytesIO(file_bytes))
+    page_count = len(reader.pages)
+    if (executor is None and max_workers == 1) or page_count < parallel_min_pages:
+        # the reader that counted the pages extracts them too
+        return list(iter_pdf_pages(file_bytes, reader=reader))
+    workers = max_workers if max_workers and max_workers > 1 else os.cpu_count() or 1
+    own_executor = executor is None
+    if own_executor:
+        try:
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        except (OSError, NotImplementedError):
+            # no multiprocessing support in this runtime
+            return list(iter_pdf_pages(file_bytes))
+    try:
+        step = -(-page_count // workers)
+        starts = list(range(0, page_count, step))
+        parts = executor.map(_extract_pdf_page_range, [file_bytes] * len(starts), starts, [s + step for s in starts])
+        return [page for part in parts for page in part]
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+
+def join_pages(pages):
+    """Join page texts without repeated copying; return (text, page_offsets).
+
+    ``page_offsets[i]`` is the character offset where page i + 1 starts.
+    """
+    page_offsets = []
+    offset = 0
+    for page in pages:
+        page_offsets.append(offset)
+        offset += len(page)
+    return ''.join(pages), page_offsets
+
+
+def page_for_position(page_offsets, position):
+    """Return the 1-based page number containing a character position."""
+    return max(1, bisect.bisect_right(page_offsets, position))
+
+
+def annotate_pages(term_matches, page_offsets):
+    """Add a 'pages' list (parallel to 'positions') to each term match."""
+    for match in term_matches:
+        match['pages'] = [page_for_position(page_offsets, pos) for pos in match['positions']]
+    return term_matches
+
+
+def analyze_pdf(file_bytes, analyzer=None, include_wordcloud=False, cooccurrence_window=100, cooccurrence_top_k=20, snippet_limit=None,
+                cooccurrence_windows=None):
+    """Analyze a PDF page by page, feeding each page straight into the analyzer.
+
+    Pages are never concatenated into one string. The result matches
+    results_with_wordcloud() on the joined text, and each term match also
+    carries the page number of every position in ``pages``.
+    """
+    analyzer = analyzer or get_analyzer()
+    stream = StreamingDocumentAnalyzer(analyzer, snippet_limit=snippet_limit)
+    page_offsets = []
+    for page in iter_pdf_pages(file_bytes):
+        page_offsets.append(stream.length)
+        stream.feed(page)
+    term_matches = annotate_pages(stream.close(), page_offsets)
+    result = {}
+    for _, partial in iter_match_sections(analyzer, term_matches, stream.word_count, include_wordcloud=include_wordcloud,
+                                          cooccurrence_window=cooccurrence_window, cooccurrence_top_k=cooccurrence_top_k,
+                                          cooccurrence_windows=cooccurrence_windows):
+        result.update(partial)
+    result['page_count'] = len(page_offsets)
+    return result
+
+
 def create_wordcloud_image_bytes(term_matches):
     """Return PNG bytes of a generated wordcloud from term_matches frequencies.
     If WordCloud is not available, return None.
     """
-    if WordCloud is None:
-        return None
-    word_freq = {m['term']: m['frequency'] for m in term_matches}
-    if not word_freq:
+    return render_wordcloud({m['term']: m['frequency'] for m in term_matches})
+
+
+def render_wordcloud(frequencies, width=800, height=400, image_format='png'):
+    """Return image bytes ('png' or 'webp') of a wordcloud for {term: frequency}.
+
+    Returns None if WordCloud is not available or there are no terms. The
+    layout is seeded, so the same frequencies always give the same image.
+    Raises ValueError if Pillow cannot write ``image_format``.
+    """
+    WordCloud = optional_dependency('WordCloud')
+    if WordCloud is None or not frequencies:
         return None
-    wc = WordCloud(width=800, height=400, background_color='white')
-    wc = wc.generate_from_frequencies(word_freq)
-    img = wc.to_image()
+    wc = WordCloud(width=width, height=height, background_color='white', random_state=0)
+    img = wc.generate_from_frequencies(frequencies).to_image()
     buf = io.BytesIO()
-    img.save(buf, format='PNG')
-    buf.seek(0)
-    return buf.read()
-
-
-def results_with_wordcloud(analyzer: FuturesVocabularyAnalyzer, text: str, include_wordcloud=True, cooccurrence_window: int = 100):
-    term_matches = analyzer.analyze_document(text)
-    stats = analyzer.calculate_statistics(term_matches, text)
-    coocc = analyzer.analyze_co_occurrence(term_matches, window=cooccurrence_window)
-    approach = analyzer.detect_methodological_approach(term_matches)
-    result = {
-        'analysis_timestamp': datetime.now().isoformat(),
-        'statistics': stats,
-        'term_matches': term_matches,
-        'co_occurrences': [{'pair': list(pair), 'count': count} for pair, count in coocc],
-        'approach_scores': approach,
-    }
-    # Always include raw word frequencies for client-side rendering
-    result['word_frequencies'] = {m['term']: m['frequency'] for m in term_matches}
+    try:
+        img.save(buf, format=image_format.upper())
+    except (KeyError, OSError) as exc:
+        raise ValueError(f"Cannot write {image_format} images: {exc}")
+    return buf.getvalue()
 
-    # Optionally include a server-generated image (only when WordCloud is available)
-    if include_wordcloud and WordCloud is not None:
-        img_bytes = create_wordcloud_image_bytes(term_matches)
-        if img_bytes:
-            data_url = 'data:image/png;base64,' + base64.b64encode(img_bytes).decode('ascii')
-            result['wordcloud_data_url'] = data_url
-    # Add CSV export string
+
+def iter_result_sections(analyzer: FuturesVocabularyAnalyzer, text: str, include_wordcloud=True, cooccurrence_window: int = 100, cooccurrence_top_k=20, snippet_limit=None,
+                         cooccurrence_windows=None, timer=None, chunk_cache=None):
+    """Yield (section, partial_result) pairs as each part of the analysis is ready.
+
+    Cheap headline data comes first so clients can render progressively:
+    'summary' (statistics, word_frequencies, approach_scores), then
+    'term_matches', 'co_occurrences', 'clusters', 'csv' and, when requested,
+    'wordcloud'. Merging every partial dict gives results_with_wordcloud().
+    ``snippet_limit`` caps the snippets kept per term (None keeps all).
+    ``cooccurrence_windows`` adds 'co_occurrences_by_window', the top pairs
+    for each of those windows, computed in the same pass.
+    ``timer`` (a StageTimer) records the seconds spent in each step; time
+    the consumer spends between sections is not counted. ``chunk_cache``
+    reuses the matches of unchanged chunks (see analyze_document).
+    """
+    timer = timer or NULL_TIMER
+    with timer.stage('match'):
+        table = analyzer.match_table(text, snippet_limit=snippet_limit, chunk_cache=chunk_cache)
+        word_count = len(text.split())
+    yield from iter_match_sections(analyzer, table, word_count, include_wordcloud=include_wordcloud,
+                                   cooccurrence_window=cooccurrence_window, cooccurrence_top_k=cooccurrence_top_k,
+                                   cooccurrence_windows=cooccurrence_windows, timer=timer)
+
+
+def iter_match_sections(analyzer: FuturesVocabularyAnalyzer, term_matches, word_count, include_wordcloud=True, cooccurrence_window: int = 100, cooccurrence_top_k=20,
+                        cooccurrence_windows=None, timer=None):
+    """iter_result_sections() for term_matches that were already computed.
+
+    ``term_matches`` is a TermMatchTable or a list of match dicts. Statistics
+    and co-occurrence run on the table; the dict list is what is returned.
+    """
+    timer = timer or NULL_TIMER
+    with timer.stage('term_matches'):
+        if isinstance(term_matches, TermMatchTable):
+            table, term_matches = term_matches, term_matches.to_dicts()
+        else:
+            table = TermMatchTable.from_dicts(term_matches, analyzer.vocabulary)
+    with timer.stage('statistics'):
+        stats = analyzer.calculate_statistics(table, None, word_count=word_count)
+        approach = analyzer.detect_methodological_approach(table)
+        summary = {
+            'analysis_timestamp': datetime.now().isoformat(),
+            'statistics': stats,
+            # Always include raw word frequencies for client-side rendering
+            'word_frequencies': dict(zip(table.terms, table.frequencies)),
+            'approach_scores': approach,
+        }
+    yield 'summary', summary
+    yield 'term_matches', {'term_matches': term_matches}
+
+    with timer.stage('co_occurrence'):
+        windows = [cooccurrence_window, *(cooccurrence_windows or ())]
+        matrices = analyzer.co_occurrence_matrices(table, windows)
+        top = matrices[cooccurrence_window].top(cooccurrence_top_k)
+        section = {'co_occurrences': [{'pair': list(pair), 'count': count} for pair, count in top.items()]}
+        if cooccurrence_windows:
+            section['co_occurrences_by_window'] = {
+                str(window): [{'pair': list(pair), 'count': count} for pair, count in matrices[window].ranked(cooccurrence_top_k)]
+                for window in sorted(set(cooccurrence_windows))
+            }
+    yield 'co_occurrences', section
+
+    # Add simple clustering information based on co-occurrence pairs
     try:
-        result['csv'] = export_terms_csv(term_matches)
+        with timer.stage('clustering'):
+            term2cluster, clusters = top.clusters()
+        section = {'clusters': clusters, 'term_cluster_map': term2cluster}
     except Exception:
-        result['csv'] = None
+        section = {'clusters': [], 'term_cluster_map': {}}
+    yield 'clusters', section
 
-    # Add simple clustering information based on co-occurrence pairs
+    # Add CSV export string
     try:
-        term2cluster, clusters = compute_clusters_from_coocc(coocc)
-        result['clusters'] = clusters
-        result['term_cluster_map'] = term2cluster
+        with timer.stage('csv'):
+            csv_text = export_terms_csv(term_matches)
     except Exception:
-        result['clusters'] = []
-        result['term_cluster_map'] = {}
+        csv_text = None
+    yield 'csv', {'csv': csv_text}
+
+    # Optionally include a server-generated image (only when WordCloud is available)
+    if include_wordcloud and optional_dependency('WordCloud') is not None:
+        with timer.stage('wordcloud'):
+            img_bytes = create_wordcloud_image_bytes(term_matches)
+        if img_bytes:
+            data_url = 'data:image/png;base64,' + base64.b64encode(img_bytes).decode('ascii')
+            yield 'wordcloud', {'wordcloud_data_url': data_url}
+
+
+# Keys of a full result grouped by the section that produces them, in stream order
+RESULT_SECTIONS = (
+    ('summary', ('analysis_timestamp', 'statistics', 'word_frequencies', 'approach_scores')),
+    ('term_matches', ('term_matches', 'top_term_indices')),
+    ('co_occurrences', ('co_occurrences', 'co_occurrences_by_window')),
+    ('clusters', ('clusters', 'term_cluster_map')),
+    ('csv', ('csv',)),
+    ('wordcloud', ('wordcloud_data_url',)),
+)
 
+
+def split_result_sections(result):
+    """Yield (section, partial_result) pairs from an already-built result dict."""
+    for section, keys in RESULT_SECTIONS:
+        partial = {k: result[k] for k in keys if k in result}
+        if partial:
+            yield section, partial
+
+
+# Response shapes. 'full' is the result as computed. 'compact' leaves out the
+# csv string (served separately) and replaces statistics['top_terms'], copies
+# of term_matches entries, with 'top_term_indices' into term_matches.
+# 'summary' is compact without each term's positions, snippets and pages.
+RESPONSE_MODES = ('full', 'compact', 'summary')
+_PER_POSITION_KEYS = ('positions', 'snippets', 'pages')
+
+
+def shape_sections(sections, mode='full', include_csv=None):
+    """Reshape (section, partial_result) pairs for a response ``mode``.
+
+    Works section by section, so streamed results can be reshaped too:
+    'top_term_indices' is sent with the term_matches section. ``include_csv``
+    overrides whether the csv section is kept (by default only in 'full').
+    """
+    if mode not in RESPONSE_MODES:
+        raise ValueError(f"Unknown response mode {mode!r}; expected one of {RESPONSE_MODES}")
+    if include_csv is None:
+        include_csv = mode == 'full'
+    top_terms = None
+    for section, partial in sections:
+        if section == 'csv' and not include_csv:
+            continue
+        if mode != 'full' and section == 'summary' and 'top_terms' in partial.get('statistics', {}):
+            statistics = dict(partial['statistics'])
+            top_terms = statistics.pop('top_terms')
+            partial = dict(partial, statistics=statistics)
+        elif mode != 'full' and section == 'term_matches':
+            term_matches = partial['term_matches']
+            if top_terms is not None:
+                row = {(m['term'], m['category']): i for i, m in enumerate(term_matches)}
+                partial = dict(partial, top_term_indices=[row[(m['term'], m['category'])] for m in top_terms])
+            if mode == 'summary':
+                partial = dict(partial, term_matches=[{k: v for k, v in m.items() if k not in _PER_POSITION_KEYS}
+                                                      for m in term_matches])
+        yield section, partial
+
+
+def shape_result(result, mode='full', include_csv=None):
+    """shape_sections() for a whole result dict; keys outside the sections (e.g. page_count) are kept."""
+    if mode == 'full' and include_csv is not False:
+        return result
+    section_keys = {key for _, keys in RESULT_SECTIONS for key in keys}
+    shaped = {k: v for k, v in result.items() if k not in section_keys}
+    for _, partial in shape_sections(split_result_sections(result), mode, include_csv):
+        shaped.update(partial)
+    return shaped
+
+
+def results_with_wordcloud(analyzer: FuturesVocabularyAnalyzer, text: str, include_wordcloud=True, cooccurrence_window: int = 100, cooccurrence_top_k=20, snippet_limit=None,
+                           cooccurrence_windows=None, timings=False, timer=None, chunk_cache=None):
+    """The full analysis result; ``timings=True`` adds a 'timings' block of seconds per stage.
+
+    ``timer`` (a StageTimer) records the stages instead of a fresh one.
+    """
+    timer = timer or (StageTimer() if timings else NULL_TIMER)
+    result = {}
+    for _, partial in iter_result_sections(analyzer, text, include_wordcloud=include_wordcloud,
+                                           cooccurrence_window=cooccurrence_window, cooccurrence_top_k=cooccurrence_top_k,
+                                           snippet_limit=snippet_limit, cooccurrence_windows=cooccurrence_windows, timer=timer,
+                                           chunk_cache=chunk_cache):
+        result.update(partial)
+    if timings:
+        result['timings'] = timer.as_dict()
     return result
 
 
+def analyze_text(text, vocabulary_dict=None, include_wordcloud=False, cooccurrence_window=100, cooccurrence_top_k=20, snippet_limit=None,
+                 cooccurrence_windows=None, timings=False, chunk_cache=None):
+    """results_with_wordcloud using the shared analyzer for ``vocabulary_dict``.
+
+    Module-level and argument-only so it can be sent to worker processes;
+    each process compiles a vocabulary once through its own registry.
+    A ``chunk_cache`` only helps in-process, as it is not shared with workers.
+    """
+    analyzer = get_analyzer(vocabulary_dict)
+    return results_with_wordcloud(analyzer, text, include_wordcloud=include_wordcloud,
+                                  cooccurrence_window=cooccurrence_window, cooccurrence_top_k=cooccurrence_top_k,
+                                  snippet_limit=snippet_limit, cooccurrence_windows=cooccurrence_windows, timings=timings,
+                                  chunk_cache=chunk_cache)
+
+
+def analyze_many(texts, vocabulary_dict=None, include_wordcloud=False, cooccurrence_window=100,
+                 cooccurrence_top_k=20, max_workers=None, ordered=True, executor=None, snippet_limit=None,
+                 cooccurrence_windows=None, timings=False):
+    """Analyze many texts, spreading results_with_wordcloud over a process pool.
+
+    Yields (index, result) pairs, in input order when ``ordered`` is True and
+    otherwise as each document finishes. Pass ``executor`` to reuse a
+    long-lived pool; with ``max_workers=1`` everything runs in-process.
+    """
+    texts = list(texts)
+    args = (vocabulary_dict, include_wordcloud, cooccurrence_window, cooccurrence_top_k, snippet_limit, cooccurrence_windows, timings)
+    if executor is None and (max_workers == 1 or len(texts) <= 1):
+        for index, text in enumerate(texts):
+            yield index, analyze_text(text, *args)
+        return
+
+    own_executor = executor is None
+    if own_executor:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {executor.submit(analyze_text, text, *args): index for index, text in enumerate(texts)}
+        if ordered:
+            for future, index in futures.items():
+                yield index, future.result()
+        else:
+            for future in concurrent.futures.as_completed(futures):
+                yield futures[future], future.result()
+    finally:
+        if own_executor:
+            executor.shutdown(cancel_futures=True)
+
+
 def compute_clusters_from_coocc(co_occurrences):
     """Compute connected components (clusters) from co-occurrence pairs.
 
     co_occurrences: list of (pair, count) where pair is (term1, term2)
-    Returns mapping term -> cluster_id and list of clusters (each cluster is list of terms)
+    Returns mapping term -> cluster_id and list of clusters (each cluster is list of terms),
+    computed as connected components of the pairs' CoOccurrenceMatrix.
     """
-    # Build adjacency
-    adj = {}
+    pairs = []
     for item in co_occurrences:
         # item may be ( (a,b), count ) or dict {'pair': [a,b], 'count': n}
         if isinstance(item, dict):
-            pair = tuple(item.get('pair', []))
+            pair, count = tuple(item.get('pair', [])), item.get('count', 0)
         else:
-            pair = item[0]
-        if not pair or len(pair) != 2:
-            continue
-        a, b = pair[0], pair[1]
-        adj.setdefault(a, set()).add(b)
-        adj.setdefault(b, set()).add(a)
-
-    visited = set()
-    clusters = []
-    for node in adj.keys():
-        if node in visited:
-            continue
-        stack = [node]
-        comp = []
-        while stack:
-            v = stack.pop()
-            if v in visited:
-                continue
-            visited.add(v)
-            comp.append(v)
-            for nb in adj.get(v, []):
-                if nb not in visited:
-                    stack.append(nb)
-        if comp:
-            clusters.append(comp)
-
-    # Also include isolated terms (if any) - caller can include them via word_frequencies but here we return clusters only for cooccurring terms
-    term2cluster = {}
-    for i, comp in enumerate(clusters):
-        for term in comp:
-            term2cluster[term] = i
-
-    return term2cluster, clusters
+            pair, count = item[0], item[1]
+        if pair and len(pair) == 2:
+            pairs.append((pair, count))
+    return CoOccurrenceMatrix.from_counts(pairs).clusters()
 
 
 def export_terms_csv(term_matches):
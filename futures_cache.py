@@ -0,0 +1,327 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+
+def estimate_size(value):
+    """Rough in-memory size in bytes of a JSON-like result (dicts, lists, strings, numbers).
+
+    Cheaper than serializing; good enough to weigh one large result against
+    many small ones.
+    """
+    size = 0
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            size += 49 + len(item)
+        elif isinstance(item, (bytes, bytearray)):
+            size += 33 + len(item)
+        elif isinstance(item, dict):
+            size += 64 + 8 * len(item)
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            size += 56 + 8 * len(item)
+            stack.extend(item)
+        else:
+            size += 28
+    return size
+
+
+def cache_key(content_sha256, cooccurrence_window, vocabulary_version, *extra):
+    """Build a result cache key from the content hash, window and vocabulary version."""
+    return ':'.join(str(part) for part in (content_sha256, cooccurrence_window, vocabulary_version) + extra)
+
+
+class CacheBackend:
+    """Interface shared by the result cache backends."""
+
+    def get(self, key, default=None):
+        raise NotImplementedError
+
+    def set(self, key, value, size=None):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self):
+        raise NotImplementedError
+
+
+class LRUCache(CacheBackend):
+    """Thread-safe LRU cache with a TTL and a memory budget in bytes.
+
+    Every operation is O(1) (an OrderedDict in recency order). Entries are
+    evicted least recently used first while the cache holds more than
+    ``max_entries`` items or more than ``max_bytes`` of estimated size; a
+    value larger than the whole budget is not stored.
+    """
+
+    def __init__(self, max_entries=200, max_bytes=128 * 1024 * 1024, ttl=60 * 60, sizeof=estimate_size):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self._data = OrderedDict()  # key -> (expires_at, size, value)
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, size, value = entry
+            if expires_at is not None and time.time() > expires_at:
+                del self._data[key]
+                self.bytes -= size
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, size=None):
+        if size is None:
+            size = self.sizeof(value)
+        expires_at = time.time() + self.ttl if self.ttl else None
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            if self.max_bytes is not None and size > self.max_bytes:
+                return False
+            self._data[key] = (expires_at, size, value)
+            self.bytes += size
+            while self._data and (len(self._data) > self.max_entries
+                                  or (self.max_bytes is not None and self.bytes > self.max_bytes)):
+                _, (_, evicted_size, _) = self._data.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            entry = self._data.pop(key, None)
+            if entry is not None:
+                self.bytes -= entry[1]
+            return entry is not None
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': 'memory',
+                'entries': len(self._data),
+                'bytes': self.bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+
+MemoryCacheBackend = LRUCache
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """Result cache stored in a local SQLite file.
+
+    Survives restarts and is shared by every worker process pointing at the
+    same path. Values are stored as zlib-compressed JSON. Entries expire
+    after ``ttl`` seconds; beyond ``max_entries`` the least recently read
+    are deleted.
+    """
+
+    def __init__(self, path=None, max_entries=10_000, ttl=24 * 60 * 60, compress_level=6):
+        self.path = path or os.path.join(tempfile.gettempdir(), 'futuresness-cache.sqlite3')
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.compress_level = compress_level
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                ' key TEXT PRIMARY KEY, value BLOB NOT NULL,'
+                ' expires_at REAL, accessed_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)')
+
+    def _connect(self):
+        # one connection per thread and process; sqlite handles must not cross either
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, counter, amount=1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def get(self, key, default=None):
+        conn = self._connect()
+        row = conn.execute('SELECT value, expires_at FROM entries WHERE key = ?', (key,)).fetchone()
+        now = time.time()
+        if row is None:
+            self._count('misses')
+            return default
+        blob, expires_at = row
+        if expires_at is not None and now > expires_at:
+            conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+            self._count('expirations')
+            self._count('misses')
+            return default
+        conn.execute('UPDATE entries SET accessed_at = ? WHERE key = ?', (now, key))
+        self._count('hits')
+        return json.loads(zlib.decompress(blob))
+
+    def set(self, key, value, size=None):
+        blob = zlib.compress(json.dumps(value, separators=(',', ':')).encode('utf-8'), self.compress_level)
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl else None
+        conn = self._connect()
+        conn.execute('INSERT OR REPLACE INTO entries (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)',
+                     (key, blob, expires_at, now))
+        excess = conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0] - self.max_entries
+        if excess > 0:
+            conn.execute('DELETE FROM entries WHERE key IN '
+                         '(SELECT key FROM entries ORDER BY accessed_at LIMIT ?)', (excess,))
+            self._count('evictions', excess)
+        return True
+
+    def delete(self, key):
+        return self._connect().execute('DELETE FROM entries WHERE key = ?', (key,)).rowcount > 0
+
+    def clear(self):
+        self._connect().execute('DELETE FROM entries')
+
+    def __contains__(self, key):
+        return self._connect().execute('SELECT 1 FROM entries WHERE key = ?', (key,)).fetchone() is not None
+
+    def __len__(self):
+        return self._connect().execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+    def stats(self):
+        entries, stored = self._connect().execute(
+            'SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM entries').fetchone()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': 'sqlite',
+                'path': self.path,
+                'entries': entries,
+                'bytes': stored,
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+
+class ParsedTextCache:
+    """Cache of text extracted from uploads, keyed by raw-bytes hash and file type.
+
+    Lets a repeated upload of the same PDF or DOCX skip extraction entirely.
+    Each entry remembers how long its parse took, so hits add up to the
+    parse time saved.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else LRUCache(max_entries=500, max_bytes=64 * 1024 * 1024)
+        self._lock = threading.Lock()
+        self.parse_seconds = 0.0
+        self.parse_seconds_saved = 0.0
+
+    @staticmethod
+    def key_for(file_bytes, filename):
+        file_type = (filename or '').split('.')[-1].lower()
+        return f"{hashlib.sha256(file_bytes).hexdigest()}:{file_type}"
+
+    def get(self, key):
+        entry = self.backend.get(key)
+        if entry is None:
+            return None
+        text, parse_seconds = entry
+        with self._lock:
+            self.parse_seconds_saved += parse_seconds
+        return text
+
+    def put(self, key, text, parse_seconds):
+        with self._lock:
+            self.parse_seconds += parse_seconds
+        self.backend.set(key, [text, parse_seconds])
+
+    def get_or_parse(self, file_bytes, filename, parser):
+        """Return cached text for the upload, or run ``parser(file_bytes, filename)`` and cache it."""
+        key = self.key_for(file_bytes, filename)
+        text = self.get(key)
+        if text is None:
+            started = time.perf_counter()
+            text = parser(file_bytes, filename)
+            self.put(key, text, time.perf_counter() - started)
+        return text
+
+    def stats(self):
+        stats = dict(self.backend.stats())
+        with self._lock:
+            stats['parse_seconds'] = self.parse_seconds
+            stats['parse_seconds_saved'] = self.parse_seconds_saved
+        return stats
+
+
+CACHE_BACKENDS = {
+    'memory': MemoryCacheBackend,
+    'sqlite': SQLiteCacheBackend,
+}
+
+
+def make_cache_backend(kind='memory', **options):
+    """Create a cache backend by name ('memory' or 'sqlite')."""
+    if kind not in CACHE_BACKENDS:
+        raise ValueError(f"Unknown cache backend {kind!r}; expected one of {sorted(CACHE_BACKENDS)}")
+    return CACHE_BACKENDS[kind](**options)
@@ -0,0 +1,148 @@
+import hashlib
+import re
+import threading
+import zlib
+
+from futures_cache import LRUCache
+
+# Characters that end a sentence or line; a chunk may end after one of these
+# (followed by whitespace, or a newline on its own) unless a vocabulary term
+# contains it, so no term can ever span two chunks.
+BREAK_CHARACTERS = '.!?;:'
+
+
+def cut_pattern(terms):
+    """Regex whose match ends mark where ``terms`` can be scanned on either side independently.
+
+    A cut goes after a newline, or after a break character and the
+    whitespace that follows it. Terms never start with whitespace, so a
+    match across the cut would have to contain the newline or the break
+    character; those used by any term are left out. The character before a
+    cut is whitespace either way, which is not a word character, so word
+    boundaries (and str.lower()'s final-sigma rule) see the same thing at a
+    chunk edge as in the whole text. Returns None if no cut is safe.
+    """
+    used = set(''.join(terms))
+    alternatives = []
+    if '\n' not in used:
+        alternatives.append(r'\n')
+    breaks = ''.join(ch for ch in BREAK_CHARACTERS if ch not in used)
+    if breaks:
+        alternatives.append(f'[{re.escape(breaks)}]\\s')
+    return re.compile('|'.join(alternatives)) if alternatives else None
+
+
+def content_defined_chunks(text, pattern, min_size=256, max_size=8192, boundary_bits=3, window=48):
+    """Split ``text`` into (start, end) spans whose boundaries depend only on nearby content.
+
+    Each candidate cut from ``pattern`` becomes a boundary when the CRC-32 of
+    the ``window`` characters before it has ``boundary_bits`` low zero bits,
+    so an edit moves at most the boundaries next to it and every chunk
+    after them hashes as before. Chunks are at least ``min_size``
+    characters; past ``max_size`` the last candidate is cut instead. With no
+    candidates the text is one chunk.
+    """
+    if pattern is None or len(text) <= min_size:
+        return [(0, len(text))] if text else []
+    mask = (1 << boundary_bits) - 1
+    cuts = []
+    start = 0
+    last = None  # latest candidate passed over, for forced cuts
+    for match in pattern.finditer(text):
+        end = match.end()
+        if end - start < min_size:
+            continue
+        if end - start > max_size and last is not None:
+            cuts.append(last)
+            start, last = last, None
+            if end - start < min_size:
+                continue
+        if zlib.crc32(text[max(0, end - window):end].encode('utf-8', 'surrogatepass')) & mask == 0:
+            cuts.append(end)
+            start, last = end, None
+        else:
+            last = end
+    bounds = [0, *cuts]
+    if bounds[-1] < len(text):
+        bounds.append(len(text))
+    return list(zip(bounds, bounds[1:]))
+
+
+class ChunkMatchCache:
+    """Term positions per content-defined chunk, so a revised document only rescans what changed.
+
+    find_all(analyzer, text) returns what ``analyzer.matcher.find_all(text.lower())``
+    would, assembled from the cached matches of chunks seen before (in any
+    document) plus fresh scans of the new ones. Entries hold positions
+    relative to their chunk and are keyed by the chunk's SHA-256 and the
+    vocabulary, so the same paragraph is shared wherever it moves. Snippets,
+    statistics and co-occurrence are built from the assembled positions by
+    the caller, as for a full scan.
+    """
+
+    def __init__(self, backend=None, min_size=256, max_size=8192, boundary_bits=3):
+        self.backend = backend if backend is not None else LRUCache(max_entries=20_000, max_bytes=64 * 1024 * 1024)
+        self.min_size = min_size
+        self.max_size = max_size
+        self.boundary_bits = boundary_bits
+        self._patterns = {}  # vocabulary hash -> cut pattern
+        self._lock = threading.Lock()
+        self.chunks_scanned = 0
+        self.chunks_reused = 0
+        self.characters_scanned = 0
+        self.characters_reused = 0
+
+    def _pattern_for(self, analyzer):
+        pattern = self._patterns.get(analyzer.vocabulary_hash, False)
+        if pattern is False:
+            pattern = cut_pattern(t['term'] for t in analyzer.flat_vocabulary)
+            with self._lock:
+                self._patterns[analyzer.vocabulary_hash] = pattern
+        return pattern
+
+    def chunks(self, analyzer, text):
+        """The (start, end) chunk spans of ``text`` for ``analyzer``'s vocabulary."""
+        return content_defined_chunks(text, self._pattern_for(analyzer), self.min_size, self.max_size,
+                                      self.boundary_bits)
+
+    def find_all(self, analyzer, text):
+        """Return a dict term -> list of match start positions in ``text.lower()``."""
+        prefix = f"{analyzer.vocabulary_hash[:16]}:{analyzer.matcher.name}:"
+        found = {}
+        # positions are offsets into the lowered text, which can be longer than ``text``
+        offset = 0
+        counts = [0, 0, 0, 0]  # chunks scanned, reused; characters scanned, reused
+        for start, end in self.chunks(analyzer, text):
+            chunk = text[start:end]
+            key = prefix + hashlib.sha256(chunk.encode('utf-8', 'surrogatepass')).hexdigest()
+            entry = self.backend.get(key)
+            if entry is None:
+                chunk_lower = chunk.lower()
+                entry = [len(chunk_lower), analyzer.matcher.find_all(chunk_lower)]
+                self.backend.set(key, entry)
+                counts[0] += 1
+                counts[2] += len(chunk)
+            else:
+                counts[1] += 1
+                counts[3] += len(chunk)
+            length, chunk_found = entry
+            for term, positions in chunk_found.items():
+                found.setdefault(term, []).extend([p + offset for p in positions] if offset else positions)
+            offset += length
+        with self._lock:
+            self.chunks_scanned += counts[0]
+            self.chunks_reused += counts[1]
+            self.characters_scanned += counts[2]
+            self.characters_reused += counts[3]
+        return found
+
+    def stats(self):
+        stats = dict(self.backend.stats())
+        with self._lock:
+            total = self.characters_scanned + self.characters_reused
+            stats['chunks_scanned'] = self.chunks_scanned
+            stats['chunks_reused'] = self.chunks_reused
+            stats['characters_scanned'] = self.characters_scanned
+            stats['characters_reused'] = self.characters_reused
+            stats['reuse_rate'] = self.characters_reused / total if total else 0.0
+        return stats
@@ -0,0 +1,147 @@
+import math
+import threading
+from collections import Counter
+
+from futures_analyzer import TermMatchTable, get_analyzer
+
+
+class CorpusDocument:
+    """What a Corpus keeps per document: enough to take it back out again."""
+    __slots__ = ('word_count', 'term_counts', 'term_categories', 'category_counts', 'pair_counts')
+
+    def __init__(self, word_count, term_counts, term_categories, category_counts, pair_counts):
+        self.word_count = word_count
+        self.term_counts = term_counts          # term -> occurrences
+        self.term_categories = term_categories  # term -> category
+        self.category_counts = category_counts  # category -> occurrences
+        self.pair_counts = pair_counts          # (term_a, term_b) -> co-occurrence count
+
+
+class Corpus:
+    """Running corpus-level totals over a changing set of analyzed documents.
+
+    Adding or removing a document touches only that document's terms and
+    pairs: term and category totals, document frequencies and co-occurrence
+    counts are kept as running sums, so nothing is rescanned. Scores are
+    computed on demand from the current totals, TF-IDF style: a term's
+    weight is its frequency per 1000 words in the document times its
+    smoothed inverse document frequency, ``log((1 + N) / (1 + df)) + 1``.
+    """
+
+    def __init__(self, analyzer=None, cooccurrence_window=100):
+        self.analyzer = analyzer or get_analyzer()
+        self.cooccurrence_window = cooccurrence_window
+        self._documents = {}
+        self._lock = threading.Lock()
+        self.word_count = 0
+        self.term_totals = Counter()
+        self.term_document_frequency = Counter()
+        self.category_totals = Counter()
+        self.category_document_frequency = Counter()
+        self.pair_totals = Counter()
+        self.pair_document_frequency = Counter()
+
+    def __len__(self):
+        return len(self._documents)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._documents
+
+    @property
+    def document_ids(self):
+        return list(self._documents)
+
+    def add(self, doc_id, text):
+        """Analyze ``text`` and add it as ``doc_id``, replacing any document with that id."""
+        return self.add_matches(doc_id, self.analyzer.match_table(text), len(text.split()))
+
+    def add_matches(self, doc_id, term_matches, word_count):
+        """Add an already analyzed document (a TermMatchTable or term_matches dicts)."""
+        if not isinstance(term_matches, TermMatchTable):
+            term_matches = TermMatchTable.from_dicts(term_matches, self.analyzer.vocabulary)
+        term_counts = Counter()
+        term_categories = {}
+        category_counts = Counter()
+        for term, category_id, frequency in zip(term_matches.terms, term_matches.category_ids, term_matches.frequencies):
+            category = term_matches.categories[category_id]
+            term_counts[term] += frequency
+            term_categories.setdefault(term, category)
+            category_counts[category] += frequency
+        pair_counts = self.analyzer.co_occurrence_matrix(term_matches, self.cooccurrence_window)
+        document = CorpusDocument(word_count, term_counts, term_categories, category_counts, pair_counts)
+        with self._lock:
+            previous = self._documents.pop(doc_id, None)
+            if previous is not None:
+                self._apply(previous, -1)
+            self._documents[doc_id] = document
+            self._apply(document, 1)
+        return document
+
+    def remove(self, doc_id):
+        """Take ``doc_id`` out of every total; raises KeyError if it is not in the corpus."""
+        with self._lock:
+            document = self._documents.pop(doc_id)
+            self._apply(document, -1)
+        return document
+
+    def _apply(self, document, sign):
+        self.word_count += sign * document.word_count
+        for totals, frequencies, counts in (
+            (self.term_totals, self.term_document_frequency, document.term_counts),
+            (self.category_totals, self.category_document_frequency, document.category_counts),
+            (self.pair_totals, self.pair_document_frequency, document.pair_counts),
+        ):
+            for key, count in counts.items():
+                totals[key] += sign * count
+                frequencies[key] += sign
+                if not frequencies[key]:
+                    del totals[key]
+                    del frequencies[key]
+
+    def idf(self, term):
+        """Smoothed inverse document frequency of ``term`` in the current corpus."""
+        return math.log((1 + len(self._documents)) / (1 + self.term_document_frequency.get(term, 0))) + 1
+
+    def scores(self, doc_id):
+        """TF-IDF futuresness of one document: overall, per category and per term."""
+        with self._lock:
+            document = self._documents[doc_id]
+            term_scores = {}
+            if document.word_count:
+                for term, count in document.term_counts.items():
+                    term_scores[term] = count / document.word_count * 1000 * self.idf(term)
+        category_scores = Counter()
+        for term, score in term_scores.items():
+            category_scores[document.term_categories[term]] += score
+        return {
+            'futuresness': sum(term_scores.values()),
+            'category_scores': dict(category_scores),
+            'term_scores': dict(sorted(term_scores.items(), key=lambda x: x[1], reverse=True)),
+        }
+
+    def rank_documents(self, top_k=None):
+        """(doc_id, futuresness) pairs, highest first; top_k=None returns all."""
+        ranked = sorted(((doc_id, self.scores(doc_id)['futuresness']) for doc_id in self.document_ids),
+                        key=lambda x: x[1], reverse=True)
+        return ranked if top_k is None else ranked[:top_k]
+
+    def co_occurrences(self, top_k=20):
+        """Corpus-wide (pair, count) tuples by count, summed over documents."""
+        with self._lock:
+            ranked = self.pair_totals.most_common()
+        return ranked if top_k is None else ranked[:top_k]
+
+    def summary(self, top_k=20):
+        """JSON-friendly snapshot of the corpus totals."""
+        with self._lock:
+            summary = {
+                'documents': len(self._documents),
+                'word_count': self.word_count,
+                'term_totals': dict(self.term_totals.most_common()),
+                'term_document_frequency': dict(self.term_document_frequency.most_common()),
+                'category_totals': dict(self.category_totals.most_common()),
+                'category_document_frequency': dict(self.category_document_frequency.most_common()),
+            }
+        summary['co_occurrences'] = [{'pair': list(pair), 'count': count} for pair, count in self.co_occurrences(top_k)]
+        summary['futuresness'] = dict(self.rank_documents(top_k))
+        return summary
@@ -0,0 +1,117 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+
+class ExecutorSaturated(Exception):
+    """Raised when every worker is busy and the wait queue is full."""
+
+
+def _timed_call(fn, args, kwargs):
+    # Runs inside the worker: report when work actually started and how long it took.
+    started = time.time()
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return started, time.perf_counter() - t0, result
+
+
+class _Timing:
+    __slots__ = ('count', 'total', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'total_seconds': self.total,
+            'mean_seconds': self.total / self.count if self.count else 0.0,
+            'max_seconds': self.max,
+        }
+
+
+class BoundedExecutor:
+    """Run blocking callables off the event loop with bounded concurrency.
+
+    At most ``max_workers`` calls run at once and at most ``max_queue`` more
+    wait for a worker; beyond that ``run`` raises ExecutorSaturated so the
+    caller can shed load. ``kind`` is 'thread' or 'process'; with processes
+    the callable and its arguments must be picklable.
+    """
+
+    def __init__(self, max_workers=4, max_queue=16, kind='thread'):
+        if kind not in ('thread', 'process'):
+            raise ValueError(f"Unknown executor kind {kind!r}; expected 'thread' or 'process'")
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.kind = kind
+        self._executor = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.queue_wait = _Timing()
+        self.compute = _Timing()
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # looked up here so multiprocessing is only imported for 'process'
+                    pool = (concurrent.futures.ProcessPoolExecutor if self.kind == 'process'
+                            else concurrent.futures.ThreadPoolExecutor)
+                    self._executor = pool(max_workers=self.max_workers)
+        return self._executor
+
+    async def run(self, fn, *args, **kwargs):
+        """Run ``fn(*args, **kwargs)`` on the pool and return its result."""
+        with self._lock:
+            if self.in_flight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise ExecutorSaturated(f"{self.in_flight} calls in flight")
+            self.in_flight += 1
+        submitted = time.time()
+        try:
+            loop = asyncio.get_running_loop()
+            started, elapsed, result = await loop.run_in_executor(self.executor, _timed_call, fn, args, kwargs)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+        with self._lock:
+            self.completed += 1
+            self.queue_wait.add(max(0.0, started - submitted))
+            self.compute.add(elapsed)
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                'kind': self.kind,
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'in_flight': self.in_flight,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'queue_wait': self.queue_wait.as_dict(),
+                'compute': self.compute.as_dict(),
+            }
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
@@ -0,0 +1,342 @@
+import bisect
+import heapq
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+from array import array
+
+from futures_analyzer import get_analyzer
+from futures_cache import LRUCache
+
+# snippets kept per (term, document) posting for search results
+INDEX_SNIPPETS = 3
+
+# postings cache key for the set of every indexed document
+_ALL_DOCUMENTS = ('all',)
+
+
+class QueryError(ValueError):
+    """Raised for a search query that cannot be parsed."""
+
+
+_QUERY_TOKEN = re.compile(r'\s*(\(|\)|"[^"]*"|NEAR(?:/\d+)?(?=[\s("]|$)|[^\s()"]+)')
+
+
+def parse_query(query, default_window=100):
+    """Parse a search query into a tree of tuples.
+
+    Terms are bare words or "quoted phrases" and are combined with AND
+    (also implied between adjacent terms), OR, NOT and parentheses.
+    ``a NEAR/100 b`` matches documents where some occurrence of ``a`` lies
+    within 100 characters of one of ``b``, the co-occurrence window rule;
+    plain ``NEAR`` uses ``default_window``. Returns ('term', t),
+    ('and', [...]), ('or', [...]), ('not', node) or ('near', a, b, window).
+    """
+    tokens = []
+    pos = 0
+    query = query.strip()
+    while pos < len(query):
+        match = _QUERY_TOKEN.match(query, pos)
+        if match is None:
+            raise QueryError(f"Cannot parse query at {query[pos:]!r}")
+        tokens.append(match.group(1))
+        pos = match.end()
+    if not tokens:
+        raise QueryError("Empty query")
+    parser = _QueryParser(tokens, default_window)
+    node = parser.parse_or()
+    if parser.peek() is not None:
+        raise QueryError(f"Unexpected {parser.peek()!r} in query")
+    return node
+
+
+class _QueryParser:
+    def __init__(self, tokens, default_window):
+        self.tokens = tokens
+        self.index = 0
+        self.default_window = default_window
+
+    def peek(self):
+        return self.tokens[self.index] if self.index < len(self.tokens) else None
+
+    def take(self):
+        token = self.peek()
+        self.index += 1
+        return token
+
+    def parse_or(self):
+        nodes = [self.parse_and()]
+        while self.peek() == 'OR':
+            self.take()
+            nodes.append(self.parse_and())
+        return nodes[0] if len(nodes) == 1 else ('or', nodes)
+
+    def parse_and(self):
+        nodes = [self.parse_not()]
+        while self.peek() not in (None, 'OR', ')'):
+            if self.peek() == 'AND':
+                self.take()
+            nodes.append(self.parse_not())
+        return nodes[0] if len(nodes) == 1 else ('and', nodes)
+
+    def parse_not(self):
+        if self.peek() == 'NOT':
+            self.take()
+            return ('not', self.parse_not())
+        return self.parse_near()
+
+    def parse_near(self):
+        node = self.parse_atom()
+        while self.peek() is not None and self.peek().startswith('NEAR'):
+            operator = self.take()
+            window = int(operator[5:]) if '/' in operator else self.default_window
+            other = self.parse_atom()
+            if node[0] != 'term' or other[0] != 'term':
+                raise QueryError("NEAR joins two terms")
+            node = ('near', node[1], other[1], window)
+        return node
+
+    def parse_atom(self):
+        token = self.take()
+        if token is None or token in ('AND', 'OR', ')') or token.startswith('NEAR'):
+            raise QueryError(f"Expected a term, got {token!r}")
+        if token == '(':
+            node = self.parse_or()
+            if self.take() != ')':
+                raise QueryError("Missing ')'")
+            return node
+        if token.startswith('"'):
+            token = token[1:-1]
+        term = ' '.join(token.lower().split())
+        if not term:
+            raise QueryError("Empty term")
+        return ('term', term)
+
+
+def _query_terms(node):
+    # terms that must be present (not under NOT), for result details
+    kind = node[0]
+    if kind == 'term':
+        return [node[1]]
+    if kind == 'near':
+        return [node[1], node[2]]
+    if kind in ('and', 'or'):
+        return [term for child in node[1] for term in _query_terms(child)]
+    return []
+
+
+def near_hits(positions_a, positions_b, window):
+    """Positions of ``a`` with a position of ``b`` within ``window`` (both ascending).
+
+    The same rule co_occurrence_matrix() counts pairs with.
+    """
+    hits = 0
+    for pos in positions_a:
+        i = bisect.bisect_left(positions_b, pos - window)
+        if i < len(positions_b) and positions_b[i] <= pos + window:
+            hits += 1
+    return hits
+
+
+class SearchIndex:
+    """On-disk inverted index: term -> (document, positions) postings in SQLite.
+
+    Built from the term_matches an analysis already produced, so queries
+    never re-run analyze_document. Postings are keyed by (term, document)
+    and store positions as a packed int32 array plus the first few snippets.
+    Each term's document set is kept in a per-process LRU once read, and a
+    generation counter bumped by every write tells other processes sharing
+    the file to drop theirs.
+    """
+
+    def __init__(self, path=None, postings_cache_entries=4096):
+        self.path = path or os.path.join(tempfile.gettempdir(), 'futuresness-index.sqlite3')
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._postings = LRUCache(max_entries=postings_cache_entries, max_bytes=None, ttl=None, sizeof=len)
+        self._generation = None
+        conn = self._connect()
+        conn.executescript(
+            'CREATE TABLE IF NOT EXISTS documents ('
+            ' id INTEGER PRIMARY KEY, doc_id TEXT UNIQUE NOT NULL, word_count INTEGER NOT NULL);'
+            'CREATE TABLE IF NOT EXISTS terms (id INTEGER PRIMARY KEY, term TEXT UNIQUE NOT NULL);'
+            'CREATE TABLE IF NOT EXISTS postings ('
+            ' term INTEGER NOT NULL, doc INTEGER NOT NULL, frequency INTEGER NOT NULL,'
+            ' positions BLOB NOT NULL, snippets TEXT NOT NULL,'
+            ' PRIMARY KEY (term, doc)) WITHOUT ROWID;'
+            'CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc);'
+            'CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);'
+            "INSERT OR IGNORE INTO meta VALUES ('generation', 0);"
+        )
+
+    def _connect(self):
+        # one connection per thread and process; sqlite handles must not cross either
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def __len__(self):
+        return self._connect().execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+
+    def __contains__(self, doc_id):
+        return self._connect().execute('SELECT 1 FROM documents WHERE doc_id = ?', (doc_id,)).fetchone() is not None
+
+    def add(self, doc_id, term_matches, word_count=0):
+        """Index one analyzed document, replacing any document with that id."""
+        self.add_many([(doc_id, term_matches, word_count)])
+
+    def add_text(self, doc_id, text, analyzer=None):
+        """Analyze ``text`` and index it as ``doc_id``."""
+        analyzer = analyzer or get_analyzer()
+        self.add(doc_id, analyzer.analyze_document(text, snippet_limit=INDEX_SNIPPETS), len(text.split()))
+
+    def add_many(self, documents):
+        """Index (doc_id, term_matches, word_count) triples in one transaction."""
+        conn = self._connect()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            for doc_id, term_matches, word_count in documents:
+                self._delete(conn, doc_id)
+                doc = conn.execute('INSERT INTO documents (doc_id, word_count) VALUES (?, ?)',
+                                   (doc_id, word_count)).lastrowid
+                for match in term_matches:
+                    term_id = self._term_id(conn, match['term'])
+                    conn.execute(
+                        'INSERT INTO postings (term, doc, frequency, positions, snippets) VALUES (?, ?, ?, ?, ?) '
+                        # a term listed under two categories has the same positions twice
+                        'ON CONFLICT (term, doc) DO NOTHING',
+                        (term_id, doc, match['frequency'], array('i', match['positions']).tobytes(),
+                         json.dumps(list(match.get('snippets', [])[:INDEX_SNIPPETS]))))
+            conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'generation'")
+
+    def remove(self, doc_id):
+        """Drop ``doc_id`` from the index; returns False if it was not indexed."""
+        conn = self._connect()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            removed = self._delete(conn, doc_id)
+            conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'generation'")
+        return removed
+
+    @staticmethod
+    def _delete(conn, doc_id):
+        row = conn.execute('SELECT id FROM documents WHERE doc_id = ?', (doc_id,)).fetchone()
+        if row is None:
+            return False
+        conn.execute('DELETE FROM postings WHERE doc = ?', row)
+        conn.execute('DELETE FROM documents WHERE id = ?', row)
+        return True
+
+    @staticmethod
+    def _term_id(conn, term):
+        row = conn.execute('SELECT id FROM terms WHERE term = ?', (term,)).fetchone()
+        if row is not None:
+            return row[0]
+        return conn.execute('INSERT INTO terms (term) VALUES (?)', (term,)).lastrowid
+
+    def _check_generation(self, conn):
+        generation = conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()[0]
+        with self._lock:
+            if generation != self._generation:
+                self._postings.clear()
+                self._generation = generation
+
+    def _documents_with(self, conn, term):
+        # internal ids of the documents containing ``term``
+        docs = self._postings.get(term)
+        if docs is None:
+            docs = frozenset(doc for (doc,) in conn.execute(
+                'SELECT doc FROM postings WHERE term = (SELECT id FROM terms WHERE term = ?)', (term,)))
+            self._postings.set(term, docs)
+        return docs
+
+    def _positions(self, conn, term, docs):
+        # {doc: positions} of ``term`` for the given internal ids
+        found = {}
+        docs = sorted(docs)
+        for start in range(0, len(docs), 500):
+            batch = docs[start:start + 500]
+            rows = conn.execute(
+                f"SELECT doc, positions FROM postings WHERE term = (SELECT id FROM terms WHERE term = ?) "
+                f"AND doc IN ({','.join('?' * len(batch))})", (term, *batch))
+            for doc, blob in rows:
+                positions = array('i')
+                positions.frombytes(blob)
+                found[doc] = positions
+        return found
+
+    def _evaluate(self, conn, node):
+        kind = node[0]
+        if kind == 'term':
+            return self._documents_with(conn, node[1])
+        if kind == 'near':
+            _, a, b, window = node
+            candidates = self._documents_with(conn, a) & self._documents_with(conn, b)
+            if not candidates:
+                return frozenset()
+            positions_a = self._positions(conn, a, candidates)
+            positions_b = self._positions(conn, b, candidates)
+            return frozenset(doc for doc in candidates
+                             if near_hits(positions_a[doc], positions_b[doc], window))
+        if kind == 'or':
+            return frozenset().union(*(self._evaluate(conn, child) for child in node[1]))
+        children = node[1] if kind == 'and' else [node]
+        # AND of the positive parts minus the NOT parts; the full document set
+        # is only read for a query that is all negations
+        positive = [self._evaluate(conn, child) for child in children if child[0] != 'not']
+        negative = [self._evaluate(conn, child[1]) for child in children if child[0] == 'not']
+        if positive:
+            docs = frozenset.intersection(*sorted(positive, key=len))
+        else:
+            docs = self._postings.get(_ALL_DOCUMENTS)
+            if docs is None:
+                docs = frozenset(doc for (doc,) in conn.execute('SELECT id FROM documents'))
+                self._postings.set(_ALL_DOCUMENTS, docs)
+        for excluded in negative:
+            docs = docs - excluded
+        return docs
+
+    def search(self, query, limit=20, offset=0, default_window=100):
+        """Documents matching ``query`` (see parse_query), in indexing order.
+
+        Returns {'total': n, 'documents': [...]} where each document lists,
+        for every term the query asks for, its frequency and stored snippets.
+        """
+        node = parse_query(query, default_window) if isinstance(query, str) else query
+        conn = self._connect()
+        self._check_generation(conn)
+        docs = self._evaluate(conn, node)
+        page = heapq.nsmallest(offset + limit, docs)[offset:]
+        terms = list(dict.fromkeys(_query_terms(node)))
+        details = {doc: {'doc_id': None, 'word_count': 0, 'terms': {}} for doc in page}
+        if page:
+            marks = ','.join('?' * len(page))
+            for doc, doc_id, word_count in conn.execute(
+                    f'SELECT id, doc_id, word_count FROM documents WHERE id IN ({marks})', page):
+                details[doc].update(doc_id=doc_id, word_count=word_count)
+            if terms:
+                rows = conn.execute(
+                    f"SELECT t.term, p.doc, p.frequency, p.snippets FROM postings p JOIN terms t ON t.id = p.term "
+                    f"WHERE t.term IN ({','.join('?' * len(terms))}) AND p.doc IN ({marks})", (*terms, *page))
+                for term, doc, frequency, snippets in rows:
+                    details[doc]['terms'][term] = {'frequency': frequency, 'snippets': json.loads(snippets)}
+        return {'total': len(docs), 'documents': [details[doc] for doc in page]}
+
+    def stats(self):
+        conn = self._connect()
+        documents = conn.execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+        postings = conn.execute('SELECT COUNT(*) FROM postings').fetchone()[0]
+        return {
+            'path': self.path,
+            'documents': documents,
+            'postings': postings,
+            'cached_terms': len(self._postings),
+        }
@@ -0,0 +1,413 @@
+import concurrent.futures
+import json
+import os
+import secrets
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from futures_cache import estimate_size
+from futures_metrics import StageTimer
+
+JOB_STATUSES = ('queued', 'running', 'succeeded', 'failed')
+FINISHED_STATUSES = ('succeeded', 'failed')
+
+# Progress reported when each parsing or analysis stage starts; stages run in this order
+STAGE_PROGRESS = {
+    'decode': 0.05, 'pdf_extract': 0.05, 'pdf_join': 0.3, 'docx_extract': 0.05, 'docx_join': 0.3,
+    'cache_lookup': 0.35, 'match': 0.4, 'term_matches': 0.6, 'statistics': 0.65,
+    'co_occurrence': 0.75, 'clustering': 0.9, 'csv': 0.93, 'wordcloud': 0.95,
+}
+
+
+class JobQueueFull(Exception):
+    """Raised when every job worker is busy and the wait queue is full."""
+
+
+def new_job(job_id=None, **fields):
+    """A job record in the 'queued' state; extra ``fields`` (e.g. a name) are kept as given."""
+    now = time.time()
+    job = {
+        'id': job_id or secrets.token_hex(16),
+        'status': 'queued',
+        'stage': None,
+        'progress': 0.0,
+        'created_at': now,
+        'started_at': None,
+        'finished_at': None,
+        'error': None,
+        'result': None,
+    }
+    job.update(fields)
+    return job
+
+
+class JobStore:
+    """Interface shared by the job stores.
+
+    Jobs are plain dicts (see new_job). A job expires ``retention`` seconds
+    after its last update, so finished jobs are kept for that long and jobs
+    abandoned by a worker that died eventually disappear too.
+    """
+
+    def create(self, job):
+        raise NotImplementedError
+
+    def get(self, job_id):
+        raise NotImplementedError
+
+    def update(self, job_id, **fields):
+        raise NotImplementedError
+
+    def delete(self, job_id):
+        raise NotImplementedError
+
+    def purge(self):
+        raise NotImplementedError
+
+    def stats(self):
+        raise NotImplementedError
+
+
+class MemoryJobStore(JobStore):
+    """Jobs in a per-process dict, bounded by ``max_jobs`` and ``max_bytes``.
+
+    Finished jobs carry their whole result, so the estimated size of every
+    record counts against ``max_bytes``, as in the result cache. Over
+    either limit the oldest finished jobs are dropped first; jobs still
+    queued or running, and the job just written, are never dropped for
+    space. A result larger than ``max_bytes`` on its own is not kept: its
+    job is stored as failed with the error 'result too large'.
+    """
+
+    def __init__(self, retention=60 * 60, max_jobs=1000, max_bytes=128 * 1024 * 1024, sizeof=estimate_size):
+        self.retention = retention
+        self.max_jobs = max_jobs
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._jobs = OrderedDict()  # id -> (expires_at, size, job)
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    def _expiry(self):
+        return time.time() + self.retention if self.retention else None
+
+    def _store(self, job):
+        # caller holds the lock
+        size = self.sizeof(job)
+        if self.max_bytes is not None and size > self.max_bytes and job['result'] is not None:
+            # keep the record, so a poll learns why, but not the result
+            job = dict(job, status='failed', result=None, error='result too large')
+            size = self.sizeof(job)
+        old = self._jobs.pop(job['id'], None)
+        if old is not None:
+            self.bytes -= old[1]
+        self._jobs[job['id']] = (self._expiry(), size, job)
+        self.bytes += size
+        if len(self._jobs) > self.max_jobs or (self.max_bytes is not None and self.bytes > self.max_bytes):
+            for job_id in [job_id for job_id, (_, _, j) in self._jobs.items()
+                           if j['status'] in FINISHED_STATUSES and job_id != job['id']]:
+                if len(self._jobs) <= self.max_jobs and (self.max_bytes is None or self.bytes <= self.max_bytes):
+                    break
+                self.bytes -= self._jobs.pop(job_id)[1]
+                self.evictions += 1
+
+    def create(self, job):
+        self.purge()
+        with self._lock:
+            self._store(dict(job))
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            entry = self._jobs.get(job_id)
+            if entry is None:
+                return None
+            expires_at, size, job = entry
+            if expires_at is not None and time.time() > expires_at:
+                del self._jobs[job_id]
+                self.bytes -= size
+                self.expirations += 1
+                return None
+            return dict(job)
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            entry = self._jobs.get(job_id)
+            if entry is None:
+                return False
+            self._store(dict(entry[2], **fields))
+            return True
+
+    def delete(self, job_id):
+        with self._lock:
+            entry = self._jobs.pop(job_id, None)
+            if entry is not None:
+                self.bytes -= entry[1]
+            return entry is not None
+
+    def purge(self):
+        """Drop expired jobs; returns how many."""
+        now = time.time()
+        with self._lock:
+            expired = [job_id for job_id, (expires_at, _, _) in self._jobs.items()
+                       if expires_at is not None and now > expires_at]
+            for job_id in expired:
+                self.bytes -= self._jobs.pop(job_id)[1]
+            self.expirations += len(expired)
+        return len(expired)
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def stats(self):
+        with self._lock:
+            by_status = dict.fromkeys(JOB_STATUSES, 0)
+            for _, _, job in self._jobs.values():
+                by_status[job['status']] += 1
+            return {
+                'backend': 'memory',
+                'jobs': len(self._jobs),
+                'by_status': by_status,
+                'bytes': self.bytes,
+                'max_jobs': self.max_jobs,
+                'max_bytes': self.max_bytes,
+                'retention_seconds': self.retention,
+                'expirations': self.expirations,
+                'evictions': self.evictions,
+            }
+
+
+class SQLiteJobStore(JobStore):
+    """Jobs stored in a local SQLite file.
+
+    Every worker process pointing at the same path sees the same jobs, so a
+    poll can be answered by a different process than the one running the
+    job, and finished results survive restarts. Records are stored as
+    zlib-compressed JSON.
+    """
+
+    def __init__(self, path=None, retention=60 * 60, compress_level=6):
+        self.path = path or os.path.join(tempfile.gettempdir(), 'futuresness-jobs.sqlite3')
+        self.retention = retention
+        self.compress_level = compress_level
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.expirations = 0
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS jobs ('
+                ' id TEXT PRIMARY KEY, status TEXT NOT NULL, record BLOB NOT NULL, expires_at REAL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS jobs_expires ON jobs (expires_at)')
+
+    def _connect(self):
+        # one connection per thread and process; sqlite handles must not cross either
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _expiry(self):
+        return time.time() + self.retention if self.retention else None
+
+    def _encode(self, job):
+        return zlib.compress(json.dumps(job, separators=(',', ':')).encode('utf-8'), self.compress_level)
+
+    def create(self, job):
+        self.purge()
+        self._connect().execute('INSERT OR REPLACE INTO jobs (id, status, record, expires_at) VALUES (?, ?, ?, ?)',
+                                (job['id'], job['status'], self._encode(job), self._expiry()))
+        return job
+
+    def get(self, job_id):
+        conn = self._connect()
+        row = conn.execute('SELECT record, expires_at FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        blob, expires_at = row
+        if expires_at is not None and time.time() > expires_at:
+            conn.execute('DELETE FROM jobs WHERE id = ?', (job_id,))
+            with self._lock:
+                self.expirations += 1
+            return None
+        return json.loads(zlib.decompress(blob))
+
+    def update(self, job_id, **fields):
+        # only the worker running a job writes to it, so read-modify-write is safe
+        job = self.get(job_id)
+        if job is None:
+            return False
+        job.update(fields)
+        self._connect().execute('UPDATE jobs SET status = ?, record = ?, expires_at = ? WHERE id = ?',
+                                (job['status'], self._encode(job), self._expiry(), job_id))
+        return True
+
+    def delete(self, job_id):
+        return self._connect().execute('DELETE FROM jobs WHERE id = ?', (job_id,)).rowcount > 0
+
+    def purge(self):
+        """Delete expired jobs; returns how many."""
+        deleted = self._connect().execute('DELETE FROM jobs WHERE expires_at < ?', (time.time(),)).rowcount
+        with self._lock:
+            self.expirations += deleted
+        return deleted
+
+    def __len__(self):
+        return self._connect().execute('SELECT COUNT(*) FROM jobs').fetchone()[0]
+
+    def stats(self):
+        rows = self._connect().execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall()
+        by_status = dict.fromkeys(JOB_STATUSES, 0)
+        by_status.update(rows)
+        with self._lock:
+            return {
+                'backend': 'sqlite',
+                'path': self.path,
+                'jobs': sum(by_status.values()),
+                'by_status': by_status,
+                'retention_seconds': self.retention,
+                'expirations': self.expirations,
+            }
+
+
+JOB_STORES = {
+    'memory': MemoryJobStore,
+    'sqlite': SQLiteJobStore,
+}
+
+
+def make_job_store(kind='memory', **options):
+    """Create a job store by name ('memory' or 'sqlite')."""
+    if kind not in JOB_STORES:
+        raise ValueError(f"Unknown job store {kind!r}; expected one of {sorted(JOB_STORES)}")
+    return JOB_STORES[kind](**options)
+
+
+class JobProgress(StageTimer):
+    """A StageTimer that also writes each stage and its progress to the job's record.
+
+    Pass it as ``timer=`` to the parsing and analysis functions; the stages
+    they already time become the job's progress (see STAGE_PROGRESS).
+    ``annotate`` adds other fields to the record.
+    """
+    __slots__ = ('job_id', 'store', 'progress')
+
+    def __init__(self, job_id, store):
+        super().__init__()
+        self.job_id = job_id
+        self.store = store
+        self.progress = 0.0
+
+    @contextmanager
+    def stage(self, name):
+        # progress never goes backwards, e.g. when a stage repeats
+        self.progress = max(self.progress, STAGE_PROGRESS.get(name, self.progress))
+        self.store.update(self.job_id, stage=name, progress=self.progress)
+        with StageTimer.stage(self, name):
+            yield
+
+    def annotate(self, **fields):
+        self.store.update(self.job_id, **fields)
+
+
+class JobRunner:
+    """Run jobs on a local thread pool and record their status in a JobStore.
+
+    ``submit(fn, ...)`` stores a queued job and returns it at once; a worker
+    later calls ``fn(*args, timer=JobProgress, **kwargs)`` and stores its
+    return value as the job's ``result``, or the exception text as its
+    ``error`` (also when the store cannot take the result). At most ``max_workers`` jobs run and ``max_queue`` more wait;
+    beyond that submit raises JobQueueFull.
+    """
+
+    def __init__(self, store, max_workers=2, max_queue=32):
+        self.store = store
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.rejected = 0
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = concurrent.futures.ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix='futuresness-job')
+        return self._executor
+
+    def submit(self, fn, *args, job_fields=None, **kwargs):
+        """Queue ``fn`` and return its job record; ``job_fields`` are stored with the job."""
+        with self._lock:
+            if self.in_flight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise JobQueueFull(f"{self.in_flight} jobs in flight")
+            self.in_flight += 1
+        try:
+            job = self.store.create(new_job(**(job_fields or {})))
+            self.executor.submit(self._run, job['id'], fn, args, kwargs)
+        except Exception:
+            with self._lock:
+                self.in_flight -= 1
+            raise
+        return job
+
+    def _run(self, job_id, fn, args, kwargs):
+        timer = JobProgress(job_id, self.store)
+        counter = 'failed'
+        try:
+            self.store.update(job_id, status='running', started_at=time.time())
+            try:
+                result = fn(*args, timer=timer, **kwargs)
+            except Exception as exc:
+                self._fail(job_id, timer, str(exc) or type(exc).__name__)
+                return
+            try:
+                self.store.update(job_id, status='succeeded', progress=1.0, stage=None, result=result,
+                                  finished_at=time.time(), timings=timer.as_dict())
+            except Exception as exc:
+                # e.g. a result the store cannot serialize
+                self._fail(job_id, timer, f"could not store result: {exc}")
+                return
+            counter = 'succeeded'
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                setattr(self, counter, getattr(self, counter) + 1)
+
+    def _fail(self, job_id, timer, error):
+        self.store.update(job_id, status='failed', error=error, result=None,
+                          finished_at=time.time(), timings=timer.as_dict())
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'in_flight': self.in_flight,
+                'succeeded': self.succeeded,
+                'failed': self.failed,
+                'rejected': self.rejected,
+            }
+        stats['store'] = self.store.stats()
+        return stats
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+import re
+import threading
+
+VOCABULARY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'vocabularies')
+DEFAULT_VOCABULARY = 'futures'
+VOCABULARY_EXTENSIONS = ('.json', '.yaml', '.yml')
+
+
+def vocabulary_hash(vocabulary_dict):
+    """Return a stable SHA-256 hex digest for a vocabulary dict.
+
+    Category order is kept (it decides the order of term_matches), so two
+    vocabularies only share a hash when they produce identical output.
+    """
+    payload = json.dumps(vocabulary_dict, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def validate_vocabulary(categories):
+    """Return ``categories`` as a clean {category: [term, ...]} dict, or raise ValueError."""
+    if not isinstance(categories, dict) or not categories:
+        raise ValueError("A vocabulary must map category names to lists of terms")
+    clean = {}
+    for category, terms in categories.items():
+        if not isinstance(category, str) or not category.strip():
+            raise ValueError("Category names must be non-empty strings")
+        if not isinstance(terms, list) or not all(isinstance(t, str) and t.strip() for t in terms):
+            raise ValueError(f"Category {category!r} must be a list of non-empty strings")
+        clean[category] = [' '.join(t.split()) for t in terms]
+    return clean
+
+
+def _version_key(version):
+    # '1.10.0' sorts after '1.9.0'; non-numeric parts compare as text
+    return [(0, int(part), '') if part.isdigit() else (1, 0, part) for part in re.split(r'[.\-+]', version)]
+
+
+class Vocabulary:
+    """A named, versioned vocabulary loaded from a file."""
+    __slots__ = ('name', 'version', 'description', 'categories', 'hash', 'path')
+
+    def __init__(self, name, version, categories, description='', path=None):
+        self.name = name
+        self.version = version
+        self.description = description
+        self.categories = validate_vocabulary(categories)
+        self.hash = vocabulary_hash(self.categories)
+        self.path = path
+
+    @property
+    def key(self):
+        return f"{self.name}@{self.version}"
+
+    def describe(self):
+        return {
+            'name': self.name,
+            'version': self.version,
+            'description': self.description,
+            'hash': self.hash,
+            'categories': len(self.categories),
+            'terms': sum(len(terms) for terms in self.categories.values()),
+        }
+
+
+def load_vocabulary_file(path):
+    """Load a Vocabulary from a JSON or YAML file.
+
+    The file holds ``name``, ``version``, an optional ``description`` and
+    ``categories`` ({category: [terms]}). The name defaults to the file name.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, encoding='utf-8') as fh:
+        if extension == '.json':
+            data = json.load(fh)
+        elif extension in ('.yaml', '.yml'):
+            try:
+                # only YAML vocabularies need PyYAML, so it is not imported up front
+                import yaml
+            except ImportError:
+                raise ValueError(f"{path}: install PyYAML to load YAML vocabularies")
+            data = yaml.safe_load(fh)
+        else:
+            raise ValueError(f"{path}: unsupported vocabulary file type {extension!r}")
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: expected a mapping at the top level")
+    name = str(data.get('name') or os.path.splitext(os.path.basename(path))[0])
+    try:
+        return Vocabulary(name, str(data.get('version', '0')), data.get('categories'),
+                          description=data.get('description', ''), path=path)
+    except ValueError as exc:
+        raise ValueError(f"{path}: {exc}")
+
+
+class VocabularyStore:
+    """Every vocabulary file in a directory, selectable by ``name`` or ``name@version``.
+
+    reload() re-reads the directory and swaps the new set in at once, so
+    requests in flight keep the vocabulary they resolved. A file that fails
+    to load is reported and skipped; the rest still load.
+    """
+
+    def __init__(self, directory=None, default=DEFAULT_VOCABULARY):
+        self.directory = directory or VOCABULARY_DIR
+        self.default = default
+        self._lock = threading.Lock()
+        self._versions = {}  # name -> {version: Vocabulary}
+        self.errors = {}
+        self.reload()
+
+    def reload(self):
+        """Re-read the directory; returns the loaded keys and any per-file errors."""
+        versions = {}
+        errors = {}
+        for filename in sorted(os.listdir(self.directory)):
+            if not filename.lower().endswith(VOCABULARY_EXTENSIONS):
+                continue
+            try:
+                vocabulary = load_vocabulary_file(os.path.join(self.directory, filename))
+            except (OSError, ValueError) as exc:
+                errors[filename] = str(exc)
+                continue
+            versions.setdefault(vocabulary.name, {})[vocabulary.version] = vocabulary
+        with self._lock:
+            self._versions = versions
+            self.errors = errors
+        return {'loaded': sorted(v.key for by_version in versions.values() for v in by_version.values()),
+                'errors': errors}
+
+    def get(self, name=None):
+        """Resolve ``name`` or ``name@version`` (latest version by default); raises KeyError."""
+        name = name or self.default
+        name, _, version = name.partition('@')
+        with self._lock:
+            by_version = self._versions.get(name)
+        if not by_version:
+            raise KeyError(f"Unknown vocabulary {name!r}")
+        if version:
+            if version not in by_version:
+                raise KeyError(f"Unknown version {version!r} of vocabulary {name!r}")
+            return by_version[version]
+        return by_version[max(by_version, key=_version_key)]
+
+    def list(self):
+        with self._lock:
+            versions = self._versions
+        return [v.describe() for name in sorted(versions)
+                for v in sorted(versions[name].values(), key=lambda v: _version_key(v.version))]
@@ -1,5 +1,12 @@
+import concurrent.futures
+import json
+
 import pytest
-from futures_analyzer import FuturesVocabularyAnalyzer, read_file_content_bytes, results_with_wordcloud
+from futures_analyzer import (shape_result, split_result_sections, shape_sections, FuturesVocabularyAnalyzer,
+                              get_analyzer, vocabulary_hash, read_file_content_bytes, results_with_wordcloud,
+                              analyze_many, StreamingDocumentAnalyzer, iter_text_chunks, extract_pdf_pages,
+                              join_pages, analyze_pdf, analyze_path, LazySnippets, TermMatchTable,
+                              compute_clusters_from_coocc)
 
 
 def test_analyze_simple_text():
@@ -30,4 +37,240 @@ def test_cooccurrence_window():
     assert res_small['co_occurrences'] == [] or len(res_small['co_occurrences']) == 0
     # larger window should detect at least one pair
     res_large = results_with_wordcloud(analyzer, text, include_wordcloud=False, cooccurrence_window=200)
-    assert isinstance(res_large['co_occurrences'], list)
\ No newline at end of file
+    assert isinstance(res_large['co_occurrences'], list)
+
+
+def test_matchers_agree():
+    text = open('sample_document.txt', encoding='utf-8').read()
+    text += " Delphi-method, delphi_method, FUTURES. futures-wheel; a futures wheel futures"
+    automaton = FuturesVocabularyAnalyzer(matcher='aho-corasick')
+    regex = FuturesVocabularyAnalyzer(matcher='regex')
+    assert automaton.analyze_document(text) == regex.analyze_document(text)
+
+
+def test_unknown_matcher_rejected():
+    with pytest.raises(ValueError):
+        FuturesVocabularyAnalyzer(matcher='nope')
+
+
+def test_get_analyzer_is_shared_per_vocabulary():
+    assert get_analyzer() is get_analyzer()
+    custom = {"Custom": ["backcasting"]}
+    analyzer = get_analyzer(custom)
+    assert analyzer is get_analyzer({"Custom": ["backcasting"]})
+    assert analyzer is not get_analyzer()
+    assert analyzer.vocabulary_hash == vocabulary_hash(custom)
+
+
+def test_get_analyzer_compiles_outside_the_registry_lock(monkeypatch):
+    import threading
+    import time
+    import futures_analyzer
+    started, release = threading.Event(), threading.Event()
+
+    class SlowAnalyzer(FuturesVocabularyAnalyzer):
+        def __init__(self, vocabulary_dict=None, matcher='aho-corasick'):
+            if 'Slow' in (vocabulary_dict or {}):
+                started.set()
+                release.wait(5)
+            super().__init__(vocabulary_dict, matcher)
+
+    monkeypatch.setattr(futures_analyzer, 'FuturesVocabularyAnalyzer', SlowAnalyzer)
+    slow = {'Slow': ['slow compile term']}
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(get_analyzer(slow))) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    assert started.wait(5)
+    compiles = futures_analyzer.analyzer_registry_stats()['compiles']
+    # other vocabularies are served while the slow one compiles
+    looked_up = time.perf_counter()
+    assert get_analyzer() is get_analyzer()
+    assert time.perf_counter() - looked_up < 1
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(results) == 2 and results[0] is results[1]
+    assert futures_analyzer.analyzer_registry_stats()['compiles'] == compiles + 1
+
+
+def test_cooccurrence_matches_pairwise_definition():
+    analyzer = FuturesVocabularyAnalyzer()
+    term_matches = analyzer.analyze_document(open('sample_document.txt', encoding='utf-8').read())
+    expected = {}
+    for i, m1 in enumerate(term_matches):
+        for m2 in term_matches[i + 1:]:
+            count = sum(1 for p1 in m1['positions'] if any(abs(p1 - p2) <= 100 for p2 in m2['positions']))
+            if count:
+                pair = tuple(sorted([m1['term'], m2['term']]))
+                expected[pair] = expected.get(pair, 0) + count
+    assert analyzer.co_occurrence_matrix(term_matches, window=100) == expected
+    everything = analyzer.analyze_co_occurrence(term_matches, window=100, top_k=None)
+    assert len(everything) == len(expected)
+    assert analyzer.analyze_co_occurrence(term_matches, window=100) == everything[:20]
+
+
+def test_snippet_limit_keeps_counts_and_lazy_snippets_match():
+    analyzer = FuturesVocabularyAnalyzer()
+    text = "scenario planning, " * 10 + "then horizon scanning and more scenario planning."
+    full = analyzer.analyze_document(text)
+    limited = analyzer.analyze_document(text, snippet_limit=2)
+    lazy = analyzer.analyze_document(text, lazy_snippets=True)
+    for f, l, z in zip(full, limited, lazy):
+        assert (l['frequency'], l['positions']) == (f['frequency'], f['positions'])
+        assert l['snippets'] == f['snippets'][:2]
+        assert isinstance(z['snippets'], LazySnippets)
+        assert z['snippets'] == f['snippets']
+
+
+@pytest.mark.parametrize('use_numpy', [True, False])
+def test_match_table_agrees_with_match_dicts(monkeypatch, use_numpy):
+    import futures_analyzer
+    monkeypatch.setattr(futures_analyzer, 'NUMPY_MIN_POSITIONS', 0)
+    if not use_numpy:
+        monkeypatch.setattr(futures_analyzer, 'np', None)
+    analyzer = FuturesVocabularyAnalyzer()
+    text = open('sample_document.txt', encoding='utf-8').read()
+    dicts = analyzer.analyze_document(text)
+    table = analyzer.match_table(text)
+    assert isinstance(table, TermMatchTable)
+    assert table.to_dicts() == dicts
+    assert analyzer.calculate_statistics(table, text) == analyzer.calculate_statistics(dicts, text)
+    for window in (0, 30, 100, 1000):
+        assert list(analyzer.co_occurrence_matrix(table, window).items()) == \
+            list(analyzer.co_occurrence_matrix(dicts, window).items())
+
+
+@pytest.mark.parametrize('use_numpy', [True, False])
+def test_cooccurrence_matrices_match_each_window(monkeypatch, use_numpy):
+    import futures_analyzer
+    monkeypatch.setattr(futures_analyzer, 'NUMPY_MIN_POSITIONS', 0)
+    if not use_numpy:
+        monkeypatch.setattr(futures_analyzer, 'np', None)
+    analyzer = FuturesVocabularyAnalyzer()
+    text = open('sample_document.txt', encoding='utf-8').read()
+    table = analyzer.match_table(text)
+    windows = [0, 25, 100, 400]
+    matrices = analyzer.co_occurrence_matrices(table, windows)
+    for window in windows:
+        assert matrices[window].ranked(20) == analyzer.analyze_co_occurrence(table, window=window)
+
+
+def test_clusters_are_connected_components():
+    coocc = [(('a', 'b'), 5), (('c', 'd'), 4), (('b', 'e'), 3), (('f', 'd'), 1)]
+    term2cluster, clusters = compute_clusters_from_coocc(coocc)
+    assert clusters == [['a', 'b', 'e'], ['c', 'd', 'f']]
+    assert term2cluster == {'a': 0, 'b': 0, 'e': 0, 'c': 1, 'd': 1, 'f': 1}
+    assert compute_clusters_from_coocc([{'pair': ['a', 'b'], 'count': 1}]) == ({'a': 0, 'b': 0}, [['a', 'b']])
+
+
+def test_clusters_list_terms_in_depth_first_order():
+    coocc = [(('a', 'b'), 5), (('b', 'c'), 4), (('c', 'd'), 3), (('b', 'e'), 2)]
+    term2cluster, clusters = compute_clusters_from_coocc(coocc)
+    assert clusters == [['a', 'b', 'e', 'c', 'd']]
+    assert set(term2cluster.values()) == {0}
+
+
+def test_analyze_many_matches_single_analysis():
+    texts = ["scenario planning and backcasting", "horizon scanning", "futures futures"]
+    expected = [results_with_wordcloud(get_analyzer(), t, include_wordcloud=False)['word_frequencies'] for t in texts]
+    ordered = list(analyze_many(texts, max_workers=2))
+    assert [i for i, _ in ordered] == [0, 1, 2]
+    assert [r['word_frequencies'] for _, r in ordered] == expected
+    unordered = dict(analyze_many(texts, max_workers=2, ordered=False))
+    assert [unordered[i]['word_frequencies'] for i in range(3)] == expected
+
+
+def test_timings_cover_each_stage():
+    result = results_with_wordcloud(get_analyzer(), "Scenario planning and backcasting.", include_wordcloud=False, timings=True)
+    assert {'match', 'statistics', 'co_occurrence', 'clustering', 'csv', 'total'} <= set(result['timings'])
+    assert 'timings' not in results_with_wordcloud(get_analyzer(), "Backcasting.", include_wordcloud=False)
+
+
+def test_response_modes_reference_top_terms_and_drop_positions():
+    text = open('sample_document.txt', encoding='utf-8').read()
+    result = results_with_wordcloud(get_analyzer(), text, include_wordcloud=False)
+    compact = shape_result(result, 'compact')
+    assert 'csv' not in compact and 'top_terms' not in compact['statistics']
+    assert [compact['term_matches'][i] for i in compact['top_term_indices']] == result['statistics']['top_terms']
+    summary = shape_result(result, 'summary', include_csv=True)
+    assert summary['csv'] == result['csv']
+    assert summary['term_matches'][0] == {k: result['term_matches'][0][k] for k in ('term', 'category', 'frequency')}
+    streamed = {}
+    for _, partial in shape_sections(split_result_sections(result), 'summary', include_csv=True):
+        streamed.update(partial)
+    assert streamed == summary
+    assert shape_result(result, 'full') is result
+
+
+def test_streaming_analyzer_handles_chunk_boundaries():
+    analyzer = get_analyzer()
+    text = open('sample_document.txt', encoding='utf-8').read()
+    expected = analyzer.analyze_document(text)
+    for size in (7, 64, 1000):
+        stream = StreamingDocumentAnalyzer(analyzer)
+        for i in range(0, len(text), size):
+            stream.feed(text[i:i + size])
+        assert stream.close() == expected
+        assert stream.word_count == len(text.split())
+
+
+def test_iter_text_chunks_keeps_multibyte_characters():
+    import io
+    raw = 'Zukunftsforschung für Szenarien – futures'.encode('utf-8')
+    chunks = list(iter_text_chunks(io.BytesIO(raw), chunk_size=3))
+    assert ''.join(chunks) == raw.decode('utf-8')
+
+
+def test_read_file_content_bytes_extracts_large_pdfs_serially(monkeypatch):
+    from tests.pdf_helpers import make_pdf
+
+    def no_pool(*args, **kwargs):
+        raise AssertionError("no process pool expected")
+    monkeypatch.setattr(concurrent.futures, 'ProcessPoolExecutor', no_pool)
+    pages = [f'Page {i} mentions backcasting. ' for i in range(70)]
+    assert read_file_content_bytes(make_pdf(pages), 'long.pdf').count('backcasting') == 70
+
+
+def test_pdf_pages_are_extracted_in_order_and_reported():
+    from tests.pdf_helpers import make_pdf
+    pages = ['Scenario planning on page one. ', 'Nothing here. ', 'Backcasting and scenario planning. ']
+    pdf = make_pdf(pages)
+    serial = extract_pdf_pages(pdf, max_workers=1)
+    assert extract_pdf_pages(pdf) == serial
+    assert extract_pdf_pages(pdf, max_workers=2, parallel_min_pages=1) == serial
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as pool:
+        assert extract_pdf_pages(pdf, max_workers=2, parallel_min_pages=1, executor=pool) == serial
+    text, offsets = join_pages(serial)
+    assert read_file_content_bytes(pdf, 'report.pdf') == text
+    result = analyze_pdf(pdf)
+    assert result['page_count'] == 3
+    matches = {m['term']: m for m in result['term_matches']}
+    assert matches['scenario planning']['pages'] == [1, 3]
+    assert matches['backcasting']['pages'] == [3]
+    assert matches['scenario planning']['positions'] == [p for p in (text.lower().find('scenario planning'), text.lower().rfind('scenario planning'))]
+
+
+def test_analyze_path_matches_text_analysis(tmp_path):
+    # ASCII only: for other text, offsets and snippet context count bytes
+    text = open('sample_document.txt', encoding='utf-8').read().encode('ascii', 'ignore').decode('ascii')
+    path = tmp_path / 'dump.txt'
+    path.write_text(text, encoding='utf-8')
+    expected = results_with_wordcloud(get_analyzer(), text, include_wordcloud=False)
+    result = analyze_path(str(path))
+    assert result['word_frequencies'] == expected['word_frequencies']
+    assert result['statistics']['word_count'] == expected['statistics']['word_count']
+    got = {m['term']: m for m in result['term_matches']}
+    for match in expected['term_matches']:
+        assert got[match['term']]['snippets'][:2] == match['snippets'][:2]
+    assert result['csv'] == expected['csv']
+
+
+def test_analyze_path_result_is_json_serializable(tmp_path):
+    path = tmp_path / 'dump.txt'
+    path.write_text('Scenario planning and foresight. ' * 5, encoding='utf-8')
+    result = analyze_path(str(path), snippet_limit=2)
+    decoded = json.loads(json.dumps(result))
+    matches = {m['term']: m for m in decoded['term_matches']}
+    assert matches['scenario planning']['frequency'] == 5
+    assert len(matches['scenario planning']['snippets']) == 2
@@ -21,4 +21,266 @@ def test_analyze_endpoint_large_text_rejected():
     # generate very large text
     big = 'word ' * 300000  # ~1.2M chars
     resp = client.post('/analyze', data={'text': big})
-    assert resp.status_code == 413 or resp.status_code == 400
\ No newline at end of file
+    assert resp.status_code == 413 or resp.status_code == 400
+
+
+def test_analyze_endpoint_cooccurrence_top_k():
+    text = open('sample_document.txt', encoding='utf-8').read()
+    capped = client.post('/analyze', data={'text': text, 'cooccurrence_top_k': '5'}).json()
+    uncapped = client.post('/analyze', data={'text': text, 'cooccurrence_top_k': '0'}).json()
+    assert len(capped['co_occurrences']) == 5
+    assert len(uncapped['co_occurrences']) > 20
+
+
+def test_analyze_endpoint_snippet_limit():
+    text = open('sample_document.txt', encoding='utf-8').read()
+    full = client.post('/analyze', data={'text': text}).json()
+    limited = client.post('/analyze', data={'text': text, 'snippet_limit': '1'}).json()
+    assert [m['frequency'] for m in limited['term_matches']] == [m['frequency'] for m in full['term_matches']]
+    assert all(len(m['snippets']) <= 1 for m in limited['term_matches'])
+    assert any(len(m['snippets']) > 1 for m in full['term_matches'])
+
+
+def test_analyze_endpoint_cooccurrence_windows():
+    text = open('sample_document.txt', encoding='utf-8').read()
+    data = client.post('/analyze', data={'text': text, 'cooccurrence_windows': '50, 200'}).json()
+    assert sorted(data['co_occurrences_by_window']) == ['200', '50']
+    single = client.post('/analyze', data={'text': text, 'cooccurrence_window': '200'}).json()
+    assert data['co_occurrences_by_window']['200'] == single['co_occurrences']
+    assert client.post('/analyze', data={'text': text, 'cooccurrence_windows': 'wide'}).status_code == 400
+
+
+def test_analyze_batch_endpoint():
+    texts = ["Backcasting and visioning workshops.", "Horizon scanning for weak signals."]
+    files = [('files', ('report.txt', b'Scenario planning with stakeholders.', 'text/plain'))]
+    resp = client.post('/analyze/batch', data={'texts': texts}, files=files)
+    assert resp.status_code == 200
+    documents = resp.json()['documents']
+    assert [d['index'] for d in documents] == [0, 1, 2]
+    assert documents[2]['name'] == 'report.txt'
+    assert 'backcasting' in documents[0]['result']['word_frequencies']
+    assert 'scenario planning' in documents[2]['result']['word_frequencies']
+
+
+def test_analyze_batch_runs_on_the_bounded_executor(monkeypatch):
+    import api.main as main
+    executor = main.BoundedExecutor(max_workers=1, max_queue=0)
+    monkeypatch.setattr(main, 'ANALYSIS_EXECUTOR', executor)
+    texts = [f"Batch {i}: backcasting and horizon scanning." for i in range(3)]
+    resp = client.post('/analyze/batch', data={'texts': texts, 'ordered': 'false'})
+    assert resp.status_code == 200
+    assert sorted(d['index'] for d in resp.json()['documents']) == [0, 1, 2]
+    assert executor.stats()['completed'] == 3
+    executor.in_flight = 1  # busy with another request
+    resp = client.post('/analyze/batch', data={'texts': ['Busy: scenario planning.']})
+    assert resp.status_code == 503 and resp.headers['Retry-After'] == '1'
+    executor.shutdown()
+
+
+def test_stats_endpoint_reports_executor_timings():
+    client.post('/analyze', data={'text': 'Backcasting for preferred futures.'})
+    executor = client.get('/stats').json()['executor']
+    assert executor['completed'] >= 1
+    assert 'queue_wait' in executor and 'compute' in executor
+
+
+def test_analyze_timings_and_metrics_endpoint():
+    files = {'file': ('timed.txt', b'Timed backcasting and scenario planning.', 'text/plain')}
+    data = client.post('/analyze', data={'timings': 'true'}, files=files).json()
+    assert {'decode', 'cache_lookup', 'match', 'co_occurrence', 'csv', 'total'} <= set(data['timings'])
+    cached = client.post('/analyze', data={'text': 'Timed backcasting and scenario planning.'}).json()
+    assert cached['_cached'] is True and 'timings' not in cached
+    resp = client.get('/metrics')
+    assert resp.status_code == 200
+    assert resp.headers['content-type'].startswith('text/plain')
+    assert 'futuresness_stage_seconds_count{stage="match"}' in resp.text
+    assert 'futuresness_requests_total{route="/analyze",status="200"}' in resp.text
+    assert 'futuresness_cache_hit_ratio{cache="result"}' in resp.text
+    assert 'futuresness_document_characters_bucket' in resp.text
+
+
+def test_wordcloud_endpoint_renders_once_and_revalidates(monkeypatch):
+    import api.main as main
+    rendered = []
+
+    def fake_render(frequencies, width, height, image_format):
+        rendered.append((width, height, image_format))
+        return f"{image_format}:{width}x{height}:{sorted(frequencies)}".encode()
+
+    monkeypatch.setattr(main, 'render_wordcloud', fake_render)
+    resp = client.post('/analyze', data={'text': 'Wordcloud of backcasting and scenario planning.'})
+    key = resp.headers['X-Result-Key']
+    image = client.get(f'/wordcloud/{key}', params={'width': 400})
+    assert image.status_code == 200
+    assert image.headers['content-type'] == 'image/png'
+    assert image.content.startswith(b'png:400x200:')
+    assert 'max-age' in image.headers['cache-control']
+    assert client.get(f'/wordcloud/{key}', params={'width': 400}).content == image.content
+    assert client.get(f'/wordcloud/{key}', params={'width': 400},
+                      headers={'If-None-Match': image.headers['etag']}).status_code == 304
+    webp = client.get(f'/wordcloud/{key}', params={'format': 'webp', 'width': 400})
+    assert webp.headers['content-type'] == 'image/webp'
+    assert webp.headers['etag'] != image.headers['etag']
+    assert rendered == [(400, 200, 'png'), (400, 200, 'webp')]
+    assert client.get('/wordcloud/unknown').status_code == 404
+    assert client.get(f'/wordcloud/{key}', params={'format': 'gif'}).status_code == 400
+
+
+def test_analyze_response_modes_compression_and_csv():
+    text = open('sample_document.txt', encoding='utf-8').read()
+    full = client.post('/analyze', data={'text': text})
+    assert full.headers['content-encoding'] == 'gzip'
+    summary = client.post('/analyze', data={'text': text, 'mode': 'summary'})
+    data = summary.json()
+    assert 'csv' not in data and 'positions' not in data['term_matches'][0]
+    assert data['statistics']['word_count'] == full.json()['statistics']['word_count']
+    assert len(summary.content) < len(full.content) / 3
+    plain = client.post('/analyze', data={'text': text, 'mode': 'compact'}, headers={'Accept-Encoding': 'identity'})
+    assert 'content-encoding' not in plain.headers and 'top_term_indices' in plain.json()
+    csv = client.get(f"/csv/{summary.headers['X-Result-Key']}")
+    assert csv.headers['content-type'].startswith('text/csv')
+    assert csv.text == full.json()['csv']
+    assert client.post('/analyze', data={'text': text, 'mode': 'tiny'}).status_code == 400
+    streamed = client.post('/analyze', data={'text': text, 'mode': 'summary', 'stream': 'ndjson'})
+    sections = [json.loads(line)['section'] for line in streamed.text.splitlines()]
+    assert 'csv' not in sections and 'term_matches' in sections
+
+
+def test_analyze_endpoint_streams_ndjson_sections():
+    text = "Scenario planning and horizon scanning with stakeholders. Backcasting toward preferred futures."
+    resp = client.post('/analyze', data={'text': text, 'stream': 'ndjson'})
+    assert resp.status_code == 200
+    assert resp.headers['content-type'].startswith('application/x-ndjson')
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    sections = [line['section'] for line in lines]
+    assert sections[0] == 'summary'
+    assert sections[-1] == 'done'
+    assert sections.index('co_occurrences') < sections.index('clusters') < sections.index('csv')
+    merged = {}
+    for line in lines[:-1]:
+        merged.update(line['data'])
+    full = client.post('/analyze', data={'text': text}).json()
+    full.pop('_cached', None)
+    assert merged.keys() == full.keys()
+    assert merged['statistics'] == full['statistics']
+
+
+def test_analyze_endpoint_streams_sse():
+    resp = client.post('/analyze', data={'text': 'Delphi method and foresight.', 'stream': 'sse'})
+    assert resp.status_code == 200
+    assert resp.text.startswith('event: summary\ndata: ')
+    assert 'event: done' in resp.text
+
+
+def test_large_plain_text_upload_uses_chunked_analyzer(monkeypatch):
+    import api.main as main
+    monkeypatch.setattr(main, 'STREAMING_THRESHOLD', 100)
+    monkeypatch.setattr(main, 'STREAMING_CHUNK_SIZE', 50)
+    text = open('sample_document.txt', encoding='utf-8').read()
+    expected = client.post('/analyze', data={'text': text, 'cooccurrence_window': '77'}).json()
+    files = {'file': ('doc.txt', text.encode('utf-8'), 'text/plain')}
+    resp = client.post('/analyze', data={'cooccurrence_window': '78'}, files=files)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data['term_matches'] == expected['term_matches']
+    assert data['statistics']['word_count'] == expected['statistics']['word_count']
+
+    monkeypatch.setattr(main, 'MAX_TEXT_LENGTH', 1000)
+    files = {'file': ('doc.txt', text.encode('utf-8'), 'text/plain')}
+    assert client.post('/analyze', data={'cooccurrence_window': '79'}, files=files).status_code == 413
+
+
+def test_repeat_upload_reuses_parsed_text():
+    before = client.get('/stats').json()['parse_cache']
+    files = {'file': ('notes.txt', b'Weak signals and wild cards in horizon scanning.', 'text/plain')}
+    client.post('/analyze', files=files)
+    files = {'file': ('notes.txt', b'Weak signals and wild cards in horizon scanning.', 'text/plain')}
+    assert client.post('/analyze', files=files).json()['_cached'] is True
+    after = client.get('/stats').json()['parse_cache']
+    assert after['hits'] == before['hits'] + 1
+    assert after['parse_seconds_saved'] >= before['parse_seconds_saved']
+
+
+def test_index_and_search_endpoints(monkeypatch, tmp_path):
+    import api.main as main
+    monkeypatch.setattr(main, '_SEARCH_INDEX', main.SearchIndex(str(tmp_path / 'index.sqlite3')))
+    client.post('/index', data={'doc_id': 'one', 'text': 'Backcasting with scenario planning.'})
+    client.post('/index', data={'doc_id': 'two', 'text': 'Horizon scanning only.'})
+    data = client.get('/search', params={'q': 'backcasting NEAR/50 "scenario planning"'}).json()
+    assert data['total'] == 1 and data['documents'][0]['doc_id'] == 'one'
+    assert client.get('/search', params={'q': 'a AND'}).status_code == 400
+    assert client.delete('/index/one').status_code == 200
+    assert client.delete('/index/one').status_code == 404
+    assert client.get('/search', params={'q': 'backcasting'}).json()['total'] == 0
+
+
+def test_analyze_endpoint_selects_vocabulary():
+    text = "Backcasting with stakeholders builds resilience."
+    default = client.post('/analyze', data={'text': text}).json()
+    full = client.post('/analyze', data={'text': text, 'vocabulary': 'futures-full'}).json()
+    custom = client.post('/analyze', data={'text': text, 'custom_vocabulary': json.dumps({'Mine': ['resilience']})}).json()
+    assert 'resilience' not in default['word_frequencies']
+    assert 'resilience' in full['word_frequencies']
+    assert list(custom['word_frequencies']) == ['resilience']
+    assert client.post('/analyze', data={'text': text, 'vocabulary': 'nope'}).status_code == 404
+    assert client.post('/analyze', data={'text': text, 'custom_vocabulary': '["x"]'}).status_code == 400
+    names = [v['name'] for v in client.get('/vocabularies').json()['vocabularies']]
+    assert 'futures' in names and 'futures-full' in names
+
+
+def test_jobs_endpoint_runs_analysis_in_background():
+    import time
+    text = open('sample_document.txt', encoding='utf-8').read()
+    submitted = client.post('/jobs', files={'file': ('doc.txt', text.encode('utf-8'), 'text/plain')})
+    assert submitted.status_code == 202
+    url = submitted.headers['location']
+    for _ in range(500):
+        job = client.get(url, params={'mode': 'summary'}).json()
+        if job['status'] in ('succeeded', 'failed'):
+            break
+        time.sleep(0.01)
+    assert job['status'] == 'succeeded' and job['progress'] == 1.0 and job['name'] == 'doc.txt'
+    full = client.post('/analyze', data={'text': text}).json()
+    assert job['result']['statistics']['word_count'] == full['statistics']['word_count']
+    assert job['result']['word_frequencies'] == full['word_frequencies']
+    assert 'positions' not in job['result']['term_matches'][0]
+    assert client.get(f"/csv/{job['result_key']}").status_code == 200
+    assert client.delete(url).status_code == 200
+    assert client.get(url).status_code == 404
+
+
+def test_analyze_reuses_chunks_of_a_revised_document():
+    import api.main as main
+    from futures_analyzer import analyze_text
+    text = open('sample_document.txt', encoding='utf-8').read()
+    first = client.post('/analyze', data={'text': text, 'snippet_limit': '2'}).json()
+    reused = main.CHUNK_CACHE.characters_reused
+    revised = text.replace('scenario', 'Scenario', 1) + '\nHorizon scanning was added in this draft.\n'
+    second = client.post('/analyze', data={'text': revised, 'snippet_limit': '2'}).json()
+    assert '_cached' not in second
+    assert main.CHUNK_CACHE.characters_reused - reused > len(text) / 2
+    expected = analyze_text(revised, snippet_limit=2)
+    assert second['term_matches'] == expected['term_matches']
+    assert second['statistics']['total_terms'] > first['statistics']['total_terms']
+    assert client.get('/stats').json()['chunk_cache']['chunks_reused'] > 0
+
+
+def test_streamed_analysis_compiles_vocabulary_off_the_event_loop(monkeypatch):
+    import asyncio
+    import api.main as main
+    on_loop = []
+    resolve = main._analyzer_for
+
+    def tracking(vocab):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return resolve(vocab)
+
+    monkeypatch.setattr(main, '_analyzer_for', tracking)
+    custom = json.dumps({'Custom': ['off loop term']})
+    resp = client.post('/analyze', data={'text': 'An off loop term.', 'custom_vocabulary': custom, 'stream': 'ndjson'})
+    assert resp.status_code == 200 and 'off loop term' in resp.text
+    assert on_loop == [False]
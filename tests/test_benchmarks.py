@@ -0,0 +1,19 @@
+from benchmarks.corpus import make_text, make_vocabulary
+from benchmarks.harness import compare
+from futures_analyzer import get_analyzer
+
+
+def test_synthetic_corpus_is_deterministic_and_matches_terms():
+    vocabulary = make_vocabulary(200)
+    assert sum(len(terms) for terms in vocabulary.values()) == 200
+    text = make_text(10_000, vocabulary)
+    assert len(text) == 10_000 and text == make_text(10_000, vocabulary)
+    assert get_analyzer(vocabulary).analyze_document(text)
+
+
+def test_compare_flags_regressions():
+    baseline = {'results': {'a': 1.0, 'b': 1.0, 'c': 1.0}}
+    current = {'results': {'a': 1.1, 'b': 2.0, 'c': 0.5, 'd': 1.0}}
+    rows, regressed = compare(baseline, current, threshold=1.25)
+    assert regressed
+    assert {row[0]: row[4] for row in rows} == {'a': '', 'b': 'REGRESSION', 'c': 'faster', 'd': 'new'}
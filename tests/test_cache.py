@@ -0,0 +1,84 @@
+import time
+
+from futures_cache import LRUCache, ParsedTextCache, SQLiteCacheBackend, cache_key, estimate_size, make_cache_backend
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2, max_bytes=None)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1  # 'b' is now least recently used
+    cache.set('c', 3)
+    assert 'b' not in cache
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    stats = cache.stats()
+    assert stats['evictions'] == 1
+    assert stats['hits'] == 3
+
+
+def test_lru_respects_byte_budget():
+    cache = LRUCache(max_entries=100, max_bytes=1000, sizeof=len)
+    cache.set('small', 'x' * 100)
+    cache.set('large', 'x' * 800)
+    cache.set('more', 'x' * 200)
+    assert 'small' not in cache
+    assert cache.bytes == 1000
+    assert cache.set('huge', 'x' * 5000) is False
+    assert 'huge' not in cache
+
+
+def test_lru_expires_entries():
+    cache = LRUCache(ttl=0.01)
+    cache.set('k', {'v': 1})
+    time.sleep(0.02)
+    assert cache.get('k') is None
+    assert cache.stats()['expirations'] == 1
+    assert cache.bytes == 0
+
+
+def test_estimate_size_grows_with_content():
+    assert estimate_size({'snippets': ['x' * 1000]}) > estimate_size({'snippets': ['x']}) + 900
+
+
+def test_sqlite_backend_persists_between_instances(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    value = {'statistics': {'total_terms': 3}, 'term_matches': [{'term': 'futures', 'positions': [1, 2]}]}
+    cache = make_cache_backend('sqlite', path=path)
+    key = cache_key('abc123', 100, 'vocab1')
+    cache.set(key, value)
+    reopened = SQLiteCacheBackend(path=path)
+    assert reopened.get(key) == value
+    assert reopened.get(cache_key('abc123', 100, 'vocab2')) is None
+    stats = reopened.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1
+    assert stats['entries'] == 1
+
+
+def test_sqlite_backend_evicts_and_expires(tmp_path):
+    cache = SQLiteCacheBackend(path=str(tmp_path / 'cache.sqlite3'), max_entries=2, ttl=None)
+    for key in ('a', 'b', 'c'):
+        cache.set(key, key)
+        time.sleep(0.001)
+    assert len(cache) == 2 and 'a' not in cache
+    expiring = SQLiteCacheBackend(path=str(tmp_path / 'other.sqlite3'), ttl=0.01)
+    expiring.set('k', 1)
+    time.sleep(0.02)
+    assert expiring.get('k') is None
+
+
+def test_parsed_text_cache_skips_repeat_parses():
+    calls = []
+
+    def parser(data, filename):
+        calls.append(filename)
+        time.sleep(0.01)
+        return data.decode('utf-8')
+
+    cache = ParsedTextCache()
+    assert cache.get_or_parse(b'scenario planning', 'a.pdf', parser) == 'scenario planning'
+    assert cache.get_or_parse(b'scenario planning', 'b.pdf', parser) == 'scenario planning'
+    assert cache.get_or_parse(b'scenario planning', 'a.docx', parser) == 'scenario planning'
+    assert calls == ['a.pdf', 'a.docx']
+    stats = cache.stats()
+    assert stats['hits'] == 1
+    assert stats['parse_seconds_saved'] >= 0.01
@@ -0,0 +1,52 @@
+import random
+
+from futures_analyzer import FuturesVocabularyAnalyzer, get_analyzer, results_with_wordcloud
+from futures_chunks import ChunkMatchCache, content_defined_chunks, cut_pattern
+
+
+def _revise(text, rng):
+    pos = rng.randrange(len(text))
+    return text[:pos] + rng.choice([' scenario planning ', 'x', '. Horizon scanning. ', '\n']) + text[pos + rng.randint(0, 40):]
+
+
+def test_chunk_boundaries_resynchronize_after_an_edit():
+    text = open('sample_document.txt', encoding='utf-8').read() * 4
+    pattern = cut_pattern(['scenario planning'])
+    spans = content_defined_chunks(text, pattern, min_size=64, max_size=1024)
+    assert spans[0][0] == 0 and spans[-1][1] == len(text) and len(spans) > 10
+    assert all(a[1] == b[0] for a, b in zip(spans, spans[1:]))
+    edited = text[:100] + 'An inserted sentence. ' + text[100:]
+    chunks = {text[a:b] for a, b in spans}
+    edited_chunks = [edited[a:b] for a, b in content_defined_chunks(edited, pattern, min_size=64, max_size=1024)]
+    assert sum(chunk not in chunks for chunk in edited_chunks) <= 3 < len(edited_chunks) / 3
+
+
+def test_cut_pattern_skips_characters_used_by_terms():
+    assert cut_pattern(['e.g. backcasting']).pattern == r'\n|[!\?;:]\s'
+    assert content_defined_chunks('no cut here ' * 100, cut_pattern(['x']), min_size=16) == [(0, 1200)]
+
+
+def test_chunk_cache_matches_a_full_scan_across_revisions():
+    analyzer = get_analyzer()
+    cache = ChunkMatchCache(min_size=64, max_size=1024)
+    rng = random.Random(0)
+    text = open('sample_document.txt', encoding='utf-8').read() * 3
+    for _ in range(10):
+        text = _revise(text, rng)
+        assert analyzer.analyze_document(text, chunk_cache=cache) == analyzer.analyze_document(text)
+    cached = results_with_wordcloud(analyzer, text, include_wordcloud=False, chunk_cache=cache)
+    plain = results_with_wordcloud(analyzer, text, include_wordcloud=False)
+    cached.pop('analysis_timestamp'), plain.pop('analysis_timestamp')
+    assert cached == plain
+    stats = cache.stats()
+    assert stats['chunks_reused'] > stats['chunks_scanned'] and stats['reuse_rate'] > 0.5
+
+
+def test_chunk_cache_handles_edge_characters():
+    analyzer = FuturesVocabularyAnalyzer({'A': ['foo bar', 'e.g. baz', 'σας'], 'B': ['qux']})
+    cache = ChunkMatchCache(min_size=8, max_size=64, boundary_bits=1)
+    rng = random.Random(1)
+    words = ['foo', 'bar', 'baz', 'e.g.', 'İ', 'ΣΑΣ.', 'σας', 'qux', '.', ';', '\n', 'lorem!']
+    for _ in range(50):
+        text = ' '.join(rng.choice(words) for _ in range(rng.randint(0, 200)))
+        assert analyzer.analyze_document(text, chunk_cache=cache) == analyzer.analyze_document(text)
@@ -0,0 +1,48 @@
+import pytest
+
+from futures_analyzer import FuturesVocabularyAnalyzer
+from futures_corpus import Corpus
+
+DOCS = {
+    'a': "Scenario planning and horizon scanning inform our foresight work.",
+    'b': "Horizon scanning for weak signals, then backcasting from preferred futures.",
+    'c': "Annual budget report with no forward-looking content.",
+}
+
+
+def _state(corpus):
+    return (corpus.word_count, corpus.term_totals, corpus.term_document_frequency, corpus.category_totals,
+            corpus.category_document_frequency, corpus.pair_totals, corpus.pair_document_frequency)
+
+
+def test_corpus_totals_and_document_frequency():
+    corpus = Corpus(FuturesVocabularyAnalyzer())
+    for doc_id, text in DOCS.items():
+        corpus.add(doc_id, text)
+    assert len(corpus) == 3
+    assert corpus.term_document_frequency['horizon scanning'] == 2
+    assert corpus.term_document_frequency['backcasting'] == 1
+    assert corpus.term_totals['horizon scanning'] == 2
+    assert corpus.word_count == sum(len(text.split()) for text in DOCS.values())
+    assert corpus.co_occurrences(None) == sorted(corpus.pair_totals.items(), key=lambda x: x[1], reverse=True)
+    # the rarer term weighs more in TF-IDF
+    assert corpus.idf('backcasting') > corpus.idf('horizon scanning')
+    assert corpus.scores('c')['futuresness'] == 0
+    assert corpus.rank_documents()[-1][0] == 'c'
+
+
+def test_corpus_remove_and_replace_undo_exactly():
+    analyzer = FuturesVocabularyAnalyzer()
+    corpus = Corpus(analyzer)
+    for doc_id, text in DOCS.items():
+        corpus.add(doc_id, text)
+    corpus.remove('a')
+    corpus.add('b', DOCS['a'])  # replaces the old 'b'
+
+    expected = Corpus(analyzer)
+    expected.add('c', DOCS['c'])
+    expected.add('b', DOCS['a'])
+    assert _state(corpus) == _state(expected)
+    assert 'horizon scanning' in corpus.term_totals and 'backcasting' not in corpus.term_totals
+    with pytest.raises(KeyError):
+        corpus.remove('a')
@@ -0,0 +1,27 @@
+import asyncio
+import threading
+
+import pytest
+from futures_executor import BoundedExecutor, ExecutorSaturated
+
+
+def test_bounded_executor_rejects_when_saturated():
+    executor = BoundedExecutor(max_workers=1, max_queue=0)
+    release = threading.Event()
+
+    async def scenario():
+        busy = asyncio.ensure_future(executor.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        with pytest.raises(ExecutorSaturated):
+            await executor.run(sum, [1, 2])
+        release.set()
+        assert await busy is True
+        assert await executor.run(sum, [1, 2]) == 3
+
+    asyncio.run(scenario())
+    stats = executor.stats()
+    assert stats['rejected'] == 1
+    assert stats['completed'] == 2
+    assert stats['in_flight'] == 0
+    assert stats['compute']['count'] == 2
+    executor.shutdown()
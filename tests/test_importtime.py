@@ -0,0 +1,21 @@
+import json
+
+from benchmarks.importtime import BUDGET, measure, parse_importtime, summarize
+
+
+def test_api_startup_does_not_import_lazy_dependencies():
+    with open(BUDGET, encoding='utf-8') as fh:
+        budget = json.load(fh)
+    assert measure(budget['module'], runs=1, lazy=budget['lazy'])['lazy_imported'] == []
+
+
+def test_summarize_splits_project_and_dependency_time():
+    stderr = '\n'.join([
+        'import time: self [us] | cumulative | imported package',
+        'import time:       100 |        100 |     re',
+        'import time:       500 |        600 |   futures_analyzer',
+        'import time:      2000 |       2000 |   fastapi',
+        'import time:       400 |       3000 | api.main',
+    ])
+    summary = summarize(parse_importtime(stderr), 'api.main', lazy=('numpy',))
+    assert summary == {'total_ms': 3.0, 'project_ms': 0.9, 'dependencies_ms': 2.1, 'lazy_imported': []}
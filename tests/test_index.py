@@ -0,0 +1,56 @@
+import pytest
+
+from futures_analyzer import FuturesVocabularyAnalyzer
+from futures_index import QueryError, SearchIndex, near_hits, parse_query
+
+DOCS = {
+    'a': "Backcasting workshops built on scenario planning from the start.",
+    'b': "Backcasting is discussed here. " + "Filler text without terms. " * 10 + "Scenario planning comes much later.",
+    'c': "Horizon scanning for weak signals.",
+}
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = SearchIndex(str(tmp_path / 'index.sqlite3'))
+    analyzer = FuturesVocabularyAnalyzer()
+    for doc_id, text in DOCS.items():
+        index.add_text(doc_id, text, analyzer)
+    return index
+
+
+def _ids(result):
+    return [d['doc_id'] for d in result['documents']]
+
+
+def test_parse_query():
+    assert parse_query('backcasting NEAR/50 "Stakeholder  Engagement"') == \
+        ('near', 'backcasting', 'stakeholder engagement', 50)
+    assert parse_query('a OR b c') == ('or', [('term', 'a'), ('and', [('term', 'b'), ('term', 'c')])])
+    assert parse_query('NOT (a OR b)') == ('not', ('or', [('term', 'a'), ('term', 'b')]))
+    for bad in ('', 'a AND', '(a', 'a NEAR (b OR c)'):
+        with pytest.raises(QueryError):
+            parse_query(bad)
+
+
+def test_boolean_and_proximity_search(index):
+    assert _ids(index.search('backcasting AND "scenario planning"')) == ['a', 'b']
+    assert _ids(index.search('backcasting NEAR/100 "scenario planning"')) == ['a']
+    assert _ids(index.search('"horizon scanning" OR backcasting')) == ['a', 'b', 'c']
+    assert _ids(index.search('NOT backcasting')) == ['c']
+    hit = index.search('"weak signals"')['documents'][0]
+    assert hit['terms']['weak signals']['frequency'] == 1
+    assert 'weak signals' in hit['terms']['weak signals']['snippets'][0]
+
+
+def test_index_updates_are_seen_by_search(index):
+    assert index.search('backcasting')['total'] == 2
+    index.remove('a')
+    index.add('c', [{'term': 'backcasting', 'category': 'x', 'frequency': 1, 'positions': [0], 'snippets': []}])
+    assert _ids(index.search('backcasting')) == ['b', 'c']
+    assert len(index) == 2 and 'a' not in index
+
+
+def test_near_hits_uses_cooccurrence_window():
+    assert near_hits([0, 100, 500], [150], 50) == 1
+    assert near_hits([0, 100, 500], [150], 49) == 0
@@ -0,0 +1,106 @@
+import threading
+import time
+
+import pytest
+from futures_analyzer import get_analyzer, results_with_wordcloud
+from futures_jobs import JobQueueFull, JobRunner, MemoryJobStore, SQLiteJobStore, new_job
+
+
+def _wait(store, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = store.get(job_id)
+        if job['status'] in ('succeeded', 'failed'):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+@pytest.mark.parametrize('make_store', [lambda tmp: MemoryJobStore(), lambda tmp: SQLiteJobStore(str(tmp / 'jobs.sqlite3'))])
+def test_job_runner_reports_progress_and_result(tmp_path, make_store):
+    store = make_store(tmp_path)
+    runner = JobRunner(store, max_workers=1)
+
+    def analyze(text, timer):
+        return results_with_wordcloud(get_analyzer(), text, include_wordcloud=False, timer=timer)
+
+    job = runner.submit(analyze, 'Scenario planning meets backcasting.', job_fields={'name': 'doc'})
+    assert job['status'] == 'queued' and job['name'] == 'doc'
+    done = _wait(store, job['id'])
+    assert done['status'] == 'succeeded' and done['progress'] == 1.0
+    assert done['result']['statistics']['unique_terms'] == 2
+    assert 'match' in done['timings']
+
+    failed = _wait(store, runner.submit(lambda timer: 1 / 0)['id'])
+    assert failed['status'] == 'failed' and 'division' in failed['error']
+    assert runner.stats()['succeeded'] == 1 and runner.stats()['store']['by_status']['failed'] == 1
+    runner.shutdown()
+
+
+def test_job_runner_rejects_when_queue_full():
+    runner = JobRunner(MemoryJobStore(), max_workers=1, max_queue=0)
+    release = threading.Event()
+    job = runner.submit(lambda timer: release.wait(5))
+    with pytest.raises(JobQueueFull):
+        runner.submit(lambda timer: None)
+    release.set()
+    assert _wait(runner.store, job['id'])['result'] is True
+    assert runner.stats()['rejected'] == 1
+    runner.shutdown()
+
+
+def test_job_stores_expire_after_retention(tmp_path):
+    for store in (MemoryJobStore(retention=0.05), SQLiteJobStore(str(tmp_path / 'jobs.sqlite3'), retention=0.05)):
+        job = store.create(new_job())
+        assert store.update(job['id'], progress=0.5)
+        assert store.get(job['id'])['progress'] == 0.5
+        time.sleep(0.1)
+        assert store.get(job['id']) is None
+        assert not store.update(job['id'], progress=1.0)
+        store.create(new_job())
+        time.sleep(0.1)
+        assert store.purge() == 1 and len(store) == 0
+
+
+def test_sqlite_job_store_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / 'jobs.sqlite3')
+    job = SQLiteJobStore(path).create(new_job())
+    other = SQLiteJobStore(path)
+    other.update(job['id'], status='succeeded', result={'ok': True})
+    assert SQLiteJobStore(path).get(job['id'])['result'] == {'ok': True}
+
+
+def test_memory_job_store_drops_oldest_finished_jobs_over_byte_budget():
+    store = MemoryJobStore(max_bytes=20_000)
+    running = store.create(new_job())
+    finished = [store.create(new_job()) for _ in range(3)]
+    for job in finished:
+        store.update(job['id'], status='succeeded', result={'csv': 'x' * 8_000})
+    assert store.get(finished[0]['id']) is None
+    assert store.get(finished[2]['id'])['result']['csv']
+    assert store.get(running['id'])['status'] == 'queued'
+    stats = store.stats()
+    assert stats['evictions'] == 1 and stats['bytes'] <= 20_000
+    store.delete(finished[2]['id'])
+    assert store.stats()['jobs'] == 2 and store.stats()['bytes'] < 12_000
+
+
+def test_memory_job_store_keeps_an_oversized_job_as_failed():
+    store = MemoryJobStore(max_bytes=5_000)
+    done = store.create(new_job())
+    store.update(done['id'], status='succeeded', result={'csv': 'x' * 1_000})
+    big = store.create(new_job())
+    store.update(big['id'], status='succeeded', result={'csv': 'x' * 10_000})
+    job = store.get(big['id'])
+    assert job['status'] == 'failed' and job['error'] == 'result too large' and job['result'] is None
+    assert store.get(done['id'])['result'] == {'csv': 'x' * 1_000}
+    assert store.stats()['evictions'] == 0
+
+
+def test_job_runner_fails_jobs_whose_result_cannot_be_stored(tmp_path):
+    runner = JobRunner(SQLiteJobStore(str(tmp_path / 'jobs.sqlite3')), max_workers=1)
+    job = _wait(runner.store, runner.submit(lambda timer: {'value': object()})['id'])
+    assert job['status'] == 'failed' and 'could not store result' in job['error']
+    runner.shutdown()
+    stats = runner.stats()
+    assert stats['in_flight'] == 0 and stats['failed'] == 1 and stats['succeeded'] == 0
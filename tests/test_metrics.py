@@ -0,0 +1,32 @@
+import pytest
+from futures_metrics import MetricsRegistry, StageTimer
+
+
+def test_stage_timer_accumulates_and_merges():
+    timer = StageTimer()
+    with timer.stage('match'):
+        pass
+    with timer.stage('match'):
+        pass
+    timer.merge({'decode': 0.5, 'total': 9.0})
+    timings = timer.as_dict()
+    assert list(timings) == ['match', 'decode', 'total']
+    assert timings['total'] == pytest.approx(timings['match'] + 0.5)
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    stages = registry.histogram('stage_seconds', 'Stage time', ('stage',), buckets=(0.1, 1.0))
+    registry.counter('requests_total', 'Requests', ('route',)).inc(route='/analyze')
+    registry.gauge('hit_ratio', 'Hit ratio', ('cache',), callback=lambda: {('result',): 0.25})
+    stages.observe(0.05, stage='match')
+    stages.observe(0.5, stage='match')
+    text = registry.render()
+    assert '# TYPE stage_seconds histogram' in text
+    assert 'stage_seconds_bucket{stage="match",le="0.1"} 1' in text
+    assert 'stage_seconds_bucket{stage="match",le="+Inf"} 2' in text
+    assert 'stage_seconds_count{stage="match"} 2' in text
+    assert 'requests_total{route="/analyze"} 1' in text
+    assert 'hit_ratio{cache="result"} 0.25' in text
+    with pytest.raises(ValueError):
+        stages.observe(1.0)
@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+import futures_analyzer
+from futures_analyzer import FUTURES_VOCABULARY, get_analyzer
+from futures_vocabulary import VocabularyStore, load_vocabulary_file, vocabulary_hash
+
+
+def _write(directory, filename, name, version, categories):
+    (directory / filename).write_text(json.dumps({'name': name, 'version': version, 'categories': categories}))
+
+
+def test_bundled_vocabularies_load():
+    store = VocabularyStore()
+    default = store.get()
+    assert default.categories == FUTURES_VOCABULARY
+    assert default.hash == vocabulary_hash(FUTURES_VOCABULARY)
+    full = store.get('futures-full')
+    assert sum(len(terms) for terms in full.categories.values()) > sum(len(terms) for terms in default.categories.values())
+
+
+def test_store_versions_and_reload(tmp_path):
+    _write(tmp_path, 'v1.json', 'tenant', '1.9.0', {'A': ['alpha']})
+    _write(tmp_path, 'v2.json', 'tenant', '1.10.0', {'A': ['alpha', 'beta']})
+    store = VocabularyStore(str(tmp_path), default='tenant')
+    assert store.get().version == '1.10.0'
+    assert store.get('tenant@1.9.0').categories == {'A': ['alpha']}
+    with pytest.raises(KeyError):
+        store.get('tenant@3')
+
+    (tmp_path / 'broken.json').write_text('{"categories": []}')
+    _write(tmp_path, 'v3.json', 'tenant', '2.0.0', {'A': ['gamma']})
+    result = store.reload()
+    assert 'tenant@2.0.0' in result['loaded'] and 'broken.json' in result['errors']
+    assert store.get().categories == {'A': ['gamma']}
+
+
+def test_yaml_vocabulary(tmp_path):
+    pytest.importorskip('yaml')
+    path = tmp_path / 'custom.yaml'
+    path.write_text("name: custom\nversion: '2'\ncategories:\n  Methods:\n    - backcasting\n    - visioning\n")
+    vocabulary = load_vocabulary_file(str(path))
+    assert (vocabulary.key, vocabulary.categories) == ('custom@2', {'Methods': ['backcasting', 'visioning']})
+
+
+def test_analyzer_registry_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(futures_analyzer, 'MAX_ANALYZERS', 2)
+    first = get_analyzer({'A': ['one']})
+    get_analyzer({'A': ['two']})
+    assert get_analyzer({'A': ['one']}) is first  # now most recently used
+    get_analyzer({'A': ['three']})
+    assert get_analyzer({'A': ['one']}) is first
+    assert get_analyzer({'A': ['two']}) is not None
+    assert len(futures_analyzer._ANALYZERS) == 2